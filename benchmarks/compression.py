@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CPU cost of request body compression against the bytes it saves.
+
+Usage: python benchmarks/compression.py [BATCH_SIZE] [REPEAT]
+"""
+
+import json
+import random
+import sys
+import time
+
+from zeus.interfaces.compression import compress, encode_body
+
+HOSTS = ['web-01', 'web-02', 'db-01', 'cache-01']
+APPS = ['nginx', 'sshd', 'cron', 'postgres']
+
+
+def make_logs(count):
+    rnd = random.Random(42)
+    return [{
+        'timestamp': 1451606400 + i,
+        'hostname': rnd.choice(HOSTS),
+        'appname': rnd.choice(APPS),
+        'pid': rnd.randint(100, 30000),
+        'message': 'GET /api/v1/items/{} HTTP/1.1 200 {}'.format(
+            rnd.randint(1, 5000), rnd.randint(100, 9000)),
+    } for i in range(count)]
+
+
+def main(batch_size=1000, repeat=20):
+    body = encode_body({'logs': json.dumps(make_logs(batch_size))})
+    print('Batch of {} logs, {} bytes'.format(batch_size, len(body)))
+    print('{:<8} {:>5} {:>12} {:>8} {:>10} {:>12}'.format(
+        'method', 'level', 'bytes', 'ratio', 'ms/batch', 'MB/s in'))
+
+    for compression in ('gzip', 'deflate'):
+        for level in (1, 6, 9):
+            start = time.clock()
+            for _ in range(repeat):
+                compressed = compress(body, compression, level)
+            elapsed = (time.clock() - start) / repeat
+            print('{:<8} {:>5} {:>12} {:>7.1f}x {:>10.2f} {:>12.1f}'.format(
+                compression, level, len(compressed),
+                float(len(body)) / len(compressed), elapsed * 1000,
+                len(body) / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
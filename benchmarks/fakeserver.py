@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local stand-in for the Zeus HTTP API, for benchmarks. It accepts log and
+metric uploads, and serves pages of synthetic logs, over keep-alive
+HTTP/1.1 connections.
+
+Usage: python benchmarks/fakeserver.py [PORT]
+"""
+
+import BaseHTTPServer
+import json
+import multiprocessing
+import SocketServer
+import sys
+import time
+import urlparse
+
+DEFAULT_TOTAL_LOGS = 10000
+DEFAULT_MESSAGE_BYTES = 100
+
+
+class FakeZeusServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, total_logs=DEFAULT_TOTAL_LOGS,
+                 message_bytes=DEFAULT_MESSAGE_BYTES, delay=0):
+        """
+        :param address: ``(host, port)`` to listen on, port 0 for any
+        :type address: tuple
+        :param total_logs: number of logs served by log queries
+        :type total_logs: int
+        :param message_bytes: size of the message of the served logs
+        :type message_bytes: int
+        :param delay: seconds every response is delayed by, standing for
+        the server processing time
+        :type delay: float
+        """
+        BaseHTTPServer.HTTPServer.__init__(self, address, FakeZeusHandler)
+        self.total_logs = total_logs
+        self.message_bytes = message_bytes
+        self.delay = delay
+
+
+class FakeZeusHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, don't wait for delayed ACKs.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts[0] != 'logs' or len(parts) != 2:
+            return self.reply(404, {'error': 'not found'})
+        query = urlparse.parse_qs(url.query)
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query.get('limit', ['100'])[0])
+        total = self.server.total_logs
+        message = 'x' * self.server.message_bytes
+        logs = [{'timestamp': 1451606400 + i, 'hostname': 'web-01',
+                 'message': message}
+                for i in range(offset, min(offset + limit, total))]
+        self.reply(200, {'total': total, 'result': logs})
+
+    def do_POST(self):
+        parts = urlparse.urlparse(self.path).path.strip('/').split('/')
+        body = self.read_body()
+        if parts[0] not in ('logs', 'metrics') or len(parts) != 3:
+            return self.reply(404, {'error': 'not found'})
+        self.reply(200, {'successful': 1, 'failed': 0,
+                         'bytes': len(body)})
+
+    do_PUT = do_POST
+
+    def do_DELETE(self):
+        self.reply(204, None)
+
+    def read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+            return self.rfile.read(int(self.headers.get('Content-Length',
+                                                        0)))
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(';')[0], 16)
+            if not size:
+                self.rfile.readline()
+                return ''.join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def reply(self, status, body):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        data = json.dumps(body) if body is not None else ''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _serve(port, pipe, kwargs):
+    server = FakeZeusServer(('127.0.0.1', port), **kwargs)
+    pipe.send(server.server_address[1])
+    server.serve_forever()
+
+
+def start(port=0, **kwargs):
+    """Run a ``FakeZeusServer`` in a child process, so that it doesn't
+    count in the CPU time of the benchmark.
+
+    :param int port: port to listen on, any free one by default.
+    :param kwargs: ``FakeZeusServer`` arguments.
+    :return: the process and the endpoint of the server.
+    :rtype: tuple
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve,
+                                      args=(port, child, kwargs))
+    process.daemon = True
+    process.start()
+    return process, 'http://127.0.0.1:{}'.format(parent.recv())
+
+
+def main(port=8080):
+    server = FakeZeusServer(('127.0.0.1', port))
+    print('Serving on http://127.0.0.1:{}'.format(port))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Syslog parsing throughput, in lines per second, with one and several
+parsing processes.
+
+Usage: python benchmarks/syslog.py [LINES] [PROCESSES]
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+
+from zeus.ingest.syslog import parse_lines
+
+HOSTS = ['web-01', 'web-02', 'db-01', 'cache-01']
+APPS = ['nginx', 'sshd', 'cron', 'postgres']
+
+
+def make_lines(count):
+    rnd = random.Random(42)
+    lines = []
+    for i in range(count):
+        second = i // 50
+        if i % 4:
+            lines.append('Jun  5 {:02d}:{:02d}:{:02d} {} {}[{}]: GET '
+                         '/api/v1/items/{} HTTP/1.1 200\n'.format(
+                             second // 3600 % 24, second // 60 % 60,
+                             second % 60, rnd.choice(HOSTS),
+                             rnd.choice(APPS), rnd.randint(100, 30000),
+                             rnd.randint(1, 5000)))
+        else:
+            lines.append('<165>1 2016-06-05T{:02d}:{:02d}:{:02d}.{:03d}Z {} '
+                         '{} {} ID47 - session opened for user {}\n'.format(
+                             second // 3600 % 24, second // 60 % 60,
+                             second % 60, i % 1000, rnd.choice(HOSTS),
+                             rnd.choice(APPS), rnd.randint(100, 30000),
+                             rnd.randint(1, 5000)))
+    return lines
+
+
+def main(count=500000, processes=multiprocessing.cpu_count()):
+    lines = make_lines(count)
+    print('{:<10} {:>10} {:>12} {:>14}'.format(
+        'processes', 'lines', 'seconds', 'lines/s'))
+    for workers in sorted(set([1, processes])):
+        start = time.time()
+        records = sum(1 for _ in parse_lines(lines, processes=workers,
+                                             year=2016))
+        elapsed = time.time() - start
+        assert records == count
+        print('{:<10} {:>10} {:>12.2f} {:>14.0f}'.format(
+            workers, count, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
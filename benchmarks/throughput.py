@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput, latency, CPU and memory of ``sendLog``, ``sendMetric`` and
+``iterLogs`` pagination against a local stand-in server, for several batch
+sizes, record sizes and concurrencies.
+
+Every run is printed as a table row, and written as one JSON object per
+line with ``--json FILE`` to compare releases.
+
+Usage: python benchmarks/throughput.py [--records N] [--json FILE] [--quick]
+                                      [--transport requests|urllib3]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import zeus
+from zeus.client import ZeusClient
+
+import fakeserver
+
+BATCH_SIZES = (100, 1000)
+RECORD_BYTES = (100, 1000)
+CONCURRENCIES = (1, 8)
+PAGE_SIZES = (100, 1000)
+PREFETCHES = (1, 4)
+
+
+class TimedClient(ZeusClient):
+    """Client recording the duration of every request."""
+
+    def __init__(self, *args, **kwargs):
+        super(TimedClient, self).__init__(*args, **kwargs)
+        self.durations = []
+        self._durations_lock = threading.Lock()
+
+    def _request(self, method, path, data=None, headers=None):
+        start = time.time()
+        response = super(TimedClient, self)._request(method, path, data,
+                                                     headers)
+        elapsed = time.time() - start
+        with self._durations_lock:
+            self.durations.append(elapsed)
+        return response
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def make_logs(count, record_bytes):
+    padding = 'x' * max(record_bytes - 60, 0)
+    return [{'timestamp': 1451606400 + i, 'hostname': 'web-01',
+             'message': padding} for i in range(count)]
+
+
+def make_metrics(count, record_bytes):
+    fields = max(record_bytes // 20, 1)
+    return [{'timestamp': 1451606400 + i,
+             'point': dict(('field{}'.format(f), i * f)
+                           for f in range(fields))} for i in range(count)]
+
+
+def measure(client, run, records):
+    """Return the counters of *run*, which handles *records* records."""
+    del client.durations[:]
+    cpu = sum(os.times()[:2])
+    start = time.time()
+    run()
+    elapsed = time.time() - start
+    cpu = sum(os.times()[:2]) - cpu
+    durations = client.durations
+    return {
+        'records': records,
+        'requests': len(durations),
+        'seconds': round(elapsed, 4),
+        'records_per_s': round(records / elapsed, 1),
+        'p50_ms': round(percentile(durations, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(durations, 0.99) * 1000, 3),
+        'cpu_s': round(cpu, 4),
+        'cpu_us_per_record': round(cpu / records * 1e6, 2),
+    }
+
+
+def bench_send(client, operation, total, batch_size, record_bytes,
+               concurrency):
+    make = make_logs if operation == 'sendLog' else make_metrics
+    send = getattr(client, operation)
+    batch = make(batch_size, record_bytes)
+    batches = max(total // batch_size, 1)
+
+    def run():
+        executor = ThreadPoolExecutor(concurrency)
+        try:
+            for response in executor.map(lambda _: send('bench', batch),
+                                         range(batches)):
+                assert response.status_code == 200, response.status_code
+        finally:
+            executor.shutdown()
+
+    return measure(client, run, batches * batch_size)
+
+
+def bench_get(client, total, page_size, prefetch):
+    def run():
+        count = sum(1 for _ in client.iterLogs('bench', page_size=page_size,
+                                               prefetch=prefetch))
+        assert count == total, count
+
+    return measure(client, run, total)
+
+
+def scenarios(quick):
+    batch_sizes = BATCH_SIZES[:1] if quick else BATCH_SIZES
+    for operation in ('sendLog', 'sendMetric'):
+        for batch_size in batch_sizes:
+            for record_bytes in RECORD_BYTES:
+                for concurrency in CONCURRENCIES:
+                    yield {'operation': operation, 'batch_size': batch_size,
+                           'record_bytes': record_bytes,
+                           'concurrency': concurrency}
+    for page_size in PAGE_SIZES:
+        for prefetch in PREFETCHES:
+            yield {'operation': 'iterLogs', 'batch_size': page_size,
+                   'record_bytes': fakeserver.DEFAULT_MESSAGE_BYTES,
+                   'concurrency': prefetch}
+
+
+def run_scenario(args, endpoint, scenario):
+    """Return the counters of *scenario*, with the peak memory of the
+    process running it."""
+    client = TimedClient('ZeUsRoCkS', endpoint, pool_maxsize=max(
+        CONCURRENCIES + PREFETCHES), transport=args.transport)
+    # The client always speaks HTTPS, the stand-in server plain HTTP.
+    client.endpoint = endpoint
+    try:
+        if scenario['operation'] == 'iterLogs':
+            result = bench_get(client, args.records, scenario['batch_size'],
+                               scenario['concurrency'])
+        else:
+            result = bench_send(client, scenario['operation'], args.records,
+                                scenario['batch_size'],
+                                scenario['record_bytes'],
+                                scenario['concurrency'])
+    finally:
+        client.close()
+    result['max_rss_kb'] = resource.getrusage(
+        resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def _send_result(connection, target, args):
+    connection.send(target(*args))
+    connection.close()
+
+
+def in_child(target, *args):
+    """Return the result of *target* called with *args* in a new process,
+    so that the peak memory of every scenario is its own and not the
+    high-water mark of the previous ones."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_send_result,
+                                      args=(sender, target, args))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        raise RuntimeError('scenario failed')
+    finally:
+        receiver.close()
+        process.join()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--records', type=int, default=20000,
+                        help='records per run')
+    parser.add_argument('--json', metavar='FILE',
+                        help='append the results to FILE as JSON lines')
+    parser.add_argument('--quick', action='store_true',
+                        help='run fewer combinations')
+    parser.add_argument('--delay', type=float, default=0,
+                        help='server processing time, in seconds')
+    parser.add_argument('--transport', default='requests',
+                        choices=('requests', 'urllib3'),
+                        help='HTTP transport of the client')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    process, endpoint = fakeserver.start(total_logs=args.records,
+                                         delay=args.delay)
+    output = open(args.json, 'a') if args.json else None
+    context = {'version': zeus.__version__,
+               'transport': args.transport,
+               'python': platform.python_version(),
+               'time': int(time.time())}
+
+    print('{:<10} {:>6} {:>6} {:>4} {:>12} {:>9} {:>9} {:>9} {:>10}'.format(
+        'operation', 'batch', 'bytes', 'conc', 'records/s', 'p50 ms',
+        'p99 ms', 'us/rec', 'rss KB'))
+    try:
+        for scenario in scenarios(args.quick):
+            result = in_child(run_scenario, args, endpoint, scenario)
+            result.update(scenario)
+            print('{operation:<10} {batch_size:>6} {record_bytes:>6} '
+                  '{concurrency:>4} {records_per_s:>12.0f} {p50_ms:>9.2f} '
+                  '{p99_ms:>9.2f} {cpu_us_per_record:>9.1f} '
+                  '{max_rss_kb:>10}'.format(**result))
+            if output:
+                result.update(context)
+                output.write(json.dumps(result, sort_keys=True) + '\n')
+    finally:
+        if output:
+            output.close()
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput of the batch validator on large log and metric batches, against
+encoding the same batch.
+
+Usage: python benchmarks/validation.py [BATCH_SIZE] [REPEAT]
+"""
+
+import random
+import sys
+import time
+
+from zeus.interfaces.encoding import get_serializer
+from zeus.interfaces.validation import BatchValidator
+
+HOSTS = ['web-01', 'web-02', 'db-01', 'cache-01']
+APPS = ['nginx', 'sshd', 'cron', 'postgres']
+
+
+def make_logs(count, bad_ratio=0.001):
+    rnd = random.Random(42)
+    logs = [{
+        'timestamp': 1451606400 + i,
+        'hostname': rnd.choice(HOSTS),
+        'appname': rnd.choice(APPS),
+        'message': 'GET /api/v1/items/{} HTTP/1.1 200'.format(
+            rnd.randint(1, 5000)),
+    } for i in range(count)]
+    for i in rnd.sample(range(count), int(count * bad_ratio)):
+        logs[i]['timestamp'] = 'not a timestamp'
+    return logs
+
+
+def make_metrics(count):
+    return [{'timestamp': 1451606400 + i,
+             'point': {'value': i, 'count': 1}} for i in range(count)]
+
+
+def timed(func, repeat):
+    start = time.clock()
+    for _ in range(repeat):
+        result = func()
+    return (time.clock() - start) / repeat, result
+
+
+def main(batch_size=100000, repeat=5):
+    dumps = get_serializer('auto')
+    validator = BatchValidator(max_future=None)
+    print('{:<8} {:>10} {:>10} {:>14} {:>12}'.format(
+        'kind', 'records', 'rejected', 'records/s', 'encode ms'))
+
+    for kind, records in (('logs', make_logs(batch_size)),
+                          ('metrics', make_metrics(batch_size))):
+        elapsed, (_, rejected) = timed(
+            lambda: validator.split(kind, records, dumps), repeat)
+        encode, _ = timed(lambda: dumps(records), repeat)
+        print('{:<8} {:>10} {:>10} {:>14.0f} {:>12.1f}'.format(
+            kind, batch_size, len(rejected), batch_size / elapsed,
+            encode * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
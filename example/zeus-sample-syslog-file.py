@@ -16,68 +16,14 @@
 
 
 from zeus.client import ZeusClient
+from zeus.ingest.syslog import send_syslog
 import os
-from pyparsing import Word, alphas, Suppress, Combine, nums, string
-from pyparsing import Optional, Regex
-from time import strftime
-import datetime
-import time
 
 ZEUS_API = "http://api.ciscozeus.io"
 BATCH_SIZE = 1000
-NUMBER_OF_SAMPLES = 1000
 auth_data = None
 
 
-class Parser(object):
-    def __init__(self):
-        ints = Word(nums)
-        month = Word(string.uppercase, string.lowercase, exact=3)
-        day = ints
-        hour = Combine(ints + ":" + ints + ":" + ints)
-        timestamp = month + day + hour
-        # hostname
-        hostname = Word(alphas + nums + "_" + "-" + ".")
-        # appname
-        appname = Word(alphas + "/" + "-" + "_" + ".")
-        appname += Optional(Suppress("[") + ints + Suppress("]"))
-        appname += Suppress(":")
-        # message
-        message = Regex(".*")
-        # pattern build
-        self.__pattern = timestamp + hostname + appname + message
-
-    def parse(self, line):
-        parsed = self.__pattern.parseString(line)
-
-        payload = {}
-        payload["timestamp"] = strftime("%Y-%m-%d %H:%M:%S")
-        payload["hostname"] = parsed[3]
-        payload["appname"] = parsed[4]
-        payload["pid"] = parsed[5]
-        payload["message"] = parsed[6]
-
-        return payload
-
-
-def gettime(line):
-    p = "%Y-%m-%d %H:%M:%S"
-    c = parser.parse(line)["timestamp"]
-    t = time.mktime(datetime.datetime.strptime(c, p).timetuple())
-    return t
-
-
-def getmsg(line):
-    return parser.parse(line)["message"]
-
-
-def splitfunction(syslogFile):
-    t = [
-        {"timestamp": gettime(line), "message": getmsg(line)}
-        for line in syslogFile]
-    return t
-
-
 path = os.getcwd() + "/example_syslog"
 token = raw_input("Enter Token: ")
 
@@ -89,20 +35,18 @@ print("Zeus client created with user token " + token)
 print("\nGreat! We are now ready to start sending and receiving data.")
 
 print("\nLets now post syslogs from file.")
-print("We are going to send a log " + str(NUMBER_OF_SAMPLES) + " times in " +
-      "groups of " + str(BATCH_SIZE) + ".")
+print("We are going to parse them and send the logs in groups of " +
+      str(BATCH_SIZE) + ".")
 
 message = ""
 
 # Syslog sending
 print("\nPOST request to http://api.ciscozeus.io/logs/" + token + "/syslog")
-parser = Parser()
-
 for fin in os.listdir(path):
     f = path + "/" + fin
     with open(f) as syslogFile:
-        messages = splitfunction(syslogFile)
-        z.sendLog("syslog", messages)
+        stats = send_syslog(z, "syslog", syslogFile, batch_size=BATCH_SIZE)
+    print("Sent " + str(stats['records']) + " logs from " + fin + ".")
 
 print("User token: " + token)
 print(
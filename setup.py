@@ -43,11 +43,18 @@ setup(
     packages=[
         'zeus',
         'zeus.interfaces',
+        'zeus.ingest',
     ],
     package_dir={
         'zeus': 'zeus',
     },
     include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'zeus-ship = zeus.ship:main',
+            'zeus-export = zeus.export:main',
+        ],
+    },
     install_requires=requirements,
     license="Apache License 2.0",
     zip_safe=False,
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_async_client
+----------------------------------
+
+Tests for `zeus.async_client` module.
+"""
+
+import json
+import threading
+import unittest
+
+from mock import patch
+
+from zeus.async_client import AsyncZeusClient
+from zeus.interfaces.utils import ZeusException
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+FAKE_SERVER = 'https://zeus.rocks'
+
+
+class TestAsyncZeusClient(unittest.TestCase):
+    def setUp(self):
+        self.fake_headers = {
+            'Authorization': "Bearer {}".format(FAKE_TOKEN),
+            'content-type': 'application/json'
+        }
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_send_log_returns_future(self, mock_build_session):
+        logs = [{"timestamp": 123541423, "message": "TestLog"}]
+        with AsyncZeusClient(FAKE_TOKEN, FAKE_SERVER) as z:
+            future = z.sendLog('ZeusTest', logs)
+            self.assertEqual(future.result(),
+                             mock_build_session.return_value.post.return_value)
+        mock_build_session.return_value.post.assert_called_with(
+            FAKE_SERVER + '/logs/' + FAKE_TOKEN + '/ZeusTest',
+            data={"logs": json.dumps(logs)},
+            headers=self.fake_headers, timeout=20)
+        mock_build_session.return_value.close.assert_called_once_with()
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_pool_matches_workers(self, mock_build_session):
+        z = AsyncZeusClient(FAKE_TOKEN, FAKE_SERVER, max_workers=7)
+        z.getAlerts().result()
+        z.close()
+        mock_build_session.assert_called_once_with(
+            pool_connections=10, pool_maxsize=7, pool_block=False,
+            keep_alive=True)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_requests_run_concurrently(self, mock_build_session):
+        barrier = threading.Semaphore(0)
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            barrier.release()
+            release.wait(5)
+
+        mock_build_session.return_value.get.side_effect = slow_get
+        with AsyncZeusClient(FAKE_TOKEN, FAKE_SERVER, max_workers=4) as z:
+            futures = [z.getAlert(i) for i in range(4)]
+            for _ in range(4):
+                barrier.acquire()
+            self.assertFalse(any(f.done() for f in futures))
+            release.set()
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_bucket_view(self, mock_build_session):
+        with AsyncZeusClient(FAKE_TOKEN, FAKE_SERVER) as z:
+            z.bucket('org/bucket').getAlerts().result()
+            headers = mock_build_session.return_value.get.call_args[1][
+                'headers']
+            self.assertEqual(headers['Bucket-Name'], 'org/bucket')
+            z.getAlerts().result()
+            headers = mock_build_session.return_value.get.call_args[1][
+                'headers']
+            self.assertNotIn('Bucket-Name', headers)
+
+    def test_errors_are_set_on_future(self):
+        with AsyncZeusClient(FAKE_TOKEN, FAKE_SERVER) as z:
+            future = z.sendMetric('_WrongName', [])
+            self.assertRaises(ZeusException, future.result)
+
+
+if __name__ == '__main__':
+    unittest.main()
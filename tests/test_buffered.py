@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_buffered
+----------------------------------
+
+Tests for `zeus.interfaces.buffered` module.
+"""
+
+import datetime
+import json
+import threading
+import time
+import unittest
+
+from mock import MagicMock
+
+from zeus import client
+from zeus.interfaces.adaptive import AdaptiveBatchSize
+from zeus.interfaces.buffered import BufferedLogSender
+from zeus.interfaces.buffered import BufferedMetricSender
+from zeus.interfaces.utils import ZeusException
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+FAKE_SERVER = 'https://zeus.rocks'
+
+
+class FakeClient(client.ZeusClient):
+    def __init__(self, status_code=200):
+        super(FakeClient, self).__init__(FAKE_TOKEN, FAKE_SERVER)
+        self.status_code = status_code
+        self.sent = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def _request(self, method, path, data=None, headers=None):
+        self.release.wait()
+        field = 'logs' if path.startswith('/logs/') else 'metrics'
+        self.sent.append((path, json.loads(data[field])))
+        return MagicMock(status_code=self.status_code)
+
+
+class TestBufferedLogSender(unittest.TestCase):
+    def setUp(self):
+        self.z = FakeClient()
+
+    def test_batches_by_record_count(self):
+        with BufferedLogSender(self.z, max_records=2,
+                               linger_sec=60) as sender:
+            for i in range(5):
+                sender.send('ZeusTest', {'n': i})
+            sender.flush()
+            self.assertEqual([len(logs) for _, logs in self.z.sent],
+                             [2, 2, 1])
+            self.assertEqual(sender.stats['sent'], 5)
+            self.assertEqual(sender.stats['batches'], 3)
+
+    def test_batches_by_byte_size(self):
+        record = {'message': 'x' * 100}
+        size = len(json.dumps(record)) + 1
+        with BufferedLogSender(self.z, max_bytes=size * 3,
+                               linger_sec=60) as sender:
+            for i in range(7):
+                sender.send('ZeusTest', record)
+            sender.flush()
+        self.assertEqual([len(logs) for _, logs in self.z.sent], [3, 3, 1])
+
+    def test_batches_per_log_name(self):
+        with BufferedLogSender(self.z, linger_sec=60) as sender:
+            sender.send('LogA', {'n': 1})
+            sender.send('LogB', {'n': 2})
+            sender.send('LogA', {'n': 3})
+        self.assertEqual(sorted(self.z.sent), [
+            ('/logs/{}/LogA'.format(FAKE_TOKEN), [{'n': 1}, {'n': 3}]),
+            ('/logs/{}/LogB'.format(FAKE_TOKEN), [{'n': 2}]),
+        ])
+
+    def test_linger_time(self):
+        sender = BufferedLogSender(self.z, linger_sec=0.05)
+        sender.send('ZeusTest', {'n': 1})
+        deadline = time.time() + 2
+        while not self.z.sent and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.z.sent[0][1], [{'n': 1}])
+        sender.close()
+
+    def test_full_queue_drops(self):
+        self.z.release.clear()
+        sender = BufferedLogSender(self.z, max_records=1, queue_size=1)
+        results = [sender.send('ZeusTest', {'n': i}) for i in range(5)]
+        self.assertIn(False, results)
+        self.assertEqual(sender.stats['dropped'], results.count(False))
+        self.z.release.set()
+        sender.close()
+        self.assertEqual(sender.stats['sent'], results.count(True))
+
+    def test_flush_timeout_with_full_queue(self):
+        self.z.release.clear()
+        sender = BufferedLogSender(self.z, max_records=1, queue_size=1)
+        while sender.send('ZeusTest', {'n': 1}):
+            pass
+        start = time.time()
+        self.assertFalse(sender.flush(timeout=0.2))
+        self.assertTrue(time.time() - start < 1)
+        self.z.release.set()
+        self.assertTrue(sender.flush(timeout=5))
+        sender.close()
+
+    def test_failed_batches(self):
+        z = FakeClient(status_code=500)
+        with BufferedLogSender(z) as sender:
+            sender.send('ZeusTest', {'n': 1})
+            sender.flush()
+            self.assertEqual(sender.stats['failed'], 1)
+            self.assertIsInstance(sender.stats['last_error'], ZeusException)
+
+    def test_record_that_cannot_be_encoded(self):
+        sender = BufferedLogSender(self.z, linger_sec=60)
+        sender.send('ZeusTest', {'when': datetime.datetime(2016, 1, 1)})
+        sender.send('ZeusTest', {'n': 1})
+        self.assertTrue(sender.flush(timeout=5))
+        self.assertEqual(self.z.sent[0][1], [{'n': 1}])
+        stats = sender.stats
+        self.assertEqual((stats['sent'], stats['failed']), (1, 1))
+        self.assertIsInstance(stats['last_error'], TypeError)
+
+        sender.close()
+        self.assertTrue(sender.flush())
+        sender.close()
+
+    def test_invalid_name_and_closed(self):
+        sender = self.z.bufferedLogSender()
+        self.assertRaises(ZeusException, sender.send, 'W.rongName', {})
+        sender.close()
+        self.assertRaises(ZeusException, sender.send, 'ZeusTest', {})
+
+    def test_metric_sender(self):
+        with self.z.bufferedMetricSender(max_records=2) as sender:
+            for i in range(3):
+                sender.send('Zeus.Test', {'value': i})
+            self.assertRaises(ZeusException, sender.send, '_WrongName', {})
+        self.assertEqual(self.z.sent, [
+            ('/metrics/{}/Zeus.Test'.format(FAKE_TOKEN),
+             [{'value': 0}, {'value': 1}]),
+            ('/metrics/{}/Zeus.Test'.format(FAKE_TOKEN), [{'value': 2}]),
+        ])
+
+    def test_adaptive_metric_sender(self):
+        adaptive = AdaptiveBatchSize(initial_size=10, min_size=10,
+                                     max_size=10)
+        with BufferedMetricSender(self.z, linger_sec=60,
+                                  adaptive=adaptive) as sender:
+            self.assertRaises(ZeusException, sender.send, '_WrongName', {})
+            for i in range(25):
+                sender.send('Zeus.Test', {'value': i})
+            sender.flush()
+        path = '/metrics/{}/Zeus.Test'.format(FAKE_TOKEN)
+        self.assertEqual([(p, len(points)) for p, points in self.z.sent],
+                         [(path, 10), (path, 10), (path, 5)])
+        self.assertEqual(sender.stats['sent'], 25)
+
+    def test_adaptive_sender(self):
+        # The adaptive batch size starts at its minimum of 10 records.
+        with BufferedLogSender(self.z, max_records=2, linger_sec=60,
+                               adaptive=True) as sender:
+            self.assertEqual(sender.adaptive.target_latency, 5)
+            for i in range(10):
+                sender.send('ZeusTest', {'n': i})
+            sender.flush()
+        self.assertEqual(len(self.z.sent[0][1]), 10)
+
+        z = FakeClient(status_code=500)
+        adaptive = AdaptiveBatchSize(initial_size=100, min_size=10)
+        with BufferedLogSender(z, adaptive=adaptive) as sender:
+            sender.send('ZeusTest', {'n': 1})
+            sender.flush()
+            self.assertEqual(sender.stats['batch_size'], 50)
+
+
+class TestAdaptiveBatchSize(unittest.TestCase):
+    def test_additive_increase(self):
+        adaptive = AdaptiveBatchSize(initial_size=100, increase=10,
+                                     target_latency=1)
+        adaptive.observe(100, 0.1, 200)
+        adaptive.observe(110, 0.1, 200)
+        self.assertEqual(adaptive.size, 120)
+        # Partial batches say nothing about larger ones.
+        adaptive.observe(5, 0.1, 200)
+        self.assertEqual(adaptive.size, 120)
+
+    def test_multiplicative_decrease(self):
+        adaptive = AdaptiveBatchSize(initial_size=100, min_size=30,
+                                     target_latency=1)
+        adaptive.observe(100, 2.0, 200)
+        self.assertEqual(adaptive.size, 50)
+        adaptive.observe(50, 0.1, 413)
+        self.assertEqual(adaptive.size, 30)
+        adaptive.observe(30, 0.1, None)
+        self.assertEqual(adaptive.size, 30)
+
+    def test_limits(self):
+        adaptive = AdaptiveBatchSize(initial_size=100, max_size=150,
+                                     increase=100, max_bytes=1000)
+        adaptive.observe(100, 0.1, 200)
+        self.assertEqual(adaptive.size, 150)
+        # 100 bytes per record, 10 of them fit in max_bytes.
+        adaptive.observe(100, 0.1, 200, size=10000)
+        self.assertEqual(adaptive.size, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
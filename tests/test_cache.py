@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_cache
+----------------------------------
+
+Tests for `zeus.interfaces.cache` module.
+"""
+
+import unittest
+
+from mock import MagicMock, patch
+
+from zeus import client
+from zeus.interfaces.cache import ResponseCache
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+FAKE_SERVER = 'https://zeus.rocks'
+
+
+def fake_response(status_code=200, content='[]', headers=None):
+    return MagicMock(status_code=status_code, content=content,
+                     headers=headers or {})
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = ResponseCache(ttls={'alerts': 10})
+        self.cache.clock = lambda: self.now
+        self.z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, cache=self.cache)
+        self.z._request = MagicMock(return_value=fake_response())
+
+    def test_fresh_responses_are_cached(self):
+        first = self.z.getAlerts()
+        self.assertIs(self.z.getAlerts(), first)
+        self.assertEqual(self.z._request.call_count, 1)
+
+        self.now += 11
+        self.z.getAlerts()
+        self.assertEqual(self.z._request.call_count, 2)
+
+    def test_key_includes_params_and_bucket(self):
+        self.z.getMetricNames(metric_name='cpu')
+        self.z.getMetricNames(metric_name='mem')
+        self.z.bucket('org/bucket').getMetricNames(metric_name='cpu')
+        self.z.getMetricNames(metric_name='cpu')
+        self.assertEqual(self.z._request.call_count, 3)
+
+    def test_metric_values_are_not_cached(self):
+        self.z.getMetric('cpu', from_date=1, to_date=2)
+        self.z.getMetric('cpu', from_date=1, to_date=2)
+        self.assertEqual(self.z._request.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        self.z._request.return_value = fake_response(500)
+        self.z.getAlert(1)
+        self.z.getAlert(1)
+        self.assertEqual(self.z._request.call_count, 2)
+
+    def test_revalidation(self):
+        cached = fake_response(headers={
+            'ETag': '"v1"', 'Last-Modified': 'Fri, 31 Dec 1999 23:59:59 GMT'})
+        self.z._request.return_value = cached
+        self.z.getTriggeredAlerts()
+
+        self.now += 60
+        self.z._request.return_value = fake_response(304)
+        self.assertIs(self.z.getTriggeredAlerts(), cached)
+        self.assertEqual(self.z._request.call_args[1]['headers'], {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Fri, 31 Dec 1999 23:59:59 GMT'})
+        self.assertEqual(self.cache.stats['revalidated'], 1)
+
+        # Fresh again after the 304.
+        self.assertIs(self.z.getTriggeredAlerts(), cached)
+        self.assertEqual(self.z._request.call_count, 2)
+
+    def test_changes_invalidate(self):
+        self.z.getAlerts()
+        self.z.getAlert(1)
+        self.z.getMetricNames()
+        self.z.bucket('org/bucket').deleteAlert(1)
+        self.z.getAlerts()
+        self.z.getAlert(1)
+        self.z.getMetricNames()
+        self.assertEqual(self.z._request.call_count, 6)
+
+        self.z.deleteMetric('cpu')
+        self.z.getAlerts()
+        self.z.getMetricNames()
+        self.assertEqual(self.z._request.call_count, 8)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_bytes=100)
+        for i in range(5):
+            cache.store(('b', '/p%d' % i, ()), 'alert', '/p%d' % i,
+                        fake_response(content='x' * 30))
+        self.assertLessEqual(cache.size_bytes, 100)
+        self.assertEqual(cache.stats['evictions'], 2)
+        entry, fresh = cache.lookup(('b', '/p0', ()))
+        self.assertIsNone(entry)
+        entry, fresh = cache.lookup(('b', '/p4', ()))
+        self.assertTrue(fresh)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_no_cache_by_default(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER)
+        z.getAlerts()
+        z.getAlerts()
+        self.assertEqual(mock_build_session.return_value.get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
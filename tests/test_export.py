@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_export
+----------------------------------
+
+Tests for `zeus.export` module.
+"""
+
+import json
+import os
+import shutil
+import StringIO
+import tempfile
+import unittest
+
+from mock import MagicMock, patch
+
+from zeus import export
+from zeus.client import ZeusClient
+from zeus.interfaces.utils import ZeusException
+
+
+def fake_logs(method, path, data=None, headers=None):
+    """Serve logs timestamped 1000 to 1099, one per second."""
+    start = int(float(data.get('from', 1000)))
+    end = int(float(data.get('to', 1099)))
+    timestamps = range(start, end + 1)
+    offset = data.get('offset', 0)
+    page = timestamps[offset:offset + data['limit']]
+    return MagicMock(status_code=200, json=MagicMock(return_value={
+        'total': len(timestamps),
+        'result': [{'timestamp': t, 'tags': ['a']} for t in page]}))
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.z = ZeusClient('ZeUsRoCkS', 'zeus.rocks')
+        self.z._request = MagicMock(side_effect=fake_logs)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_log_batches(self):
+        batches = list(export.iter_log_batches(
+            self.z, 'syslog', from_date=1000, to_date=1024, page_size=10))
+        self.assertEqual([len(b) for b in batches], [10, 10, 5])
+
+    def test_sharded_logs_keep_time_order(self):
+        batches = export.iter_log_batches(
+            self.z, 'syslog', from_date=1000, to_date=1099, page_size=7,
+            shards=4, max_workers=2)
+        timestamps = [log['timestamp'] for batch in batches for log in batch]
+        self.assertEqual(timestamps, range(1000, 1100))
+
+    def test_sharded_error(self):
+        self.z._request.side_effect = lambda *a, **k: MagicMock(
+            status_code=500)
+        batches = export.iter_log_batches(self.z, 'syslog', from_date=1000,
+                                          to_date=1099, shards=3)
+        self.assertRaises(ZeusException, list, batches)
+
+    def test_ndjson_and_csv(self):
+        stream = StringIO.StringIO()
+        count = export.export(
+            export.iter_log_batches(self.z, 'syslog', from_date=1000,
+                                    to_date=1002),
+            export.NdjsonWriter(stream))
+        self.assertEqual(count, 3)
+        self.assertEqual(json.loads(stream.getvalue().splitlines()[2]),
+                         {'timestamp': 1002, 'tags': ['a']})
+
+        stream = StringIO.StringIO()
+        export.export([[{'a': 1, 'b': {'c': 2}}], [{'a': 3, 'd': 4}]],
+                      export.CsvWriter(stream))
+        self.assertEqual(stream.getvalue().splitlines(),
+                         ['a,b', '1,"{""c"": 2}"', '3,'])
+
+    def test_metric_batches(self):
+        def get_metric(method, path, data=None, headers=None):
+            return MagicMock(status_code=200, json=MagicMock(return_value=[{
+                'name': 'cpu', 'columns': ['time', 'value'],
+                'points': [[float(data['from']), 1]]}]))
+        self.z._request.side_effect = get_metric
+
+        batches = list(export.iter_metric_batches(
+            self.z, 'cpu', from_date=1000, to_date=1040, shards=4))
+        self.assertEqual([b[0]['time'] for b in batches],
+                         [1000, 1010, 1020, 1030])
+        self.assertEqual(batches[0][0], {'time': 1000, 'value': 1,
+                                         'name': 'cpu'})
+
+    def test_metric_pages(self):
+        def get_metric(method, path, data=None, headers=None):
+            times = [t for t in range(1000, 1100)
+                     if float(data['from']) <= t <= float(data['to'])]
+            offset = data.get('offset', 0)
+            times = times[offset:offset + data['limit']]
+            return MagicMock(status_code=200, json=MagicMock(return_value=[{
+                'name': 'cpu', 'columns': ['time', 'value'],
+                'points': [[t, 1] for t in times]}]))
+        self.z._request.side_effect = get_metric
+
+        batches = list(export.iter_metric_batches(
+            self.z, 'cpu', from_date=1000, to_date=1024, page_size=10))
+        self.assertEqual([len(b) for b in batches], [10, 10, 5])
+        self.assertEqual(self.z._request.call_count, 3)
+
+        batches = export.iter_metric_batches(
+            self.z, 'cpu', from_date=1000, to_date=1099, page_size=10,
+            shards=4, max_workers=2)
+        times = [row['time'] for batch in batches for row in batch]
+        self.assertEqual(times, range(1000, 1100))
+
+    def test_parquet_needs_output(self):
+        self.assertRaises(ZeusException, export.make_writer,
+                          export.PARQUET, None)
+
+    @patch('zeus.export.ZeusClient')
+    def test_main(self, mock_client):
+        mock_client.return_value.dumps = json.dumps
+        mock_client.return_value._request.side_effect = fake_logs
+        output = os.path.join(self.directory, 'out.csv')
+        status = export.main(['--log', 'syslog', '--token', 'ZeUsRoCkS',
+                              '--from', '1000', '--to', '1009',
+                              '--shards', '2', '-o', output])
+        self.assertEqual(status, 0)
+        with open(output) as f:
+            self.assertEqual(len(f.read().splitlines()), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_history
+----------------------------------
+
+Tests for `zeus.interfaces.history` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import MagicMock
+
+from zeus import client
+from zeus.interfaces.history import MetricHistoryCache
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+FAKE_SERVER = 'https://zeus.rocks'
+
+
+class TestMetricHistoryCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MetricHistoryCache(
+            os.path.join(self.directory, 'metrics.db'), window_seconds=100,
+            immutable_after=50)
+        self.cache.clock = lambda: 1000
+        self.z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER,
+                                   metric_cache=self.cache)
+        self.windows = []
+
+        def request(method, path, data=None, headers=None):
+            if method != 'GET':
+                return MagicMock(status_code=200)
+            # One point per window, at its start.
+            self.windows.append((data['from'], data['to']))
+            start = int(float(data['from']))
+            response = MagicMock(status_code=200)
+            response.json.return_value = [{
+                'name': 'cpu', 'columns': ['time', 'value'],
+                'points': [[start, 1]]}]
+            return response
+
+        self.z._request = MagicMock(side_effect=request)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_historical_windows_are_cached(self):
+        series = self.z.getMetricCached('cpu', from_date=150, to_date=980)
+        # Edges before 200 and after 900 (recent) are fetched apart.
+        self.assertEqual(self.windows[0], (150, '199.999'))
+        self.assertEqual(self.windows[-1], ('900', 980))
+        self.assertEqual(len(self.windows), 9)
+        self.assertEqual([p[0] for p in series[0]['points']],
+                         [150] + range(200, 901, 100))
+
+        self.windows = []
+        again = self.z.getMetricCached('cpu', from_date=150, to_date=980)
+        self.assertEqual(again, series)
+        self.assertEqual(self.windows, [(150, '199.999'), ('900', 980)])
+        self.assertEqual(self.cache.stats, {'hits': 7, 'misses': 7})
+
+    def test_cache_survives_restart(self):
+        self.z.getMetricCached('cpu', from_date=200, to_date=400)
+        self.cache.close()
+        self.cache = MetricHistoryCache(
+            os.path.join(self.directory, 'metrics.db'), window_seconds=100,
+            immutable_after=50)
+        self.z.metric_cache = self.cache
+        self.windows = []
+        self.z.getMetricCached('cpu', from_date=200, to_date=400)
+        self.assertEqual(self.windows, [('400', 400)])
+
+    def test_key_includes_query_and_bucket(self):
+        self.z.getMetricCached('cpu', from_date=200, to_date=300)
+        self.z.getMetricCached('cpu', from_date=200, to_date=300,
+                               filter_condition='"value" > 1')
+        self.z.bucket('org/bucket').getMetricCached('cpu', from_date=200,
+                                                    to_date=300)
+        self.assertEqual(self.cache.stats['hits'], 0)
+
+    def test_windows_align_to_group_interval(self):
+        self.z.getMetricCached('cpu', from_date=0.5, to_date=700,
+                               aggregator_function='sum',
+                               aggregator_column='value',
+                               group_interval='1m')
+        # 100s windows are widened to 120s.
+        self.assertEqual(self.windows[:3], [
+            (0.5, '119.999'), ('120', '239.999'), ('240', '359.999')])
+
+    def test_delete_metric_forgets_windows(self):
+        self.z.getMetricCached('cpu', from_date=200, to_date=300)
+        self.z.deleteMetric('cpu')
+        self.windows = []
+        self.z.getMetricCached('cpu', from_date=200, to_date=300)
+        self.assertEqual(len(self.windows), 2)
+
+    def test_without_cache(self):
+        self.z.metric_cache = None
+        self.z.getMetricCached('cpu', from_date=150, to_date=980)
+        self.assertEqual(self.windows, [(150, 980)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_import_time
+----------------------------------
+
+Cold start budget of `zeus.client`, measured in fresh interpreters.
+"""
+
+import json
+import subprocess
+import sys
+import unittest
+
+# Max number of modules loaded by `from zeus import client`.
+MAX_MODULES = 150
+# Modules only loaded when the client first needs them.
+DEFERRED = ('requests', 'urllib3', 'concurrent.futures', 'sqlite3',
+            'hyper', 'ujson', 'orjson', 'zeus.interfaces.buffered',
+            'zeus.interfaces.history', 'zeus.interfaces.telemetry')
+RUNS = 5
+
+MEASURE = """
+import json, sys, time
+before = set(sys.modules)
+start = time.time()
+{statement}
+elapsed = time.time() - start
+{after}
+print(json.dumps({{'seconds': elapsed, 'loaded': [
+    name for name in set(sys.modules) - before
+    if sys.modules[name] is not None]}}))
+"""
+
+
+def measure(statement, after=''):
+    """Return the fastest of a few imports in new interpreters, and the
+    modules it loaded."""
+    script = MEASURE.format(statement=statement, after=after)
+    results = [json.loads(subprocess.check_output([sys.executable, '-c',
+                                                   script]))
+               for _ in range(RUNS)]
+    return min(result['seconds'] for result in results), results[0]['loaded']
+
+
+class TestImportTime(unittest.TestCase):
+    def test_deferred_modules(self):
+        _, loaded = measure(
+            'from zeus import client',
+            after="client.ZeusClient('token').bucket('org/b')")
+        self.assertEqual([name for name in DEFERRED if name in loaded], [])
+        self.assertTrue(len(loaded) <= MAX_MODULES, len(loaded))
+
+    def test_budget(self):
+        # Importing the client must cost less than importing the HTTP
+        # library it sends requests with, which makes the budget hold on
+        # slow and fast machines alike.
+        seconds, _ = measure('from zeus import client')
+        requests_seconds, _ = measure('import requests')
+        self.assertTrue(seconds < requests_seconds,
+                        '{:.1f} ms, requests takes {:.1f} ms'.format(
+                            seconds * 1000, requests_seconds * 1000))
+
+    def test_loaded_on_first_use(self):
+        _, loaded = measure(
+            'from zeus import client',
+            after="client.ZeusClient('token').session")
+        self.assertIn('requests', loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_instrumentation
+----------------------------------
+
+Tests for `zeus.interfaces.instrumentation` module.
+"""
+
+import datetime
+import json
+import StringIO
+import unittest
+
+import requests
+from mock import MagicMock, patch
+
+from zeus import client
+from zeus.interfaces.instrumentation import LatencyHistogram
+from zeus.interfaces.instrumentation import RequestObserver
+from zeus.interfaces.instrumentation import path_template
+from zeus.interfaces.retry import RetryPolicy
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+
+
+class Recorder(RequestObserver):
+    def __init__(self):
+        self.calls = []
+
+    def on_request_start(self, event):
+        self.calls.append(('start', event.attempt))
+
+    def on_request_end(self, event):
+        self.calls.append(('end', event))
+
+    def on_request_error(self, event):
+        self.calls.append(('error', event))
+
+
+def fake_response(status_code=200):
+    return MagicMock(status_code=status_code, content='{"ok": 1}',
+                     request=MagicMock(body='logs=%5B%5D'),
+                     elapsed=datetime.timedelta(milliseconds=2))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.recorder = Recorder()
+        self.z = client.ZeusClient(FAKE_TOKEN, 'zeus.rocks',
+                                   observers=[self.recorder])
+
+    def test_path_template(self):
+        self.assertEqual(path_template('/logs/ZeUsRoCkS/syslog', FAKE_TOKEN),
+                         '/logs/{token}/{name}')
+        self.assertEqual(path_template('/alerts/ZeUsRoCkS/25', FAKE_TOKEN),
+                         '/alerts/{token}/{id}')
+        self.assertEqual(
+            path_template('/metrics/ZeUsRoCkS/_values', FAKE_TOKEN),
+            '/metrics/{token}/_values')
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_events(self, mock_build_session):
+        mock_build_session.return_value.post.return_value = fake_response()
+        self.z.bucket('org/prod').sendLog('syslog', [{'a': 1}])
+
+        self.assertEqual(self.recorder.calls[0], ('start', 0))
+        kind, event = self.recorder.calls[1]
+        self.assertEqual(kind, 'end')
+        self.assertEqual((event.method, event.path, event.bucket,
+                          event.status, event.bytes_out, event.bytes_in),
+                         ('POST', '/logs/{token}/{name}', 'org/prod', 200,
+                          11, 9))
+        self.assertAlmostEqual(event.timings['server'], 0.002)
+        self.assertIn('download', event.timings)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_retries_and_errors(self, mock_build_session):
+        mock_build_session.return_value.get.side_effect = [
+            requests.ConnectionError(), fake_response()]
+        self.z.retry = RetryPolicy()
+        self.z.retry.sleep = lambda seconds: None
+        self.z.getLog('syslog')
+
+        kinds = [call[0] for call in self.recorder.calls]
+        self.assertEqual(kinds, ['start', 'error', 'start', 'end'])
+        self.assertIsInstance(self.recorder.calls[1][1].error,
+                              requests.ConnectionError)
+        self.assertEqual(self.recorder.calls[3][1].attempt, 1)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_no_observers(self, mock_build_session):
+        mock_build_session.return_value.get.return_value = fake_response()
+        z = client.ZeusClient(FAKE_TOKEN, 'zeus.rocks')
+        self.assertEqual(z.getLog('syslog').status_code, 200)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        key = ('GET', '/logs/{token}', '2xx')
+        for ms in range(1, 101):
+            histogram.record(key, ms / 1000.0)
+
+        for fraction, exact in ((0.5, 0.05), (0.99, 0.099)):
+            value = histogram.percentile(key, fraction)
+            self.assertTrue(exact <= value <= exact * 1.1, value)
+        self.assertIsNone(histogram.percentile(('GET', '/', '5xx'), 0.5))
+
+        stats = histogram.snapshot()[key]
+        self.assertEqual(stats['count'], 100)
+        self.assertAlmostEqual(stats['mean'], 0.0505)
+
+        stream = StringIO.StringIO()
+        histogram.dump(stream)
+        self.assertEqual(json.loads(stream.getvalue())['status'], '2xx')
+        histogram.reset()
+        self.assertEqual(histogram.snapshot(), {})
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_as_observer(self, mock_build_session):
+        mock_build_session.return_value.get.return_value = fake_response(404)
+        histogram = LatencyHistogram()
+        z = client.ZeusClient(FAKE_TOKEN, 'zeus.rocks',
+                              observers=[histogram])
+        z.getLog('syslog')
+        self.assertEqual(list(histogram.snapshot()),
+                         [('GET', '/logs/{token}', '4xx')])
+
+
+if __name__ == '__main__':
+    unittest.main()
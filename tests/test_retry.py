@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_retry
+----------------------------------
+
+Tests for `zeus.interfaces.retry` module.
+"""
+
+import json
+import unittest
+
+import requests
+from mock import MagicMock, patch
+
+from zeus import client
+from zeus.interfaces.rest import RestClient
+from zeus.interfaces.retry import RetryPolicy
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+FAKE_SERVER = 'https://zeus.rocks'
+
+
+def fake_response(status_code, headers=None):
+    return MagicMock(status_code=status_code, headers=headers or {})
+
+
+class TestRetry(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, backoff_factor=1,
+                                  jitter=False)
+        self.sleeps = []
+        self.policy.sleep = self.sleeps.append
+
+    def test_backoff(self):
+        self.assertEqual([self.policy.backoff(i) for i in range(3)],
+                         [1, 2, 4])
+        self.policy.max_backoff = 3
+        self.assertEqual(self.policy.backoff(5), 3)
+        self.policy.jitter = True
+        self.assertTrue(0 <= self.policy.backoff(1) <= 2)
+
+    def test_retry_after(self):
+        response = fake_response(429, {'Retry-After': '7'})
+        self.assertEqual(self.policy.backoff(0, response), 7)
+        response = fake_response(503, {
+            'Retry-After': 'Fri, 31 Dec 1999 23:59:59 GMT'})
+        self.assertEqual(self.policy.backoff(0, response), 0)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_retries_server_errors(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.get.side_effect = [
+            fake_response(503), requests.ConnectionError(),
+            fake_response(200)]
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, retry=self.policy)
+        self.assertEqual(z.getAlerts().status_code, 200)
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(self.sleeps, [1, 2])
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_gives_up_after_max_retries(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.get.side_effect = requests.ConnectionError()
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, retry=self.policy)
+        self.assertRaises(requests.ConnectionError, z.getAlerts)
+        self.assertEqual(session.get.call_count, 4)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_only_configured_methods(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.post.return_value = fake_response(503)
+        self.policy.methods = ('GET',)
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, retry=self.policy)
+        self.assertEqual(z.sendLog('ZeusTest', []).status_code, 503)
+        self.assertEqual(session.post.call_count, 1)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_default_methods(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.post.return_value = fake_response(500)
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, retry=self.policy)
+        z.createAlert('cpu_alert', 'zeus', 'metric', 'cpu.value > 90',
+                      5, 'cpu', 'ops@example.com', 'active', 60)
+        self.assertEqual(session.post.call_count, 1)
+
+        z.sendLog('ZeusTest', [{'n': 1}])
+        self.assertEqual(session.post.call_count, 5)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_streams_are_not_retried(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.post.return_value = fake_response(503)
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, retry=self.policy)
+        z.sendLog('ZeusTest', iter([{'n': 1}]))
+        self.assertEqual(session.post.call_count, 1)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_splits_large_batches(self, mock_build_session):
+        delivered = []
+
+        def post(url, data=None, headers=None, timeout=None):
+            self.assertEqual(headers['Bucket-Name'], 'org/bucket')
+            logs = json.loads(data['logs'])
+            if len(logs) > 2:
+                return fake_response(413)
+            if len(logs) == 2 and logs[0]['n'] == 4:
+                raise requests.Timeout()
+            delivered.extend(logs)
+            return fake_response(200)
+
+        mock_build_session.return_value.post.side_effect = post
+        self.policy.max_retries = 0
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, retry=self.policy,
+                              serializer='json')
+        logs = [{'n': i} for i in range(6)]
+        response = z.bucket('org/bucket').sendLog('ZeusTest', logs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(delivered, logs)
+
+    @patch('zeus.interfaces.session.requests')
+    def test_rest_client_retries(self, mock_requests):
+        session = mock_requests.Session.return_value
+        session.get.side_effect = [fake_response(500), fake_response(200)]
+        rest = RestClient(FAKE_SERVER, retry=self.policy)
+        status, _ = rest.sendGetRequest('/alerts')
+        self.assertEqual(status, 200)
+        self.assertEqual(session.get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_ship
+----------------------------------
+
+Tests for `zeus.ship` module.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from mock import MagicMock, patch
+
+from zeus import ship
+from zeus.ingest.tail import Checkpoint
+
+
+class FakeClient(object):
+    def __init__(self, fail=()):
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.batches = []
+
+    def sendLog(self, log_name, records):
+        with self.lock:
+            self.batches.append(records)
+        if records[0].get('n') in self.fail:
+            return MagicMock(status_code=503)
+        return MagicMock(status_code=200)
+
+    sendMetric = sendLog
+
+
+class TestShip(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.ndjson = os.path.join(self.directory, 'a.ndjson')
+        with open(self.ndjson, 'w') as f:
+            for i in range(10):
+                f.write(json.dumps({'n': i}) + '\n')
+        self.csv = os.path.join(self.directory, 'b.csv')
+        with open(self.csv, 'w') as f:
+            f.write('timestamp,value,host\n1,2.5,web\n\n3,4,db\n')
+        self.checkpoint = Checkpoint(os.path.join(self.directory, 'ckpt'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_batches(self):
+        batches = list(ship.read_batches(self.ndjson, 'ndjson', 4))
+        self.assertEqual([len(b[0]) for b in batches], [4, 4, 2])
+        self.assertEqual(batches[-1][1], os.path.getsize(self.ndjson))
+        resumed = list(ship.read_batches(self.ndjson, 'ndjson', 4,
+                                         start=batches[0][1]))
+        self.assertEqual(resumed[0][0][0], {'n': 4})
+
+    def test_read_csv_metrics(self):
+        batches = list(ship.read_batches(self.csv, 'csv', 10, metric=True))
+        self.assertEqual(batches[0][0], [
+            {'timestamp': 1, 'point': {'value': 2.5, 'host': 'web'}},
+            {'timestamp': 3, 'point': {'value': 4, 'host': 'db'}}])
+        # Resuming after the header still knows the columns.
+        first = list(ship.read_batches(self.csv, 'csv', 1))[0]
+        resumed = list(ship.read_batches(self.csv, 'csv', 1, start=first[1]))
+        self.assertEqual(resumed[0][0], [
+            {'timestamp': 3, 'value': 4, 'host': 'db'}])
+
+    def test_malformed_records(self):
+        with open(self.ndjson, 'a') as f:
+            f.write('{"n": 10\n{"n": 11}\n')
+        rejected = []
+        batches = list(ship.read_batches(
+            self.ndjson, 'ndjson', 100,
+            rejected=lambda line, e: rejected.append(line)))
+        self.assertEqual(rejected, ['{"n": 10\n'])
+        self.assertEqual(batches[0][0][-1], {'n': 11})
+        self.assertEqual(batches[0][1], os.path.getsize(self.ndjson))
+
+        with open(self.csv, 'a') as f:
+            f.write('5,"6\x00",web\n7,8,db\n')
+        shipper = ship.Shipper(FakeClient(), log_name='backfill')
+        stats = shipper.ship([self.ndjson, self.csv])
+        self.assertEqual(stats['rejected'], 2)
+        self.assertEqual(stats['records'], 14)
+
+    def test_ship_and_resume(self):
+        client = FakeClient()
+        shipper = ship.Shipper(client, log_name='backfill', batch_size=3,
+                               workers=3, checkpoint=self.checkpoint)
+        stats = shipper.ship(ship.expand_paths(
+            [os.path.join(self.directory, '*.ndjson'), self.csv]))
+        self.assertEqual(stats['records'], 12)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(sorted(r['n'] for b in client.batches[:4]
+                                for r in b), range(10))
+
+        shipper = ship.Shipper(FakeClient(), log_name='backfill',
+                               checkpoint=self.checkpoint)
+        stats = shipper.ship([self.ndjson, self.csv])
+        self.assertEqual(stats['skipped_files'], 2)
+        self.assertEqual(stats['records'], 0)
+
+    def test_checkpoint_stops_at_failed_batch(self):
+        shipper = ship.Shipper(FakeClient(fail=(3,)), log_name='backfill',
+                               batch_size=3, workers=2,
+                               checkpoint=self.checkpoint)
+        stats = shipper.ship([self.ndjson])
+        self.assertEqual(stats['failed'], 1)
+
+        client = FakeClient()
+        ship.Shipper(client, log_name='backfill', batch_size=3,
+                     checkpoint=self.checkpoint).ship([self.ndjson])
+        self.assertEqual(client.batches[0][0], {'n': 3})
+
+    @patch('zeus.ship.ZeusClient')
+    def test_main(self, mock_client):
+        mock_client.return_value.sendMetric.return_value.status_code = 200
+        status = ship.main(['--metric', 'cpu', '--token', 'ZeUsRoCkS',
+                            '--workers', '2', '--quiet', self.csv])
+        self.assertEqual(status, 0)
+        mock_client.assert_called_once_with(
+            'ZeUsRoCkS', 'https://api.ciscozeus.io', pool_maxsize=2,
+            compression=None)
+        self.assertEqual(
+            mock_client.return_value.sendMetric.call_args[0][0], 'cpu')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_spool
+----------------------------------
+
+Tests for `zeus.interfaces.spool` module.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import requests
+from mock import MagicMock, patch
+
+from zeus import client
+from zeus.interfaces.spool import Spool
+from zeus.interfaces.utils import ZeusException
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+FAKE_SERVER = 'https://zeus.rocks'
+
+
+class TestSpool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER,
+                                   serializer='json')
+        self.z._request = MagicMock(return_value=MagicMock(status_code=200))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def sent_batches(self):
+        return [(c[1]['path'], json.loads(c[1]['data']['logs']))
+                for c in self.z._request.call_args_list]
+
+    def test_replay_in_order(self):
+        spool = Spool(self.directory, segment_bytes=100)
+        for i in range(5):
+            spool.append('logs', 'ZeusTest', [{'n': i}])
+        self.assertEqual(spool.replay(self.z), 5)
+        self.assertEqual(
+            [logs for _, logs in self.sent_batches()],
+            [[{'n': i}] for i in range(5)])
+        self.assertEqual(spool.pending_bytes, 0)
+        spool.close()
+        self.assertEqual(
+            [f for f in os.listdir(self.directory) if f.endswith('.seg')],
+            [])
+
+    def test_replay_stops_on_failure_and_resumes(self):
+        spool = Spool(self.directory)
+        for i in range(3):
+            spool.append('logs', 'ZeusTest', [{'n': i}])
+        self.z._request.side_effect = [
+            MagicMock(status_code=200),
+            requests.ConnectionError()]
+        self.assertEqual(spool.replay(self.z), 1)
+        spool.close()
+
+        # A new spool on the same directory resumes after the last batch
+        # that was delivered.
+        self.z._request.reset_mock()
+        self.z._request.side_effect = None
+        spool = Spool(self.directory)
+        self.assertEqual(spool.replay(self.z), 2)
+        self.assertEqual([logs for _, logs in self.sent_batches()],
+                         [[{'n': 1}], [{'n': 2}]])
+        spool.close()
+
+    def test_rejected_batches_are_discarded(self):
+        spool = Spool(self.directory)
+        spool.append('logs', 'ZeusTest', [{'n': 1}])
+        self.z._request.return_value = MagicMock(status_code=400)
+        self.assertEqual(spool.replay(self.z), 0)
+        self.assertEqual(spool.stats['discarded'], 1)
+        self.assertEqual(spool.pending_bytes, 0)
+        spool.close()
+
+    def test_eviction(self):
+        spool = Spool(self.directory, segment_bytes=100, max_bytes=250)
+        for i in range(20):
+            spool.append('logs', 'ZeusTest', [{'message': 'x' * 40}])
+        self.assertLessEqual(spool.pending_bytes, 250)
+        self.assertGreater(spool.stats['evicted_segments'], 0)
+        spool.close()
+
+    def test_invalid_fsync(self):
+        self.assertRaises(ZeusException, Spool, self.directory,
+                          fsync='sometimes')
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_client_spools_failed_batches(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.post.side_effect = requests.ConnectionError()
+        spool = Spool(self.directory, fsync='always', drain_interval=0.01)
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, spool=spool)
+
+        logs = [{"message": "TestLog"}]
+        self.assertIsNone(z.bucket('org/bucket').sendLog('ZeusTest', logs))
+        self.assertEqual(spool.stats['spooled'], 1)
+
+        session.post.side_effect = None
+        session.post.return_value = MagicMock(status_code=200)
+        deadline = time.time() + 2
+        while spool.stats['replayed'] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        z.close()
+
+        self.assertEqual(spool.stats['replayed'], 1)
+        kwargs = session.post.call_args[1]
+        self.assertEqual(kwargs['headers']['Bucket-Name'], 'org/bucket')
+        self.assertEqual(json.loads(kwargs['data']['logs']), logs)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_client_spools_server_errors(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.post.return_value = MagicMock(status_code=503)
+        spool = Spool(self.directory, drain_interval=60)
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, spool=spool)
+        response = z.sendMetric('ZeusTest', [{"value": 1}])
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(spool.stats['spooled'], 1)
+        z.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
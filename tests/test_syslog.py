@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_syslog
+----------------------------------
+
+Tests for `zeus.ingest.syslog` module.
+"""
+
+import calendar
+import unittest
+
+from mock import MagicMock
+
+from zeus.ingest.syslog import SyslogParser, parse_lines, send_syslog
+
+BSD_LINE = ('Jun  5 00:31:21 SARANJAN-M-P0JM kernel[0]: en0: channel '
+            'changed to 11\n')
+IETF_LINE = ('<34>1 2003-10-11T22:14:15.003Z mymachine.example.com su - '
+             'ID47 - \xef\xbb\xbf\'su root\' failed for lonvick on '
+             '/dev/pts/8')
+
+
+class TestSyslogParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = SyslogParser(year=2016, utc_offset=0)
+
+    def test_rfc3164(self):
+        self.assertEqual(self.parser.parse(BSD_LINE), {
+            'timestamp': calendar.timegm((2016, 6, 5, 0, 31, 21)),
+            'hostname': 'SARANJAN-M-P0JM',
+            'appname': 'kernel',
+            'pid': '0',
+            'message': 'en0: channel changed to 11',
+        })
+
+    def test_crlf(self):
+        self.assertEqual(
+            self.parser.parse(BSD_LINE.replace('\n', '\r\n'))['message'],
+            'en0: channel changed to 11')
+        self.assertEqual(self.parser.parse(IETF_LINE + '\r\n')['message'],
+                         "'su root' failed for lonvick on /dev/pts/8")
+
+    def test_rfc3164_priority_and_no_tag(self):
+        record = self.parser.parse('<13>Feb 15 07:01:02 host plain text')
+        self.assertEqual(record['message'], 'plain text')
+        self.assertNotIn('appname', record)
+        self.assertEqual((record['facility'], record['severity']), (1, 5))
+
+    def test_rfc3164_year_rollover(self):
+        parser = SyslogParser(utc_offset=3600)
+        parser.clock = lambda: calendar.timegm((2017, 1, 2, 0, 0, 0))
+        record = parser.parse('Dec 31 23:00:00 host app: bye')
+        self.assertEqual(record['timestamp'],
+                         calendar.timegm((2016, 12, 31, 22, 0, 0)))
+
+    def test_rfc5424(self):
+        self.assertEqual(self.parser.parse(IETF_LINE), {
+            'timestamp': 1065910455.003,
+            'hostname': 'mymachine.example.com',
+            'appname': 'su',
+            'msgid': 'ID47',
+            'message': "'su root' failed for lonvick on /dev/pts/8",
+            'facility': 4,
+            'severity': 2,
+        })
+
+    def test_rfc5424_offset_and_structured_data(self):
+        record = self.parser.parse(
+            '<165>1 2003-08-24T05:14:15.5-07:00 host app 8710 - '
+            '[exampleSDID@32473 iut="3" eventSource="App\\]"]')
+        self.assertEqual(record['timestamp'], 1061727255.5)
+        self.assertEqual(record['pid'], '8710')
+        self.assertEqual(record['structured_data'],
+                         '[exampleSDID@32473 iut="3" eventSource="App\\]"]')
+        self.assertEqual(record['message'], '')
+
+    def test_timestamps_are_cached(self):
+        self.parser.parse(BSD_LINE)
+        self.parser.parse(BSD_LINE.replace(':31:21', ':59:00'))
+        self.assertEqual(len(self.parser._hours), 1)
+
+    def test_unparsed_lines(self):
+        lines = ['garbage\n', '\n', BSD_LINE]
+        records = list(parse_lines(lines))
+        self.assertEqual(records[0], {'message': 'garbage'})
+        self.assertEqual(len(records), 2)
+        self.assertEqual(len(list(parse_lines(lines, keep_unparsed=False))),
+                         1)
+
+    def test_multiprocess_keeps_order(self):
+        lines = [BSD_LINE.replace('11', str(i)) for i in range(250)]
+        expected = list(parse_lines(lines, year=2016))
+        records = list(parse_lines(lines, processes=2, chunk_lines=7,
+                                   year=2016))
+        self.assertEqual(records, expected)
+
+    def test_send_syslog(self):
+        client = MagicMock()
+        client.sendLog.return_value.status_code = 200
+        stats = send_syslog(client, 'syslog', [BSD_LINE] * 25, batch_size=10)
+        self.assertEqual(stats, {'records': 25, 'batches': 3, 'failed': 0})
+        self.assertEqual([len(c[0][1]) for c in
+                          client.sendLog.call_args_list], [10, 10, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_tail
+----------------------------------
+
+Tests for `zeus.ingest.tail` module.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import requests
+from mock import MagicMock
+
+from zeus.ingest.tail import Checkpoint, FileTailer, follow
+
+
+class TestFileTailer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'app.log')
+        self.checkpoint = Checkpoint(os.path.join(self.directory, 'ckpt'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, data, mode='a'):
+        with open(self.path, mode) as f:
+            f.write(data)
+
+    def test_partial_lines_wait(self):
+        tailer = FileTailer(self.path, block_size=4)
+        self.assertEqual(tailer.read(), [])
+        self.write('one\ntw')
+        self.assertEqual(tailer.read(), ['one'])
+        self.assertEqual(tailer.position[2], 4)
+        self.write('o\nthree\n')
+        self.assertEqual(tailer.read(), ['two', 'three'])
+        self.assertEqual(tailer.read(), [])
+        tailer.close()
+
+    def test_truncation(self):
+        self.write('first line\nsecond line\n')
+        tailer = FileTailer(self.path)
+        tailer.read()
+        self.write('new\n', mode='w')
+        self.assertEqual(tailer.read(), ['new'])
+        tailer.close()
+
+    def test_rotation(self):
+        self.write('a\nb\n')
+        tailer = FileTailer(self.path)
+        self.assertEqual(tailer.read(), ['a', 'b'])
+        self.write('c\nunterminated')
+        os.rename(self.path, self.path + '.1')
+        self.assertEqual(tailer.read(), ['c'])
+        self.assertEqual(tailer.read(), [])
+        self.write('d\n')
+        self.assertEqual(tailer.read(), ['unterminated'])
+        self.assertEqual(tailer.read(), ['d'])
+        tailer.close()
+
+    def test_resume_from_checkpoint(self):
+        self.write('a\nb\n')
+        tailer = FileTailer(self.path, self.checkpoint)
+        tailer.read()
+        tailer.commit(tailer.position)
+        tailer.close()
+
+        self.write('c\n')
+        tailer = FileTailer(self.path, Checkpoint(self.checkpoint.path))
+        self.assertEqual(tailer.read(), ['c'])
+        tailer.close()
+
+    def test_follow_commits_after_delivery(self):
+        self.write('Jun  5 00:31:21 host app[1]: one\n'
+                   'Jun  5 00:31:22 host app[1]: two\n')
+        stop = threading.Event()
+        sent = []
+
+        def send_log(log_name, batch):
+            if not sent:
+                sent.append(None)
+                # Nothing saved before the server accepts the batch.
+                self.assertIsNone(self.checkpoint.get(self.path))
+                raise requests.ConnectionError()
+            sent.append(batch)
+            stop.set()
+            return MagicMock(status_code=200)
+
+        client = MagicMock()
+        client.sendLog.side_effect = send_log
+        stats = follow(client, 'syslog', self.path, self.checkpoint,
+                       poll_interval=0.01, stop=stop)
+
+        self.assertEqual([r['message'] for r in sent[1]], ['one', 'two'])
+        self.assertEqual(stats, {'records': 2, 'batches': 1, 'rejected': 0})
+        self.assertEqual(self.checkpoint.get(self.path)[2],
+                         os.path.getsize(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
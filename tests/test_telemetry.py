@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_telemetry
+----------------------------------
+
+Tests for `zeus.interfaces.telemetry` module.
+"""
+
+import datetime
+import json
+import unittest
+
+import requests
+from mock import MagicMock, patch
+
+from zeus import client
+from zeus.interfaces.retry import RetryPolicy
+from zeus.interfaces.telemetry import SelfTelemetry
+from zeus.interfaces.utils import ZeusException
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+
+
+def fake_response(status_code=200):
+    return MagicMock(status_code=status_code, content='{}',
+                     request=MagicMock(body='x' * 10),
+                     elapsed=datetime.timedelta(milliseconds=1))
+
+
+class TestSelfTelemetry(unittest.TestCase):
+    def setUp(self):
+        # Points are only sent by publish() in these tests.
+        self.telemetry = SelfTelemetry(prefix='app.zeus', interval=3600)
+        self.telemetry.clock = lambda: 1451606400
+
+    def tearDown(self):
+        self.telemetry.close()
+
+    def test_invalid_prefix(self):
+        self.assertRaises(ZeusException, SelfTelemetry, prefix='_zeus')
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_request_counters(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.get.side_effect = [requests.ConnectionError(),
+                                   fake_response(), fake_response(503)]
+        z = client.ZeusClient(FAKE_TOKEN, 'zeus.rocks',
+                              retry=RetryPolicy(max_retries=0),
+                              telemetry=self.telemetry)
+        self.assertRaises(requests.ConnectionError, z.getLog, 'syslog')
+        z.bucket('org/prod').getLog('syslog')
+        z.getLog('syslog')
+
+        point = self.telemetry.collect()
+        self.assertEqual((point['requests'], point['errors'],
+                          point['retries'], point['bytes_in']), (3, 2, 0, 4))
+        self.assertTrue(point['latency_p99'] >= point['latency_mean'])
+        self.assertEqual(self.telemetry.collect()['requests'], 0)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_publish(self, mock_build_session):
+        session = mock_build_session.return_value
+        session.post.return_value = fake_response()
+        z = client.ZeusClient(FAKE_TOKEN, 'zeus.rocks',
+                              telemetry=self.telemetry)
+        sender = z.bufferedLogSender(linger_sec=60)
+        sender.send('syslog', {'message': 'hello'})
+        sender.send('syslog', {'message': 'world'})
+        sender.flush()
+
+        self.assertTrue(self.telemetry.publish())
+        url = session.post.call_args[0][0]
+        self.assertTrue(url.endswith('/metrics/ZeUsRoCkS/app.zeus'))
+        data = session.post.call_args[1]['data']
+        record = json.loads(data['metrics'])[0]
+        self.assertEqual(record['timestamp'], 1451606400)
+        point = record['point']
+        self.assertEqual((point['requests'], point['sent'],
+                          point['batches'], point['queue_depth']),
+                         (1, 2, 1, 0))
+        self.assertIn('flush_latency', point)
+
+        # The telemetry requests are not counted, and failures are dropped.
+        session.post.side_effect = requests.ConnectionError()
+        self.assertFalse(self.telemetry.publish())
+        self.assertEqual(self.telemetry.stats,
+                         {'published': 1, 'publish_failed': 1})
+        self.assertEqual(self.telemetry.collect()['requests'], 0)
+        sender.close()
+        z.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_transport
+----------------------------------
+
+Tests for `zeus.interfaces.transport` module.
+"""
+
+import BaseHTTPServer
+import json
+import socket
+import ssl
+import sys
+import threading
+import time
+import unittest
+import urlparse
+import zlib
+
+import requests
+from mock import MagicMock, patch
+
+from zeus import client
+from zeus.interfaces.instrumentation import LatencyHistogram
+from zeus.interfaces.rest import RestClient
+from zeus.interfaces.transport import FakeTransport, Urllib3Transport
+from zeus.interfaces.transport import get_transport
+from zeus.interfaces.utils import ZeusException
+
+try:
+    import hyper
+except ImportError:
+    hyper = None
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+
+
+class EchoHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        self.reply({'path': url.path, 'query': urlparse.parse_qs(url.query),
+                    'bucket': self.headers.get('Bucket-Name')})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.reply({'body': urlparse.parse_qs(body)})
+
+    def reply(self, body):
+        data = json.dumps(body)
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestTransports(unittest.TestCase):
+    def test_fake_transport(self):
+        transport = FakeTransport(
+            lambda method, url, data, headers: (200, {'result': [{'a': 1}],
+                                                      'total': 1}))
+        z = client.ZeusClient(FAKE_TOKEN, 'zeus.rocks', transport=transport)
+        self.assertEqual(z.getLog('syslog').json()['total'], 1)
+        z.sendLog('syslog', [{'a': 1}])
+
+        method, url, data, headers = transport.requests[-1]
+        self.assertEqual((method, url),
+                         ('POST', 'https://zeus.rocks/logs/ZeUsRoCkS/syslog'))
+        self.assertEqual(json.loads(data['logs']), [{'a': 1}])
+        self.assertEqual(headers['Authorization'], 'Bearer ZeUsRoCkS')
+        self.assertIsNone(z.session)
+        self.assertIsNone(
+            RestClient('zeus.rocks', transport=transport).session)
+
+    def test_unknown(self):
+        self.assertRaises(ZeusException, client.ZeusClient, FAKE_TOKEN,
+                          transport='carrier-pigeon')
+        z = client.ZeusClient(FAKE_TOKEN, transport='fake')
+        self.assertRaises(ZeusException, z._request, 'PATCH', '/alerts')
+
+    def test_rest_client_sends_headers(self):
+        transport = FakeTransport()
+        rest = RestClient('zeus.rocks', transport=transport, timeout=5)
+        for send in (rest.sendGetRequest, rest.sendDeleteRequest):
+            status, body = send('/alerts', headers={'Bucket-Name': 'org/b'})
+            self.assertEqual((status, body), (200, {}))
+            self.assertEqual(transport.requests[-1][3],
+                             {'Bucket-Name': 'org/b'})
+
+    def test_rest_client_compression_and_observers(self):
+        histogram = LatencyHistogram()
+        transport = FakeTransport()
+        rest = RestClient('zeus.rocks', transport=transport,
+                          compression='gzip', compression_threshold=0,
+                          observers=[histogram])
+        rest.sendPostRequest('/alerts', data={'alert_name': 'a'})
+
+        _, _, data, headers = transport.requests[-1]
+        self.assertEqual(headers, {'Content-Encoding': 'gzip'})
+        self.assertEqual(zlib.decompress(data, 16 + zlib.MAX_WBITS),
+                         'alert_name=a')
+        self.assertEqual(list(histogram.snapshot()),
+                         [('POST', '/alerts', '2xx')])
+        self.assertRaises(ZeusException, RestClient, 'zeus.rocks',
+                          compression='brotli')
+
+    def test_urllib3_transport(self):
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), EchoHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            z = client.ZeusClient(FAKE_TOKEN, transport='urllib3')
+            z.endpoint = 'http://127.0.0.1:{}'.format(server.server_port)
+            response = z.bucket('org/b').getLog('syslog', pattern='a b')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers['etag'], '"v1"')
+            self.assertEqual(response.json(), {
+                'path': '/logs/ZeUsRoCkS', 'bucket': 'org/b',
+                'query': {'log_name': ['syslog'], 'pattern': ['a b']}})
+
+            response = z.sendLog('syslog', [{'a': 1}])
+            self.assertEqual(response.json()['body'],
+                             {'logs': ['[{"a": 1}]']})
+            z.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_urllib3_network_errors(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        transport = Urllib3Transport()
+        self.assertRaises(requests.ConnectionError, transport.request, 'GET',
+                          'http://127.0.0.1:{}/'.format(port))
+
+
+class TestHttp2Transport(unittest.TestCase):
+    def test_missing_hyper(self):
+        with patch.dict('sys.modules', {'hyper.contrib': None}):
+            sys.modules.pop('zeus.interfaces.http2', None)
+            self.assertRaises(ZeusException, get_transport, 'http2')
+
+    @unittest.skipIf(hyper is None, 'hyper is not installed')
+    @patch('zeus.interfaces.transport.build_session')
+    def test_fallback(self, mock_build_session):
+        from hyper.http20.exceptions import HTTP20Error
+        from hyper.http20.response import HTTP20Response
+        transport = get_transport('http2')
+        session = MagicMock()
+        transport._http2_session = session
+        fallback = mock_build_session.return_value
+
+        # A host speaking HTTP/2 keeps getting HTTP/2 requests.
+        session.request.return_value = MagicMock(
+            raw=MagicMock(spec=HTTP20Response))
+        url = 'https://zeus.rocks/alerts/ZeUsRoCkS'
+        transport.request('GET', url, headers={'Authorization': 'Bearer x'})
+        transport.request('POST', url, data={'a': 1})
+        self.assertEqual(session.request.call_count, 2)
+        self.assertEqual(transport.protocol(url), 'h2')
+
+        # Plain HTTP and streamed bodies are sent with HTTP/1.1.
+        transport.request('GET', 'http://zeus.rocks/alerts/ZeUsRoCkS')
+        transport.request('POST', url, data=iter(['a', 'b']))
+        self.assertEqual(session.request.call_count, 2)
+        self.assertEqual((fallback.get.call_count, fallback.post.call_count),
+                         (1, 1))
+
+        # Hosts negotiating HTTP/1.1 or failing over HTTP/2 fall back.
+        session.request.side_effect = HTTP20Error()
+        url = 'https://h1.zeus.rocks/logs/ZeUsRoCkS'
+        transport.request('GET', url)
+        self.assertEqual(transport.protocol(url), 'http/1.1')
+        transport.request('GET', url)
+        self.assertEqual(session.request.call_count, 3)
+        self.assertEqual(fallback.get.call_count, 3)
+
+        session.request.side_effect = None
+        session.request.return_value = MagicMock(raw=MagicMock())
+        url = 'https://alpn.zeus.rocks/logs/ZeUsRoCkS'
+        self.assertIs(transport.request('GET', url),
+                      session.request.return_value)
+        self.assertEqual(transport.protocol(url), 'http/1.1')
+
+    @unittest.skipIf(hyper is None, 'hyper is not installed')
+    def test_network_errors(self):
+        transport = get_transport('http2')
+        transport._http2_session = MagicMock()
+        transport._http2_session.request.side_effect = socket.error()
+        self.assertRaises(requests.ConnectionError, transport.request, 'GET',
+                          'https://zeus.rocks/')
+
+        transport._http2_session.request.side_effect = ssl.SSLError(
+            'The read operation timed out')
+        self.assertRaises(requests.Timeout, transport.request, 'GET',
+                          'https://zeus.rocks/', timeout=7)
+        self.assertEqual(
+            transport._http2_session.request.call_args[1]['timeout'], 7)
+
+    @unittest.skipIf(hyper is None, 'hyper is not installed')
+    def test_connect_timeout(self):
+        # The server accepts the connection but never answers the TLS
+        # handshake.
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        self.addCleanup(server.close)
+        url = 'https://127.0.0.1:{}/'.format(server.getsockname()[1])
+        transport = get_transport('http2')
+        self.addCleanup(transport.close)
+        start = time.time()
+        self.assertRaises(requests.Timeout, transport.request, 'GET', url,
+                          timeout=0.5)
+        self.assertTrue(time.time() - start < 2)
+
+    @unittest.skipIf(hyper is None, 'hyper is not installed')
+    def test_adapter_timeout_and_streams(self):
+        from zeus.interfaces.http2 import Http2Adapter
+        adapter = Http2Adapter()
+        connection = MagicMock()
+        connection.request.return_value = 3
+        connection.get_response.return_value.status = 200
+        adapter.get_connection = MagicMock(return_value=connection)
+
+        request = requests.Request(
+            'GET', 'https://zeus.rocks/logs/ZeUsRoCkS?limit=1').prepare()
+        response = adapter.send(request, stream=True, timeout=7)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(connection.request.call_args[0][:2],
+                         ('GET', '/logs/ZeUsRoCkS?limit=1'))
+        connection._conn._sock._sck.settimeout.assert_called_with(7)
+        # The response of its own stream, not the latest one.
+        connection.get_response.assert_called_with(3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+test_validation
+----------------------------------
+
+Tests for `zeus.interfaces.validation` module.
+"""
+
+import json
+import unittest
+import urlparse
+
+from mock import MagicMock
+
+from zeus import client
+from zeus.interfaces.validation import BatchValidator
+
+FAKE_TOKEN = 'ZeUsRoCkS'
+FAKE_SERVER = 'https://zeus.rocks'
+
+
+class TestBatchValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = BatchValidator(max_future=60)
+        self.validator.clock = lambda: 1000
+
+    def test_split_logs(self):
+        logs = [
+            {'message': 'ok', 'timestamp': 999},
+            'not a dict',
+            {'message': 'ok', 'timestamp': '1000.5'},
+            {'': 'empty field name'},
+            {'timestamp': 'yesterday'},
+            {'timestamp': 1000 * 1000},
+            {'timestamp': True},
+        ]
+        accepted, rejected = self.validator.split('logs', logs)
+        self.assertEqual(accepted, [logs[0], logs[2]])
+        self.assertEqual([r.index for r in rejected], [1, 3, 4, 5, 6])
+        self.assertEqual(rejected[0].reason, 'not a dict')
+        self.assertEqual(self.validator.stats,
+                         {'accepted': 2, 'rejected': 5})
+
+    def test_split_metrics(self):
+        metrics = [
+            {'timestamp': 10, 'point': {'value': 1}},
+            {'timestamp': 10},
+            {'point': {}},
+            {'point': {1: 2}},
+        ]
+        accepted, rejected = self.validator.split('metrics', metrics)
+        self.assertEqual(accepted, metrics[:1])
+        self.assertEqual([r.reason for r in rejected], [
+            'missing point', 'missing point', 'invalid field name 1'])
+
+    def test_json_errors_keep_order(self):
+        logs = [{'n': 1}, {'n': object()}, 'bad', {'n': set()}, {'n': 4}]
+        accepted, rejected = self.validator.split('logs', logs)
+        self.assertEqual(accepted, [{'n': 1}, {'n': 4}])
+        self.assertEqual([r.index for r in rejected], [1, 2, 3])
+        self.assertTrue(rejected[0].reason.startswith('not JSON'))
+
+    def test_client_sends_valid_records(self):
+        reports = []
+        self.validator.on_reject = lambda *args: reports.append(args)
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, serializer='json',
+                              validator=self.validator)
+        z._request = MagicMock()
+
+        z.sendLog('ZeusTest', [{'n': 1}, 'bad', {'n': 2}])
+        data = z._request.call_args[1]['data']
+        self.assertEqual(json.loads(data['logs']), [{'n': 1}, {'n': 2}])
+        self.assertEqual(reports[0][:2], ('logs', 'ZeusTest'))
+        self.assertEqual([r.index for r in reports[0][2]], [1])
+
+        z._request.reset_mock()
+        self.assertIsNone(z.sendMetric('ZeusTest', [{'timestamp': 1}]))
+        self.assertFalse(z._request.called)
+
+    def test_client_filters_streams(self):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, serializer='json',
+                              validator=self.validator)
+        z._request = MagicMock()
+        z.sendLog('ZeusTest', iter([{'n': 1}, 'bad', {'n': 2}]))
+        form = urlparse.parse_qs(''.join(z._request.call_args[1]['data']))
+        self.assertEqual(json.loads(form['logs'][0]), [{'n': 1}, {'n': 2}])
+        self.assertEqual(self.validator.stats,
+                         {'accepted': 2, 'rejected': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
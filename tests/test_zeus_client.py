@@ -23,12 +23,19 @@ Tests for `zeus` module.
 """
 
 import json
-from mock import patch
+import threading
+from mock import MagicMock, patch
 import posixpath
 import unittest
 import urlparse
+import zlib
 
 from zeus import client
+from zeus.interfaces.encoding import get_serializer
+from zeus.interfaces.encoding import iter_batch
+from zeus.interfaces.metrics import merge_metric_series
+from zeus.interfaces.metrics import split_time_range
+from zeus.interfaces.session import build_session
 from zeus.interfaces.utils import validate_dates, ZeusException
 
 FAKE_TOKEN = 'ZeUsRoCkS'
@@ -62,6 +69,37 @@ class TestZeusClient(unittest.TestCase):
         z = client.ZeusClient(FAKE_TOKEN, "http://zeus.rocks")
         assert z.endpoint == "https://zeus.rocks"
 
+    @patch('zeus.interfaces.transport.build_session')
+    def test_session_is_reused(self, mock_build_session):
+        self.z.sendLog('ZeusTest', [])
+        self.z.getLog('ZeusTest')
+        mock_build_session.assert_called_once_with(
+            pool_connections=10, pool_maxsize=10, pool_block=False,
+            keep_alive=True)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_session_pool_settings(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, pool_connections=2,
+                              pool_maxsize=50, pool_block=True,
+                              keep_alive=False)
+        z.getAlerts()
+        mock_build_session.assert_called_once_with(
+            pool_connections=2, pool_maxsize=50, pool_block=True,
+            keep_alive=False)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_close_releases_session(self, mock_build_session):
+        with client.ZeusClient(FAKE_TOKEN, FAKE_SERVER) as z:
+            z.getAlerts()
+        mock_build_session.return_value.close.assert_called_once_with()
+        self.assertIsNone(z.transport._session)
+
+    def test_build_session_keep_alive(self):
+        session = build_session(pool_maxsize=3, keep_alive=False)
+        adapter = session.get_adapter(FAKE_SERVER)
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(session.headers['Connection'], 'close')
+
     def test_validate_dates(self):
         # normal
         from_date = 12345
@@ -82,42 +120,75 @@ class TestZeusClient(unittest.TestCase):
         self.assertRaises(
             ZeusException, validate_dates, from_date, to_date)
 
-    @patch('zeus.client.requests')
-    def test_post_empty_log(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_empty_log(self, mock_build_session):
         logs = []
         url = urlparse.urljoin(
             FAKE_SERVER, posixpath.join('logs', FAKE_TOKEN, 'ZeusTest'))
 
         self.z.sendLog('ZeusTest', logs)
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             url, data={"logs": json.dumps(logs)},
             headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_post_single_log(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_single_log(self, mock_build_session):
         url = urlparse.urljoin(
             FAKE_SERVER, posixpath.join('logs', FAKE_TOKEN, 'ZeusTest'))
         logs = [{"timestamp": 123541423, "key": "TestLog", "key2": 123}]
         self.z.sendLog('ZeusTest', logs)
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             url, data={"logs": json.dumps(logs)},
             headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_send_log_with_bucket_name(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_send_log_with_bucket_name(self, mock_build_session):
         url = urlparse.urljoin(
             FAKE_SERVER, posixpath.join('logs', FAKE_TOKEN, 'ZeusTest'))
         logs = [{"timestamp": 123541423, "key": "TestLog", "key2": 123}]
 
         self.z.bucket(self.fake_bucket_name).sendLog('ZeusTest', logs)
 
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             url, data={"logs": json.dumps(logs)},
             headers=self.fake_header_with_bucket_name(self.fake_bucket_name),
             timeout=20)
 
         self.assertIsNone(self.z.bucket_name)
 
+    @patch('zeus.interfaces.transport.build_session')
+    def test_bucket_views_are_independent(self, mock_build_session):
+        seen = []
+        lock = threading.Lock()
+
+        def post(url, data=None, headers=None, timeout=None):
+            with lock:
+                seen.append((headers.get('Bucket-Name'),
+                             json.loads(data['logs'])[0]['bucket']))
+
+        mock_build_session.return_value.post.side_effect = post
+        views = dict((b, self.z.bucket(b)) for b in ('org/a', 'org/b'))
+        views[None] = self.z
+
+        def worker(bucket):
+            for _ in range(50):
+                views[bucket].sendLog('ZeusTest', [{'bucket': bucket}])
+
+        threads = [threading.Thread(target=worker, args=(b,))
+                   for b in views]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(seen), 150)
+        for header, bucket in seen:
+            self.assertEqual(header, bucket)
+        # All the views share the connection pool of the client.
+        mock_build_session.assert_called_once_with(
+            pool_connections=10, pool_maxsize=10, pool_block=False,
+            keep_alive=True)
+
     def test_post_single_log_wrong_name(self):
         logs = [{"message": "TestLog", "value": 23}]
         self.assertRaises(
@@ -136,20 +207,144 @@ class TestZeusClient(unittest.TestCase):
             ZeusException, self.z.sendLog, '0123456789ABCDEF' * 16,
             logs)
 
-    @patch('zeus.client.requests')
-    def test_post_multiple_logs(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_multiple_logs(self, mock_build_session):
         url = urlparse.urljoin(
             FAKE_SERVER, posixpath.join('logs', FAKE_TOKEN, 'ZeusTest'))
         logs = [{"timestamp": 123541423, "message": "TestLog"},
                 {"timestamp": 123541424, "message": "TestLog2"},
                 {"timestamp": 123541425, "message": "TestLog3"}, ]
         self.z.sendLog('ZeusTest', logs)
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             url, data={"logs": json.dumps(logs)},
             headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_logs(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_logs_compressed(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, compression='gzip',
+                              compression_threshold=100)
+        logs = [{"message": "TestLog"}] * 100
+        z.sendLog('ZeusTest', logs)
+
+        kwargs = mock_build_session.return_value.post.call_args[1]
+        self.assertEqual(kwargs['headers'], dict(
+            self.fake_headers, **{'Content-Encoding': 'gzip'}))
+        body = zlib.decompress(kwargs['data'], 16 + zlib.MAX_WBITS)
+        self.assertEqual(urlparse.parse_qs(body),
+                         {'logs': [json.dumps(logs)]})
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_metrics_deflate(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, compression='deflate',
+                              compression_level=9, compression_threshold=0)
+        metrics = [{"timestamp": 123541423, "value": 0}]
+        z.sendMetric('ZeusTest', metrics)
+
+        kwargs = mock_build_session.return_value.post.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'deflate')
+        self.assertEqual(urlparse.parse_qs(zlib.decompress(kwargs['data'])),
+                         {'metrics': [json.dumps(metrics)]})
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_small_bodies_not_compressed(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, compression='gzip')
+        z.sendLog('ZeusTest', [])
+        mock_build_session.return_value.post.assert_called_with(
+            FAKE_SERVER + '/logs/' + FAKE_TOKEN + '/ZeusTest',
+            data={"logs": "[]"}, headers=self.fake_headers, timeout=20)
+
+    def test_invalid_compression(self):
+        self.assertRaises(ZeusException, client.ZeusClient, FAKE_TOKEN,
+                          FAKE_SERVER, compression='brotli')
+        self.assertRaises(ZeusException, client.ZeusClient, FAKE_TOKEN,
+                          FAKE_SERVER, compression='gzip',
+                          compression_level=10)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_logs_json_wire_format(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, wire_format='json',
+                              serializer='json')
+        logs = [{"timestamp": 123541423, "message": "TestLog"}]
+        z.sendLog('ZeusTest', logs)
+        mock_build_session.return_value.post.assert_called_with(
+            FAKE_SERVER + '/logs/' + FAKE_TOKEN + '/ZeusTest',
+            data=json.dumps(logs), headers=self.fake_headers, timeout=20)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_metrics_ndjson_wire_format(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, wire_format='ndjson',
+                              serializer='json')
+        metrics = [{"timestamp": 123541423, "value": 0},
+                   {"timestamp": 123541424, "value": 1}]
+        z.bucket(self.fake_bucket_name).sendMetric('ZeusTest', metrics)
+        headers = self.fake_header_with_bucket_name(self.fake_bucket_name)
+        headers['content-type'] = 'application/x-ndjson'
+        mock_build_session.return_value.post.assert_called_with(
+            FAKE_SERVER + '/metrics/' + FAKE_TOKEN + '/ZeusTest',
+            data=json.dumps(metrics[0]) + '\n' + json.dumps(metrics[1]) +
+            '\n', headers=headers, timeout=20)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_custom_serializer(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER,
+                              serializer=lambda obj: 'encoded')
+        z.sendLog('ZeusTest', [])
+        mock_build_session.return_value.post.assert_called_with(
+            FAKE_SERVER + '/logs/' + FAKE_TOKEN + '/ZeusTest',
+            data={'logs': 'encoded'}, headers=self.fake_headers, timeout=20)
+
+    def test_get_serializer(self):
+        self.assertIs(get_serializer('json'), json.dumps)
+        self.assertIs(self.z.dumps, json.dumps)
+        self.assertTrue(callable(get_serializer()))
+        self.assertRaises(ZeusException, get_serializer, 'nosuchjsonlib')
+        self.assertRaises(ZeusException, client.ZeusClient, FAKE_TOKEN,
+                          FAKE_SERVER, wire_format='xml')
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_logs_from_generator(self, mock_build_session):
+        logs = [{"timestamp": 123541423 + i, "message": "TestLog"}
+                for i in range(5000)]
+        self.z.sendLog('ZeusTest', (log for log in logs))
+
+        kwargs = mock_build_session.return_value.post.call_args[1]
+        self.assertEqual(kwargs['headers'], self.fake_headers)
+        chunks = list(kwargs['data'])
+        self.assertGreater(len(chunks), 1)
+        form = urlparse.parse_qs(''.join(chunks))
+        self.assertEqual(json.loads(form['logs'][0]), logs)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_metrics_from_generator_compressed(self, mock_build_session):
+        z = client.ZeusClient(FAKE_TOKEN, FAKE_SERVER, wire_format='ndjson',
+                              compression='gzip')
+        metrics = [{"timestamp": 123541423 + i, "value": i}
+                   for i in range(10)]
+        z.sendMetric('ZeusTest', iter(metrics))
+
+        kwargs = mock_build_session.return_value.post.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        body = zlib.decompress(''.join(kwargs['data']), 16 + zlib.MAX_WBITS)
+        self.assertEqual([json.loads(line) for line in body.splitlines()],
+                         metrics)
+
+    def test_iter_batch_is_lazy(self):
+        consumed = []
+
+        def records():
+            for i in range(100):
+                consumed.append(i)
+                yield {'n': i}
+
+        chunks = iter_batch(json.dumps, 'json', 'logs', records(),
+                            chunk_size=50)
+        first = next(chunks)
+        self.assertLess(len(consumed), 100)
+        self.assertEqual(json.loads(first + ''.join(chunks)),
+                         [{'n': i} for i in range(100)])
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_logs(self, mock_build_session):
         url = urlparse.urljoin(FAKE_SERVER, posixpath.join('logs', FAKE_TOKEN))
         self.z.getLog('ZeusTest',
                       attribute_name='message',
@@ -158,7 +353,7 @@ class TestZeusClient(unittest.TestCase):
                       to_date=126235344235,
                       offset=23,
                       limit=10)
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             url,
             params={
                 'log_name': 'ZeusTest',
@@ -171,12 +366,12 @@ class TestZeusClient(unittest.TestCase):
             headers=self.fake_headers,
             timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_logs_with_bucket_name(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_logs_with_bucket_name(self, mock_build_session):
         url = urlparse.urljoin(FAKE_SERVER, posixpath.join('logs', FAKE_TOKEN))
 
         self.z.bucket(self.fake_bucket_name).getLog('ZeusTest')
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             url,
             params={'log_name': 'ZeusTest'},
             headers=self.fake_header_with_bucket_name(self.fake_bucket_name),
@@ -184,23 +379,69 @@ class TestZeusClient(unittest.TestCase):
         )
         self.assertIsNone(self.z.bucket_name)
 
-    @patch('zeus.client.requests')
-    def test_post_empty_metric(self, mock_requests):
+    def fake_log_pages(self, mock_build_session, total):
+        logs = [{'n': i} for i in range(total)]
+
+        def get(url, params=None, headers=None, timeout=None):
+            offset = params.get('offset', 0)
+            response = MagicMock(status_code=200)
+            response.json.return_value = {
+                'result': logs[offset:offset + params['limit']],
+                'total': total}
+            return response
+
+        mock_build_session.return_value.get.side_effect = get
+        return logs
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_iter_logs(self, mock_build_session):
+        logs = self.fake_log_pages(mock_build_session, 25)
+        result = list(self.z.iterLogs('ZeusTest', pattern='*',
+                                      page_size=10, prefetch=2))
+        self.assertEqual(result, logs)
+        offsets = sorted(
+            c[1]['params'].get('offset', 0)
+            for c in mock_build_session.return_value.get.call_args_list)
+        self.assertEqual(offsets, [0, 10, 20])
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_iter_logs_without_prefetch(self, mock_build_session):
+        logs = self.fake_log_pages(mock_build_session, 20)
+        result = list(self.z.iterLogs('ZeusTest', page_size=10, prefetch=0))
+        self.assertEqual(result, logs)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_iter_logs_is_lazy(self, mock_build_session):
+        self.fake_log_pages(mock_build_session, 1000)
+        iterator = self.z.iterLogs('ZeusTest', page_size=10, prefetch=1)
+        self.assertEqual(next(iterator), {'n': 0})
+        iterator.close()
+        self.assertLessEqual(
+            mock_build_session.return_value.get.call_count, 2)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_iter_logs_error(self, mock_build_session):
+        mock_build_session.return_value.get.return_value = MagicMock(
+            status_code=400)
+        self.assertRaises(ZeusException, list, self.z.iterLogs('ZeusTest'))
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_empty_metric(self, mock_build_session):
         url = urlparse.urljoin(
             FAKE_SERVER, posixpath.join('metrics', FAKE_TOKEN, 'ZeusTest'))
         metrics = []
         self.z.sendMetric('ZeusTest', metrics)
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             url, data={"metrics": json.dumps(metrics)},
             headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_post_single_metric(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_single_metric(self, mock_build_session):
         url = urlparse.urljoin(
             FAKE_SERVER, posixpath.join('metrics', FAKE_TOKEN, 'Zeus.Test'))
         metrics = [{"timestamp": 123541423, "value": 0}]
         self.z.sendMetric('Zeus.Test', metrics)
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             url, data={"metrics": json.dumps(metrics)},
             headers=self.fake_headers,
             timeout=20)
@@ -219,20 +460,20 @@ class TestZeusClient(unittest.TestCase):
             ZeusException, self.z.sendMetric, '0123456789ABCDEF' * 16,
             metrics)
 
-    @patch('zeus.client.requests')
-    def test_post_multiple_metrics(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_post_multiple_metrics(self, mock_build_session):
         url = urlparse.urljoin(
             FAKE_SERVER, posixpath.join('metrics', FAKE_TOKEN, 'ZeusTest'))
         metrics = [{"timestamp": 123541423, "value": 0},
                    {"timestamp": 123541424, "value": 1},
                    {"timestamp": 123541425, "value": 2.0}, ]
         self.z.sendMetric('ZeusTest', metrics)
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             url, data={"metrics": json.dumps(metrics)},
             headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_metric_values(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_metric_values(self, mock_build_session):
         self.z.getMetric(metric_name='ZeusTest',
                          aggregator_function='sum',
                          aggregator_column='val1',
@@ -242,7 +483,7 @@ class TestZeusClient(unittest.TestCase):
                          filter_condition='value > 90',
                          limit=10,
                          offset=20)
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             FAKE_SERVER + '/metrics/' +
             FAKE_TOKEN + '/_values',
             params={
@@ -258,12 +499,62 @@ class TestZeusClient(unittest.TestCase):
             headers=self.fake_headers,
             timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_metric_names(self, mock_requests):
+    def test_split_time_range(self):
+        windows = split_time_range(1000, 1600, 3, '1m')
+        self.assertEqual(windows, [(1000, '1199.999'),
+                                   ('1200', '1439.999'),
+                                   ('1440', 1600)])
+        self.assertEqual(split_time_range(0, 100, 8, '1h'), [(0, 100)])
+        self.assertEqual(len(split_time_range(0, 100, 4)), 4)
+        self.assertRaises(ZeusException, split_time_range, 0, 100, 2, '1y')
+
+    def test_merge_metric_series(self):
+        merged = merge_metric_series([
+            [{'name': 'a', 'columns': ['time', 'v'],
+              'points': [[2, 1], [1, 1]]}],
+            [{'name': 'a', 'columns': ['time', 'v'], 'points': [[4, 2]]},
+             {'name': 'b', 'columns': ['time', 'v'], 'points': [[3, 5]]}],
+        ])
+        self.assertEqual(merged, [
+            {'name': 'a', 'columns': ['time', 'v'],
+             'points': [[1, 1], [2, 1], [4, 2]]},
+            {'name': 'b', 'columns': ['time', 'v'], 'points': [[3, 5]]},
+        ])
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_metric_sharded(self, mock_build_session):
+        def get(url, params=None, headers=None, timeout=None):
+            response = MagicMock(status_code=200)
+            response.json.return_value = [{
+                'name': 'ZeusTest', 'columns': ['time', 'sum'],
+                'points': [[float(params['from']), 1]]}]
+            return response
+
+        mock_build_session.return_value.get.side_effect = get
+        result = self.z.getMetricSharded('ZeusTest', 3600, 7200,
+                                         aggregator_function='sum',
+                                         group_interval='10m', shards=3)
+        self.assertEqual(result[0]['points'],
+                         [[3600.0, 1], [4800.0, 1], [6000.0, 1]])
+        params = [c[1]['params'] for c in
+                  mock_build_session.return_value.get.call_args_list]
+        self.assertEqual(sorted((p['from'], p['to']) for p in params),
+                         [(3600, '4799.999'), ('4800', '5999.999'),
+                          ('6000', 7200)])
+        self.assertTrue(all(p['group_interval'] == '10m' for p in params))
+
+    def test_get_metric_sharded_needs_group_interval(self):
+        self.assertRaises(ZeusException, self.z.getMetricSharded,
+                          'ZeusTest', 0, 3600, aggregator_function='sum')
+        self.assertRaises(ZeusException, self.z.getMetricSharded,
+                          'ZeusTest', None, 3600)
+
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_metric_names(self, mock_build_session):
         self.z.getMetricNames(metric_name='ZeusTest',
                               limit=10,
                               offset=20)
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             FAKE_SERVER + '/metrics/' +
             FAKE_TOKEN + '/_names',
             params={'metric_name': 'ZeusTest',
@@ -272,18 +563,18 @@ class TestZeusClient(unittest.TestCase):
             headers=self.fake_headers,
             timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_delete_metric(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_delete_metric(self, mock_build_session):
         self.z.deleteMetric('ZeusTest')
-        mock_requests.delete.assert_called_with(
+        mock_build_session.return_value.delete.assert_called_with(
             FAKE_SERVER + '/metrics/' +
             FAKE_TOKEN + '/ZeusTest',
             headers=self.fake_headers,
             timeout=20
         )
 
-    @patch('zeus.client.requests')
-    def test_create_alert(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_create_alert(self, mock_build_session):
         alert_name = "testerino"
         username = "pelegrino"
         token = FAKE_TOKEN
@@ -311,13 +602,13 @@ class TestZeusClient(unittest.TestCase):
             'notify_period': notify_period
         }
 
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             FAKE_SERVER + '/alerts/' +
             FAKE_TOKEN, data=json.dumps(data),
             headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_modify_alert(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_modify_alert(self, mock_build_session):
         alert_id = 42
         alert_name = "testerino"
         username = "pelegrino"
@@ -347,77 +638,77 @@ class TestZeusClient(unittest.TestCase):
         }
 
         path = FAKE_SERVER + '/alerts/' + FAKE_TOKEN + '/' + str(alert_id)
-        mock_requests.put.assert_called_with(
+        mock_build_session.return_value.put.assert_called_with(
             path, data=json.dumps(data),
             headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_alerts(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_alerts(self, mock_build_session):
         self.z.getAlerts()
 
         path = FAKE_SERVER + '/alerts/' + FAKE_TOKEN
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             path, params=None, headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_alert(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_alert(self, mock_build_session):
         alert_id = 42
         self.z.getAlert(alert_id)
 
         path = FAKE_SERVER + '/alerts/' + FAKE_TOKEN + '/' + str(alert_id)
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             path, params=None, headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_delete_alert(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_delete_alert(self, mock_build_session):
         alert_id = 42
         self.z.deleteAlert(alert_id)
 
         path = FAKE_SERVER + '/alerts/' + FAKE_TOKEN + '/' + str(alert_id)
-        mock_requests.delete.assert_called_with(
+        mock_build_session.return_value.delete.assert_called_with(
             path, headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_enable_alerts(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_enable_alerts(self, mock_build_session):
         alert_id_list = [19, 42]
         self.z.enableAlerts(alert_id_list)
         data = {'id': alert_id_list}
 
         path = FAKE_SERVER + '/alerts/' + FAKE_TOKEN + '/enable'
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             path, data=json.dumps(data), headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_disable_alerts(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_disable_alerts(self, mock_build_session):
         alert_id_list = [19, 42]
         self.z.disableAlerts(alert_id_list)
         data = {'id': alert_id_list}
 
         path = FAKE_SERVER + '/alerts/' + FAKE_TOKEN + '/disable'
-        mock_requests.post.assert_called_with(
+        mock_build_session.return_value.post.assert_called_with(
             path, data=json.dumps(data), headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_triggered_alerts(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_triggered_alerts(self, mock_build_session):
         self.z.getTriggeredAlerts()
 
         path = FAKE_SERVER + '/triggeredalerts/' + FAKE_TOKEN
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             path, params=None, headers=self.fake_headers, timeout=20)
 
-    @patch('zeus.client.requests')
-    def test_get_triggered_alerts_last_24h(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def test_get_triggered_alerts_last_24h(self, mock_build_session):
         self.z.getTriggeredAlertsLast24Hours()
 
         path = FAKE_SERVER + '/triggeredalerts/' + FAKE_TOKEN + "/last24"
-        mock_requests.get.assert_called_with(
+        mock_build_session.return_value.get.assert_called_with(
             path, params=None, headers=self.fake_headers, timeout=20)
 
     def test_get_delete_metric_wrong_name(self):
         self.assertRaises(ZeusException, self.z.deleteMetric, '_WrongName')
 
-    @patch('zeus.client.requests')
-    def tearDown(self, mock_requests):
+    @patch('zeus.interfaces.transport.build_session')
+    def tearDown(self, mock_build_session):
         pass
 
 
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+
+from concurrent.futures import ThreadPoolExecutor
+
+from client import ZeusClient
+from interfaces.logs import get_log
+from interfaces.logs import send_log
+from interfaces.metrics import send_metric
+from interfaces.metrics import delete_metric
+from interfaces.metrics import get_metric
+from interfaces.metrics import get_metric_names
+from interfaces.alerts import create_alert
+from interfaces.alerts import delete_alert
+from interfaces.alerts import disable_alerts
+from interfaces.alerts import enable_alerts
+from interfaces.alerts import get_alert
+from interfaces.alerts import get_alerts
+from interfaces.alerts import modify_alert
+from interfaces.trigalerts import get_triggered_alerts
+from interfaces.trigalerts import get_triggered_alerts_last24_hours
+
+DEFAULT_MAX_WORKERS = 100
+
+
+class AsyncZeusClient(object):
+    """
+    Non-blocking Zeus Client. Every API method returns immediately with a
+    ``concurrent.futures.Future`` holding the HTTP response, while the
+    request runs on a worker pool sharing one pooled HTTP session.
+    """
+
+    def __init__(self, token, endpoint='https://api.ciscozeus.io',
+                 max_workers=DEFAULT_MAX_WORKERS, **kwargs):
+        """
+        :param token: either user token or external token.
+        :type token: str
+        :param endpoint: URL endpoints
+        :type endpoint: str
+        :param max_workers: max number of requests in flight
+        :type max_workers: int
+        :param kwargs: extra ``ZeusClient`` arguments. ``pool_maxsize``
+        defaults to ``max_workers`` so every worker has its own connection.
+        """
+        kwargs.setdefault('pool_maxsize', max_workers)
+        self.client = ZeusClient(token, endpoint, **kwargs)
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers)
+
+    def bucket(self, bucket_name):
+        """
+        Return a view of this client sending its requests to
+        *bucket_name*. The view shares the worker pool and the HTTP session
+        of this client.
+
+        :param bucket_name: target bucket name
+        :type bucket_name: str
+        :rtype: AsyncZeusClient
+        """
+        view = copy.copy(self)
+        view.client = self.client.bucket(bucket_name)
+        return view
+
+    def close(self, wait=True):
+        """
+        Stop accepting requests and release the pooled connections.
+
+        :param wait: wait for the requests in flight to finish
+        :type wait: bool
+        """
+        self._executor.shutdown(wait=wait)
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _submit(func):
+    """
+    Wrap an interface function so that it runs on the client worker pool.
+    """
+    def method(self, *args, **kwargs):
+        return self._executor.submit(func, self.client, *args, **kwargs)
+
+    method.__name__ = func.__name__
+    method.__doc__ = func.__doc__
+    return method
+
+
+# Logs
+AsyncZeusClient.getLog = _submit(get_log)
+AsyncZeusClient.sendLog = _submit(send_log)
+
+# Metrics
+AsyncZeusClient.sendMetric = _submit(send_metric)
+AsyncZeusClient.deleteMetric = _submit(delete_metric)
+AsyncZeusClient.getMetric = _submit(get_metric)
+AsyncZeusClient.getMetricNames = _submit(get_metric_names)
+
+# Alerts
+AsyncZeusClient.createAlert = _submit(create_alert)
+AsyncZeusClient.deleteAlert = _submit(delete_alert)
+AsyncZeusClient.disableAlerts = _submit(disable_alerts)
+AsyncZeusClient.enableAlerts = _submit(enable_alerts)
+AsyncZeusClient.getAlert = _submit(get_alert)
+AsyncZeusClient.getAlerts = _submit(get_alerts)
+AsyncZeusClient.modifyAlert = _submit(modify_alert)
+
+# Trigger Alerts
+AsyncZeusClient.getTriggeredAlerts = _submit(get_triggered_alerts)
+AsyncZeusClient.getTriggeredAlertsLast24Hours = _submit(
+    get_triggered_alerts_last24_hours)
@@ -14,14 +14,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import requests
+import copy
 import urlparse
 
+from interfaces.compression import validate_compression
+from interfaces.compression import DEFAULT_COMPRESSION_LEVEL
+from interfaces.compression import DEFAULT_COMPRESSION_THRESHOLD
+from interfaces.encoding import get_serializer
+from interfaces.encoding import validate_wire_format
+from interfaces.encoding import DEFAULT_SERIALIZER
+from interfaces.encoding import FORM
+from interfaces.session import DEFAULT_POOL_CONNECTIONS
+from interfaces.session import DEFAULT_POOL_MAXSIZE
+from interfaces.transport import get_transport
+from interfaces.transport import send_request
+from interfaces.transport import DEFAULT_TIMEOUT
+from interfaces.transport import REQUESTS
 from interfaces.logs import get_log
+from interfaces.logs import iter_logs
 from interfaces.logs import send_log
 from interfaces.metrics import send_metric
 from interfaces.metrics import delete_metric
 from interfaces.metrics import get_metric
+from interfaces.metrics import get_metric_sharded
 from interfaces.metrics import get_metric_names
 from interfaces.alerts import create_alert
 from interfaces.alerts import delete_alert
@@ -37,15 +52,92 @@ from interfaces.trigalerts import get_triggered_alerts_last24_hours
 class ZeusClient(object):
     """
     Zeus Client class, implementing wrapper methods for the Zeus API.
+
+    A client holds no per-request state, so one instance can be used from
+    many threads at once.
     """
 
-    def __init__(self, token, endpoint='https://api.ciscozeus.io'):
+    def __init__(self, token, endpoint='https://api.ciscozeus.io',
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 pool_block=False,
+                 keep_alive=True,
+                 compression=None,
+                 compression_level=DEFAULT_COMPRESSION_LEVEL,
+                 compression_threshold=DEFAULT_COMPRESSION_THRESHOLD,
+                 wire_format=FORM,
+                 serializer=DEFAULT_SERIALIZER,
+                 spool=None,
+                 retry=None,
+                 cache=None,
+                 metric_cache=None,
+                 validator=None,
+                 observers=None,
+                 telemetry=None,
+                 transport=REQUESTS,
+                 timeout=DEFAULT_TIMEOUT):
         """
         :param token: either user token or external token.
         :type token: str
         :param endpoint: URL endpoints
         :type endpoint: str
+        :param pool_connections: number of per-host connection pools
+        :type pool_connections: int
+        :param pool_maxsize: max number of connections kept per host
+        :type pool_maxsize: int
+        :param pool_block: wait for a free pooled connection instead of
+        opening an extra one
+        :type pool_block: bool
+        :param keep_alive: keep connections open between requests
+        :type keep_alive: bool
+        :param compression: compress POST and PUT bodies with 'gzip' or
+        'deflate'. Disabled by default.
+        :type compression: str
+        :param compression_level: zlib compression level, from 0 to 9
+        :type compression_level: int
+        :param compression_threshold: min body size to compress, in bytes
+        :type compression_threshold: int
+        :param wire_format: how log and metric batches are sent: 'form'
+        (JSON in a form field), 'json' (raw JSON body) or 'ndjson' (one
+        JSON document per line)
+        :type wire_format: str
+        :param serializer: JSON encoder: 'json' (the default), or 'auto'
+        for the fastest installed of orjson, ujson and json. A module name
+        or a callable also works.
+        :type serializer: str
+        :param spool: spool keeping the log and metric batches that could
+        not be delivered, to send them again once the endpoint is back
+        :type spool: zeus.interfaces.spool.Spool
+        :param retry: when to send failed requests again. Requests are only
+        sent once by default.
+        :type retry: zeus.interfaces.retry.RetryPolicy
+        :param cache: cache of the metric names, alerts and triggered
+        alerts responses, shared by the bucket views of this client.
+        Disabled by default.
+        :type cache: zeus.interfaces.cache.ResponseCache
+        :param metric_cache: on-disk cache of historical metric windows,
+        used by ``getMetricCached``
+        :type metric_cache: zeus.interfaces.history.MetricHistoryCache
+        :param validator: checks log and metric batches and leaves the
+        invalid records out before sending them
+        :type validator: zeus.interfaces.validation.BatchValidator
+        :param observers: hooks called around every request attempt, like
+        a ``LatencyHistogram``. Bucket views share the list.
+        :type observers: list of
+        zeus.interfaces.instrumentation.RequestObserver
+        :param telemetry: sends the request, buffering and spool counters
+        of this client to Zeus as a metric. Disabled by default.
+        :type telemetry: zeus.interfaces.telemetry.SelfTelemetry
+        :param transport: how requests are sent: 'requests', 'urllib3'
+        (less overhead per request), 'fake' (in memory, for tests), or a
+        ``zeus.interfaces.transport.Transport``. The pool settings apply to
+        'requests' and 'urllib3'.
+        :type transport: str
+        :param timeout: seconds to wait for the server
+        :type timeout: float
         """
+        validate_compression(compression, compression_level)
+        validate_wire_format(wire_format)
         self.token = token
 
         # TODO 1. Better to separate into function and add test code against it.
@@ -60,32 +152,106 @@ class ZeusClient(object):
         }
 
         self.bucket_name = None
-        self.timeout_sec = 20
+        self.timeout_sec = timeout
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.transport = get_transport(
+            transport,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive
+        )
+
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_threshold = compression_threshold
+
+        self.wire_format = wire_format
+        self.dumps = get_serializer(serializer)
+
+        self.retry = retry
+        self.cache = cache
+        self.metric_cache = metric_cache
+        self.validator = validator
+        self.observers = list(observers or [])
+
+        self.spool = spool
+        if spool is not None:
+            spool.start(self)
+
+        self.telemetry = telemetry
+        if telemetry is not None:
+            telemetry.start(self)
+
+    @property
+    def session(self):
+        """
+        HTTP session shared by every request of this client and of its
+        bucket scoped views, with the 'requests' transport. It is created
+        on first use and keeps its connections open until ``close()``.
+        None with the transports that don't use ``requests``.
+
+        :rtype: requests.Session
+        """
+        return self.transport.session
+
+    def close(self):
+        """
+        Close every pooled connection held by this client and stop the
+        spool drainer and the telemetry. Bucket scoped views share them with
+        their client.
+        """
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.spool is not None:
+            self.spool.close()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def bucket(self, bucket_name):
         """
-        This method is for method chain purpose.
+        This method is for method chain purpose. It returns a view of this
+        client sending its requests to *bucket_name*. The view shares the
+        connection pool of the client, and neither of them is modified, so
+        views of different buckets can be used from different threads.
 
-        :param bucket_name: target bucket name
+        :param bucket_name: target bucket name, None for the default bucket
         :type bucket_name: str
-        :return: self object.
+        :return: bucket scoped view of this client.
         :rtype: ZeusClient
         """
-        self.bucket_name = bucket_name
-        return self
+        view = copy.copy(self)
+        view.bucket_name = bucket_name
+        view.headers = dict(self.headers)
+        if bucket_name is None:
+            view.headers.pop('Bucket-Name', None)
+        else:
+            view.headers['Bucket-Name'] = bucket_name
+        return view
 
-    def __build_header(self):
+    def __build_header(self, headers=None):
         """
         Make HTTP Header
+        :param headers: request specific headers
+        :type headers: dict
         :return: Header Object
         :rtype: dict
         """
-        if self.bucket_name is None:
+        if headers is None:
             return self.headers
 
-        return dict(self.headers, **{'Bucket-Name': self.bucket_name})
+        return dict(self.headers, **headers)
 
-    def _request(self, method, path, data=None):
+    def _request(self, method, path, data=None, headers=None):
         """
         :param method: HTTTP Method ['GET', 'POST', 'PUT'. 'DELETE']
         :type method: str
@@ -93,53 +259,50 @@ class ZeusClient(object):
         :type path: str
         :param data: data to be sent
         :type data: dict
-        :param headers: HTTP Header
+        :param headers: extra HTTP Header
         :type headers: dict
         """
         url = urlparse.urljoin(self.endpoint, path)
+        headers = self.__build_header(headers)
+        return send_request(self, method.upper(), url, path, data=data,
+                            headers=headers, timeout=self.timeout_sec)
 
-        if method.upper() == 'GET':
-            response = requests.get(
-                url, params=data, headers=self.__build_header(),
-                timeout=self.timeout_sec
-            )
-
-        elif method.upper() == 'POST':
-            response = requests.post(
-                url, data=data, headers=self.__build_header(),
-                timeout=self.timeout_sec
-            )
 
-        elif method.upper() == 'PUT':
-            response = requests.put(
-                url, data=data, headers=self.__build_header(),
-                timeout=self.timeout_sec
-            )
+# The buffered senders and the metric history cache are only imported when
+# first used, so that importing the client stays fast for short-lived jobs.
+def buffered_log_sender(cls, **kwargs):
+    """Return a ``zeus.interfaces.buffered.BufferedLogSender`` shipping
+    logs through this client."""
+    from interfaces.buffered import buffered_log_sender
+    return buffered_log_sender(cls, **kwargs)
 
-        elif method.upper() == 'DELETE':
-            response = requests.delete(
-                url, headers=self.__build_header(),
-                timeout=self.timeout_sec
-            )
 
-        else:  # TODO Define exception more properly
-            raise Exception('Unknown method {}'.format(method))
+def buffered_metric_sender(cls, **kwargs):
+    """Return a ``zeus.interfaces.buffered.BufferedMetricSender``
+    shipping metrics through this client."""
+    from interfaces.buffered import buffered_metric_sender
+    return buffered_metric_sender(cls, **kwargs)
 
-        # TODO better to make a function to clean method chain related variables.
-        if self.bucket_name is not None:
-            self.bucket_name = None
 
-        return response
+def get_metric_cached(cls, *args, **kwargs):
+    """Same as ``zeus.interfaces.history.get_metric_cached``."""
+    from interfaces.history import get_metric_cached
+    return get_metric_cached(cls, *args, **kwargs)
 
 
 # Logs
 ZeusClient.getLog = get_log
+ZeusClient.iterLogs = iter_logs
 ZeusClient.sendLog = send_log
+ZeusClient.bufferedLogSender = buffered_log_sender
 
 # Metrics
 ZeusClient.sendMetric = send_metric
+ZeusClient.bufferedMetricSender = buffered_metric_sender
 ZeusClient.deleteMetric = delete_metric
 ZeusClient.getMetric = get_metric
+ZeusClient.getMetricSharded = get_metric_sharded
+ZeusClient.getMetricCached = get_metric_cached
 ZeusClient.getMetricNames = get_metric_names
 
 # Alerts
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+zeus-export: stream logs and metrics out of Zeus to NDJSON, CSV or Parquet
+files, page by page, with time-sharded parallel queries for large ranges.
+"""
+
+import argparse
+import csv
+import json
+import os
+import Queue
+import sys
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from client import ZeusClient
+from interfaces.logs import iter_logs
+from interfaces.metrics import get_metric, split_time_range
+from interfaces.utils import ZeusException
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+PARQUET = 'parquet'
+FORMATS = (NDJSON, CSV, PARQUET)
+EXTENSIONS = {
+    '.ndjson': NDJSON,
+    '.jsonl': NDJSON,
+    '.csv': CSV,
+    '.parquet': PARQUET,
+}
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PREFETCH = 2
+DEFAULT_SHARDS = 1
+# Sub-ranges queried at once by default, each holding up to prefetch pages.
+DEFAULT_WORKERS = 4
+# Seconds between two checks of the end of an export by blocked threads.
+WAIT_INTERVAL = 0.1
+
+
+class NdjsonWriter(object):
+    """Writes records as one JSON document per line."""
+
+    def __init__(self, stream, dumps=json.dumps):
+        self.stream = stream
+        self.dumps = dumps
+
+    def write(self, records):
+        dumps = self.dumps
+        self.stream.write(''.join([dumps(record) + '\n'
+                                   for record in records]))
+
+    def close(self):
+        self.stream.flush()
+
+
+class CsvWriter(object):
+    """
+    Writes records as CSV rows. The columns are *columns*, or the fields of
+    the first batch; other fields are left out. Nested values are written
+    as JSON.
+    """
+
+    def __init__(self, stream, columns=None):
+        self.stream = stream
+        self.columns = columns
+        self._writer = None
+
+    def write(self, records):
+        if not records:
+            return
+        if self._writer is None:
+            if self.columns is None:
+                self.columns = sorted(set(key for record in records
+                                          for key in record))
+            self._writer = csv.DictWriter(self.stream, self.columns,
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerows([_flatten(record) for record in records])
+
+    def close(self):
+        self.stream.flush()
+
+
+class ParquetWriter(object):
+    """
+    Writes records to a Parquet file, one row group per batch, with
+    ``pyarrow``. The schema is inferred from the first batch; nested values
+    are written as JSON strings.
+    """
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ZeusException('Parquet export needs pyarrow, '
+                                'pip install pyarrow')
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, records):
+        if not records:
+            return
+        pa = self._pa
+        records = [_flatten(record) for record in records]
+        if self._schema is None:
+            columns = sorted(set(key for record in records
+                                 for key in record))
+            arrays = [pa.array([record.get(c) for record in records])
+                      for c in columns]
+            table = pa.Table.from_arrays(arrays, columns)
+            self._schema = table.schema
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+        else:
+            arrays = [pa.array([record.get(field.name) for record in records],
+                               type=field.type) for field in self._schema]
+            table = pa.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _flatten(record):
+    return dict((key, json.dumps(value) if isinstance(value, (dict, list))
+                 else value) for key, value in record.items())
+
+
+def detect_format(path):
+    """Return the export format of *path* from its extension, NDJSON by
+    default.
+
+    :rtype: str
+    """
+    if not path:
+        return NDJSON
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), NDJSON)
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _sharded(produce, windows, max_workers, prefetch):
+    """Yield the batches produced for each window, window after window,
+    while the next windows are produced in parallel into bounded queues.
+    Windows are started in order, *max_workers* at a time, so at most
+    about ``max_workers * (prefetch + 1)`` batches are held in memory.
+    """
+    stop = threading.Event()
+    queues = [Queue.Queue(maxsize=prefetch) for _ in windows]
+    done = object()
+
+    def put(queue, item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=WAIT_INTERVAL)
+                return
+            except Queue.Full:
+                pass
+
+    def run(window, queue):
+        try:
+            for batch in produce(window):
+                put(queue, batch)
+                if stop.is_set():
+                    return
+            put(queue, done)
+        except Exception as e:
+            put(queue, e)
+
+    executor = ThreadPoolExecutor(
+        max_workers or min(len(windows), DEFAULT_WORKERS))
+    try:
+        for window, queue in zip(windows, queues):
+            executor.submit(run, window, queue)
+        for queue in queues:
+            while True:
+                item = queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+def _windows(from_date, to_date, shards, group_interval=None):
+    if shards > 1 and from_date is not None and to_date is not None:
+        return split_time_range(from_date, to_date, shards, group_interval)
+    return [(from_date, to_date)]
+
+
+def iter_log_batches(client, log_name, attribute_name=None, pattern=None,
+                     from_date=None, to_date=None,
+                     page_size=DEFAULT_PAGE_SIZE, shards=DEFAULT_SHARDS,
+                     max_workers=None, prefetch=DEFAULT_PREFETCH):
+    """Yield the logs that match the params in batches of *page_size*.
+
+    With *shards*, the time range is split into sub-ranges queried in
+    parallel, and their logs are yielded one sub-range after the other.
+    At most *prefetch* pages per sub-range are held in memory.
+
+    :rtype: iterator of array
+    """
+    def produce(window):
+        logs = iter_logs(client, log_name, attribute_name, pattern,
+                         window[0], window[1], page_size=page_size,
+                         prefetch=prefetch)
+        return _batches(logs, page_size)
+
+    windows = _windows(from_date, to_date, shards)
+    if len(windows) == 1:
+        return produce(windows[0])
+    return _sharded(produce, windows, max_workers, prefetch)
+
+
+def metric_rows(series_list):
+    """Turn ``get_metric`` series into one ``dict`` per point, holding the
+    columns and the series ``name``.
+
+    :rtype: array
+    """
+    rows = []
+    for series in series_list:
+        columns = series.get('columns', [])
+        for point in series.get('points', []):
+            row = dict(zip(columns, point))
+            row['name'] = series.get('name')
+            rows.append(row)
+    return rows
+
+
+def iter_metric_pages(client, metric_name, from_date=None, to_date=None,
+                      aggregator_function=None, aggregator_column=None,
+                      group_interval=None, filter_condition=None,
+                      page_size=DEFAULT_PAGE_SIZE):
+    """Yield the points of a metric in pages of at most *page_size*
+    rows, requested one after the other with ``offset`` and ``limit``.
+
+    :rtype: iterator of array
+    """
+    offset = 0
+    while True:
+        response = get_metric(client, metric_name, from_date, to_date,
+                              aggregator_function, aggregator_column,
+                              group_interval, filter_condition,
+                              offset=offset, limit=page_size)
+        if response.status_code != 200:
+            raise ZeusException("Metric query failed with status {}".format(
+                response.status_code))
+        rows = metric_rows(response.json())
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        offset += len(rows)
+
+
+def iter_metric_batches(client, metric_name, from_date=None, to_date=None,
+                        aggregator_function=None, aggregator_column=None,
+                        group_interval=None, filter_condition=None,
+                        page_size=DEFAULT_PAGE_SIZE, shards=DEFAULT_SHARDS,
+                        max_workers=None, prefetch=DEFAULT_PREFETCH):
+    """Yield the points of a metric in pages of *page_size* rows, in time
+    order.
+
+    With *shards*, the time range is split into sub-ranges queried in
+    parallel, and their points are yielded one sub-range after the other.
+    At most *prefetch* pages per sub-range are held in memory.
+
+    :rtype: iterator of array
+    """
+    def produce(window):
+        return iter_metric_pages(client, metric_name, window[0], window[1],
+                                 aggregator_function, aggregator_column,
+                                 group_interval, filter_condition,
+                                 page_size=page_size)
+
+    windows = _windows(from_date, to_date, shards, group_interval)
+    if len(windows) == 1:
+        return produce(windows[0])
+    return _sharded(produce, windows, max_workers, prefetch)
+
+
+def export(batches, writer):
+    """Write every batch of *batches* with *writer*, then close it.
+
+    Batches are fetched in background threads while the previous ones are
+    written.
+
+    :return: number of records written.
+    :rtype: int
+    """
+    count = 0
+    try:
+        for batch in batches:
+            writer.write(batch)
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+
+def make_writer(fmt, output, dumps=json.dumps):
+    """Return a writer of *fmt* records to the *output* path, or to the
+    standard output if None."""
+    if fmt == PARQUET:
+        if not output:
+            raise ZeusException('Parquet export needs an output file.')
+        return ParquetWriter(output)
+    stream = open(output, 'wb') if output else sys.stdout
+    if fmt == CSV:
+        return CsvWriter(stream)
+    return NdjsonWriter(stream, dumps)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='zeus-export',
+        description='Export logs or metrics from Zeus to NDJSON, CSV or '
+                    'Parquet.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log', help='export this log')
+    source.add_argument('--metric', help='export this metric')
+    parser.add_argument('-o', '--output',
+                        help='output file, the standard output by default')
+    parser.add_argument('--format', choices=FORMATS,
+                        help='output format, from the output extension by '
+                             'default')
+    parser.add_argument('--from', dest='from_date',
+                        help='Unix timestamp of the start of the range')
+    parser.add_argument('--to', dest='to_date',
+                        help='Unix timestamp of the end of the range')
+    parser.add_argument('--attribute', help='log field to search')
+    parser.add_argument('--pattern', help='pattern the logs must match')
+    parser.add_argument('--aggregator', help='metric aggregator function')
+    parser.add_argument('--aggregator-column',
+                        help='column the aggregator is applied to')
+    parser.add_argument('--group-interval', help='metric group interval')
+    parser.add_argument('--filter', help='metric filter condition')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARDS,
+                        help='split the range into this many parallel '
+                             'queries')
+    parser.add_argument('--workers', type=int,
+                        help='max number of concurrent queries, {} by '
+                             'default'.format(DEFAULT_WORKERS))
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help='number of logs or metric points per request')
+    parser.add_argument('--token', default=os.environ.get('ZEUS_TOKEN'),
+                        help='Zeus token, $ZEUS_TOKEN by default')
+    parser.add_argument('--endpoint', default='https://api.ciscozeus.io')
+    parser.add_argument('--bucket', help='bucket to export from')
+    args = parser.parse_args(argv)
+    if not args.token:
+        parser.error('a token is needed, with --token or $ZEUS_TOKEN')
+    return args
+
+
+def main(argv=None):
+    """Entry point of the ``zeus-export`` command.
+
+    :rtype: int
+    """
+    args = parse_args(argv)
+    client = ZeusClient(args.token, args.endpoint,
+                        pool_maxsize=max(args.workers or args.shards, 10))
+    if args.bucket:
+        client = client.bucket(args.bucket)
+
+    if args.log:
+        batches = iter_log_batches(
+            client, args.log, args.attribute, args.pattern, args.from_date,
+            args.to_date, page_size=args.page_size, shards=args.shards,
+            max_workers=args.workers)
+    else:
+        batches = iter_metric_batches(
+            client, args.metric, args.from_date, args.to_date,
+            args.aggregator, args.aggregator_column, args.group_interval,
+            args.filter, page_size=args.page_size, shards=args.shards,
+            max_workers=args.workers)
+
+    fmt = args.format or detect_format(args.output)
+    try:
+        count = export(batches, make_writer(fmt, args.output, client.dumps))
+    finally:
+        client.close()
+    sys.stderr.write('Exported {} records.\n'.format(count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Syslog parsing and shipping.
+
+Lines in the BSD (RFC 3164) and IETF (RFC 5424) formats are turned into
+log records carrying the syslog timestamp, host, application, pid,
+facility and severity, and are sent to Zeus in batches.
+"""
+
+import calendar
+import collections
+import multiprocessing
+import re
+import time
+
+# <PRI>Mmm dd hh:mm:ss host tag[pid]: message, PRI and tag are optional.
+RFC3164_PATTERN = re.compile(
+    r'(?:<(\d{1,3})>)?'
+    r'([A-Z][a-z]{2}) +(\d{1,2}) (\d\d):(\d\d):(\d\d) '
+    r'(\S+) '
+    r'(?:([^\s:\[]+)(?:\[([^\]]*)\])?: ?)?'
+    r'(.*)')
+# <PRI>VERSION TIMESTAMP HOST APP PROCID MSGID SD [MSG]
+RFC5424_PATTERN = re.compile(
+    r'<(\d{1,3})>\d{1,2} (\S+) (\S+) (\S+) (\S+) (\S+) '
+    r'(-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (.*))?')
+ISO_TIMESTAMP_PATTERN = re.compile(
+    r'(\d{4}-\d\d-\d\dT\d\d):(\d\d):(\d\d)(\.\d+)?(Z|[+-]\d\d:\d\d)$')
+
+MONTHS = dict((name, number) for number, name in
+              enumerate(calendar.month_abbr) if name)
+NIL = '-'
+BOM = '\xef\xbb\xbf'
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_LINES = 10000
+
+
+class SyslogParser(object):
+    """
+    Parser of RFC 3164 and RFC 5424 syslog lines.
+
+    Timestamps are converted once per hour of log: the epoch of each hour
+    seen is cached, and only minutes and seconds are added per line.
+    RFC 3164 timestamps have no year nor timezone; *year* defaults to the
+    current one (or the previous one for dates in the future) and the
+    local timezone is used unless *utc_offset* is given.
+    """
+
+    def __init__(self, year=None, utc_offset=None,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        """
+        :param year: year of the RFC 3164 timestamps
+        :type year: int
+        :param utc_offset: offset of the RFC 3164 timestamps from UTC, in
+        seconds. Local time by default.
+        :type utc_offset: int
+        :param cache_size: max number of hours kept in the timestamp cache
+        :type cache_size: int
+        """
+        self.year = year
+        self.utc_offset = utc_offset
+        self.cache_size = cache_size
+        self.clock = time.time
+        self._hours = {}
+
+    def parse(self, line):
+        """Return the log record of a syslog line, or None if it is in
+        neither format.
+
+        :param string line: syslog line, with or without its line break.
+        :rtype: dict
+        """
+        line = line.rstrip('\r\n')
+        match = RFC3164_PATTERN.match(line)
+        if match is not None:
+            return self._rfc3164(match)
+        match = RFC5424_PATTERN.match(line)
+        if match is not None:
+            return self._rfc5424(match)
+        return None
+
+    def _cache(self, key, compute):
+        hours = self._hours
+        epoch = hours.get(key)
+        if epoch is None:
+            epoch = compute()
+            if len(hours) >= self.cache_size:
+                hours.clear()
+            hours[key] = epoch
+        return epoch
+
+    def _rfc3164(self, match):
+        pri, month, day, hour, minute, second, host, app, pid, message = \
+            match.groups()
+        if month not in MONTHS:
+            return None
+        hour_epoch = self._cache(
+            (month, day, hour),
+            lambda: self._bsd_hour(MONTHS[month], int(day), int(hour)))
+        record = {
+            'timestamp': hour_epoch + int(minute) * 60 + int(second),
+            'hostname': host,
+            'message': message,
+        }
+        if app:
+            record['appname'] = app
+        if pid:
+            record['pid'] = pid
+        if pri:
+            record['facility'], record['severity'] = divmod(int(pri), 8)
+        return record
+
+    def _bsd_hour(self, month, day, hour):
+        now = self.clock()
+        year = self.year or time.localtime(now).tm_year
+        epoch = self._epoch(year, month, day, hour)
+        if self.year is None and epoch > now + 86400:
+            # December logs read in January.
+            epoch = self._epoch(year - 1, month, day, hour)
+        return epoch
+
+    def _epoch(self, year, month, day, hour):
+        moment = (year, month, day, hour, 0, 0, 0, 0, -1)
+        if self.utc_offset is None:
+            return int(time.mktime(moment))
+        return calendar.timegm(moment) - self.utc_offset
+
+    def _rfc5424(self, match):
+        pri, timestamp, host, app, procid, msgid, data, message = \
+            match.groups()
+        record = {}
+        if timestamp != NIL:
+            record['timestamp'] = self._iso_timestamp(timestamp)
+            if record['timestamp'] is None:
+                return None
+        if host != NIL:
+            record['hostname'] = host
+        if app != NIL:
+            record['appname'] = app
+        if procid != NIL:
+            record['pid'] = procid
+        if msgid != NIL:
+            record['msgid'] = msgid
+        if data != NIL:
+            record['structured_data'] = data
+        if message and message.startswith(BOM):
+            message = message[len(BOM):]
+        record['message'] = message or ''
+        record['facility'], record['severity'] = divmod(int(pri), 8)
+        return record
+
+    def _iso_timestamp(self, value):
+        match = ISO_TIMESTAMP_PATTERN.match(value)
+        if match is None:
+            return None
+        hour, minute, second, fraction, zone = match.groups()
+        epoch = self._cache(hour, lambda: calendar.timegm(
+            time.strptime(hour, '%Y-%m-%dT%H')))
+        epoch += int(minute) * 60 + int(second)
+        if zone != 'Z':
+            offset = int(zone[1:3]) * 3600 + int(zone[4:6]) * 60
+            epoch += offset if zone[0] == '-' else -offset
+        if fraction:
+            return epoch + float(fraction)
+        return epoch
+
+
+def iter_records(lines, parser=None, keep_unparsed=True):
+    """Yield the log records of syslog *lines*.
+
+    :param lines: iterable of syslog lines, such as an open file.
+    :param parser: parser to use, a new one by default.
+    :type parser: SyslogParser
+    :param keep_unparsed: yield the lines in neither format as records
+    with only a message, stamped by the server. They are skipped
+    otherwise.
+    :type keep_unparsed: bool
+    """
+    parse = (parser or SyslogParser()).parse
+    for line in lines:
+        record = parse(line)
+        if record is not None:
+            yield record
+        elif keep_unparsed:
+            line = line.rstrip('\r\n')
+            if line:
+                yield {'message': line}
+
+
+_worker_parser = None
+
+
+def _init_worker(parser_options):
+    global _worker_parser
+    _worker_parser = SyslogParser(**parser_options)
+
+
+def _parse_chunk(args):
+    lines, keep_unparsed = args
+    return list(iter_records(lines, _worker_parser, keep_unparsed))
+
+
+def _chunks(lines, size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_lines(lines, processes=1, chunk_lines=DEFAULT_CHUNK_LINES,
+                keep_unparsed=True, **parser_options):
+    """Yield the log records of syslog *lines*, in order, parsing them in
+    *processes* worker processes for large inputs.
+
+    Lines are read and handed out in chunks of *chunk_lines*, and only a
+    few chunks per worker are in flight, so memory use does not grow with
+    the size of the input.
+
+    :param lines: iterable of syslog lines, such as an open file.
+    :param int processes: number of parsing processes. 1 parses in the
+    calling process.
+    :param int chunk_lines: number of lines sent to a worker at once.
+    :param bool keep_unparsed: see ``iter_records``.
+    :param parser_options: ``SyslogParser`` arguments.
+    """
+    if processes <= 1:
+        for record in iter_records(lines, SyslogParser(**parser_options),
+                                   keep_unparsed):
+            yield record
+        return
+
+    pool = multiprocessing.Pool(processes, _init_worker, (parser_options,))
+    try:
+        pending = collections.deque()
+        for chunk in _chunks(lines, chunk_lines):
+            pending.append(pool.apply_async(_parse_chunk,
+                                            ((chunk, keep_unparsed),)))
+            if len(pending) >= processes * 2:
+                for record in pending.popleft().get():
+                    yield record
+        while pending:
+            for record in pending.popleft().get():
+                yield record
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def send_syslog(client, log_name, lines, batch_size=DEFAULT_BATCH_SIZE,
+                processes=1, **kwargs):
+    """Parse syslog *lines* and send the records with ``sendLog`` in
+    batches of *batch_size*, as they are parsed.
+
+    :param client: client sending the logs
+    :type client: ZeusClient
+    :param string log_name: name of the log.
+    :param lines: iterable of syslog lines, such as an open file.
+    :param int batch_size: number of records per request.
+    :param int processes: number of parsing processes.
+    :param kwargs: ``parse_lines`` arguments.
+    :return: number of ``records`` and ``batches`` sent and of ``failed``
+    batches (rejected, or spooled by the client).
+    :rtype: dict
+    """
+    stats = {'records': 0, 'batches': 0, 'failed': 0}
+
+    def send(batch):
+        response = client.sendLog(log_name, batch)
+        stats['records'] += len(batch)
+        stats['batches'] += 1
+        if response is None or response.status_code >= 400:
+            stats['failed'] += 1
+
+    batch = []
+    for record in parse_lines(lines, processes, **kwargs):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            send(batch)
+            batch = []
+    if batch:
+        send(batch)
+    return stats
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Follow growing log files like ``tail -F`` and ship their lines, saving how
+far each file was delivered so that a restart resumes where it stopped.
+"""
+
+import errno
+import json
+import os
+import threading
+
+from syslog import SyslogParser, iter_records
+from zeus.interfaces.retry import network_errors, RETRYABLE_STATUS
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class Checkpoint(object):
+    """
+    JSON file keeping, for every followed path, the file it was reading
+    (device and inode) and the offset up to which its lines were accepted
+    by the server. It is replaced atomically on every save.
+    """
+
+    def __init__(self, path, fsync=False):
+        """
+        :param path: checkpoint file
+        :type path: str
+        :param fsync: fsync the checkpoint on every save
+        :type fsync: bool
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self._positions = json.load(f)
+        except (IOError, ValueError):
+            self._positions = {}
+
+    def get(self, path):
+        """Return the ``(device, inode, offset)`` saved for *path*, or
+        None.
+
+        :rtype: tuple
+        """
+        with self._lock:
+            position = self._positions.get(path)
+        return tuple(position) if position else None
+
+    def save(self, path, position):
+        """Save the ``(device, inode, offset)`` *position* of *path*."""
+        with self._lock:
+            self._positions[path] = list(position)
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump(self._positions, f)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.rename(self.path + '.tmp', self.path)
+
+
+class FileTailer(object):
+    """
+    Reads the complete lines appended to a file, following it when it is
+    rotated (renamed and recreated) or truncated in place, like
+    ``tail -F``.
+
+    Data is read in blocks of *block_size* bytes and split into lines in
+    memory. A line without its line break yet is kept until the rest of
+    it is written.
+    """
+
+    def __init__(self, path, checkpoint=None, block_size=DEFAULT_BLOCK_SIZE,
+                 start_at_end=False):
+        """
+        :param path: file to follow
+        :type path: str
+        :param checkpoint: where to resume from, and to save the positions
+        passed to ``commit()``
+        :type checkpoint: Checkpoint
+        :param block_size: size of the reads, in bytes
+        :type block_size: int
+        :param start_at_end: skip what the file already holds when there
+        is no checkpoint for it
+        :type start_at_end: bool
+        """
+        self.path = path
+        self.checkpoint = checkpoint
+        self.block_size = block_size
+        self.start_at_end = start_at_end
+
+        self._fd = None
+        self._file_id = None
+        # End of the last complete line read.
+        self._offset = 0
+        self._pending = ''
+
+    @property
+    def position(self):
+        """``(device, inode, offset)`` after the last line returned.
+
+        :rtype: tuple
+        """
+        if self._file_id is None:
+            return None
+        return self._file_id + (self._offset,)
+
+    def read(self, max_bytes=DEFAULT_MAX_BYTES):
+        """Return the complete lines written since the last call, without
+        their line breaks, reading at most about *max_bytes*.
+
+        :rtype: array
+        """
+        if self._fd is None and not self._open():
+            return []
+
+        if os.fstat(self._fd).st_size < self._offset + len(self._pending):
+            # Truncated in place, start over.
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            self._offset = 0
+            self._pending = ''
+
+        blocks = []
+        size = 0
+        while size < max_bytes:
+            block = os.read(self._fd, self.block_size)
+            if not block:
+                break
+            blocks.append(block)
+            size += len(block)
+
+        if not blocks:
+            return self._follow_rotation()
+
+        data = self._pending + ''.join(blocks)
+        end = data.rfind('\n') + 1
+        self._pending = data[end:]
+        self._offset += end
+        return data[:end].split('\n')[:-1]
+
+    def commit(self, position):
+        """Save *position*, returned by ``position`` after a read, in the
+        checkpoint.
+
+        :param tuple position: position of the last line delivered.
+        """
+        if self.checkpoint is not None and position is not None:
+            self.checkpoint.save(self.path, position)
+
+    def close(self):
+        """Close the file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _open(self):
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                return False
+            raise
+        stat = os.fstat(fd)
+        file_id = (stat.st_dev, stat.st_ino)
+        saved = self.checkpoint.get(self.path) if self.checkpoint else None
+
+        if self._file_id is not None:
+            # Rotated, the new file is read from its start.
+            offset = 0
+        elif saved is not None and saved[:2] == file_id and \
+                saved[2] <= stat.st_size:
+            offset = saved[2]
+        elif saved is None and self.start_at_end:
+            offset = stat.st_size
+        else:
+            offset = 0
+
+        os.lseek(fd, offset, os.SEEK_SET)
+        self._fd = fd
+        self._file_id = file_id
+        self._offset = offset
+        self._pending = ''
+        return True
+
+    def _follow_rotation(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                # Renamed and not recreated yet.
+                return []
+            raise
+        if (stat.st_dev, stat.st_ino) == self._file_id:
+            return []
+
+        # The old file is fully read, its last line may lack a line break.
+        lines = [self._pending] if self._pending else []
+        self.close()
+        self._open()
+        return lines
+
+
+def follow(client, log_name, path, checkpoint=None, parser=None,
+           batch_size=DEFAULT_BATCH_SIZE, poll_interval=DEFAULT_POLL_INTERVAL,
+           stop=None, **kwargs):
+    """Follow *path* and send its syslog lines with ``sendLog`` until
+    *stop* is set.
+
+    The position in the file is saved in *checkpoint* only once the server
+    accepted the batch, so a restart doesn't lose lines. A batch that
+    fails with a network error or a retryable status is sent again after
+    *poll_interval*; a line can then be sent twice, never zero times.
+
+    :param client: client sending the logs
+    :type client: ZeusClient
+    :param string log_name: name of the log.
+    :param string path: file to follow.
+    :param checkpoint: checkpoint of the delivered positions
+    :type checkpoint: Checkpoint
+    :param parser: syslog parser, a new one by default
+    :type parser: zeus.ingest.syslog.SyslogParser
+    :param int batch_size: max number of records per request.
+    :param float poll_interval: seconds to wait when there is nothing new.
+    :param stop: event ending the loop
+    :type stop: threading.Event
+    :param kwargs: ``FileTailer`` arguments.
+    :return: number of ``records`` and ``batches`` sent, and of batches
+    ``rejected`` by the server.
+    :rtype: dict
+    """
+    stop = stop or threading.Event()
+    parser = parser or SyslogParser()
+    tailer = FileTailer(path, checkpoint, **kwargs)
+    stats = {'records': 0, 'batches': 0, 'rejected': 0}
+    try:
+        while not stop.is_set():
+            lines = tailer.read()
+            if not lines:
+                stop.wait(poll_interval)
+                continue
+            records = list(iter_records(lines, parser))
+            for start in range(0, len(records), batch_size):
+                batch = records[start:start + batch_size]
+                while not _deliver(client, log_name, batch, stats):
+                    if stop.wait(poll_interval):
+                        return stats
+            tailer.commit(tailer.position)
+    finally:
+        tailer.close()
+    return stats
+
+
+def _deliver(client, log_name, batch, stats):
+    """Send *batch* and return False if it should be sent again."""
+    try:
+        response = client.sendLog(log_name, batch)
+    except network_errors():
+        return False
+    # None means the client spooled the batch or rejected all of it.
+    if response is not None:
+        if response.status_code in RETRYABLE_STATUS:
+            return False
+        if response.status_code >= 400:
+            stats['rejected'] += 1
+    stats['records'] += len(batch)
+    stats['batches'] += 1
+    return True
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+DEFAULT_INITIAL_SIZE = 500
+DEFAULT_MIN_SIZE = 10
+DEFAULT_MAX_SIZE = 50000
+DEFAULT_INCREASE = 100
+DEFAULT_DECREASE_FACTOR = 0.5
+# Fraction of the request timeout a batch should take at most.
+DEFAULT_TARGET_LATENCY_RATIO = 0.25
+
+
+class AdaptiveBatchSize(object):
+    """
+    Additive-increase/multiplicative-decrease controller of the number of
+    records sent per request.
+
+    The batch size grows by *increase* records after every batch accepted
+    within *target_latency* seconds, and is multiplied by
+    *decrease_factor* after a slow, rejected or failed one. It is also kept
+    under what fits in *max_bytes*, according to the average record size
+    seen so far.
+    """
+
+    def __init__(self, initial_size=DEFAULT_INITIAL_SIZE,
+                 min_size=DEFAULT_MIN_SIZE, max_size=DEFAULT_MAX_SIZE,
+                 target_latency=None, max_bytes=None,
+                 increase=DEFAULT_INCREASE,
+                 decrease_factor=DEFAULT_DECREASE_FACTOR):
+        """
+        :param initial_size: batch size to start with
+        :type initial_size: int
+        :param min_size: smallest batch size
+        :type min_size: int
+        :param max_size: largest batch size
+        :type max_size: int
+        :param target_latency: max seconds a batch should take. Defaults to
+        a quarter of the client timeout when used by a sender.
+        :type target_latency: float
+        :param max_bytes: max size of a batch, in bytes
+        :type max_bytes: int
+        :param increase: records added after a good batch
+        :type increase: int
+        :param decrease_factor: factor applied after a bad batch
+        :type decrease_factor: float
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.max_bytes = max_bytes
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+
+        self._lock = threading.Lock()
+        self._size = float(max(min(initial_size, max_size), min_size))
+        self._records = 0
+        self._bytes = 0
+
+    @property
+    def size(self):
+        """Number of records to put in the next batch.
+
+        :rtype: int
+        """
+        size = self._size
+        if self.max_bytes and self._records:
+            record_bytes = float(self._bytes) / self._records
+            size = min(size, self.max_bytes / record_bytes)
+        return int(max(size, self.min_size))
+
+    def observe(self, records, latency, status_code=None, size=0):
+        """Update the batch size with the outcome of a request.
+
+        :param int records: number of records in the batch.
+        :param float latency: duration of the request, in seconds.
+        :param int status_code: response status, None if it raised.
+        :param int size: size of the batch, in bytes.
+        """
+        with self._lock:
+            if records and size:
+                self._records += records
+                self._bytes += size
+
+            too_slow = self.target_latency is not None and \
+                latency > self.target_latency
+            if status_code is None or status_code >= 400 or too_slow:
+                self._size = max(self._size * self.decrease_factor,
+                                 self.min_size)
+            elif records >= int(self._size):
+                # Only grow when full batches are fast enough.
+                self._size = min(self._size + self.increase, self.max_size)
@@ -16,6 +16,9 @@
 
 import json
 
+from cache import cached_get, invalidate
+from cache import ALERT, ALERTS
+
 
 def create_alert(
     cls, alert_name, username, alerts_type, alert_expression,
@@ -54,7 +57,8 @@ def create_alert(
     }
     path = '/alerts/{}'.format(cls.token)
 
-    return cls._request('POST', path=path, data=json.dumps(data))
+    return _changed(cls, cls._request('POST', path=path,
+                                      data=json.dumps(data)))
 
 
 def get_alerts(cls):
@@ -66,7 +70,7 @@ def get_alerts(cls):
     :rtype: array
     """
     path = '/alerts/{}'.format(cls.token)
-    return cls._request('GET', path=path)
+    return cached_get(cls, ALERTS, path)
 
 
 def modify_alert(
@@ -107,7 +111,8 @@ def modify_alert(
     }
     path = '/alerts/{}/{}'.format(cls.token, str(alert_id))
 
-    return cls._request('PUT', path=path, data=json.dumps(data))
+    return _changed(cls, cls._request('PUT', path=path,
+                                      data=json.dumps(data)))
 
 
 def get_alert(cls, alert_id):
@@ -121,7 +126,7 @@ def get_alert(cls, alert_id):
     """
     path = '/alerts/{}/{}'.format(cls.token, str(alert_id))
 
-    return cls._request('GET', path=path)
+    return cached_get(cls, ALERT, path)
 
 
 def delete_alert(cls, alert_id):
@@ -134,7 +139,7 @@ def delete_alert(cls, alert_id):
     :rtype: array
     """
     path = '/alerts/{}/{}'.format(cls.token, str(alert_id))
-    return cls._request('DELETE', path=path)
+    return _changed(cls, cls._request('DELETE', path=path))
 
 
 def enable_alerts(cls, alert_id_list):
@@ -149,7 +154,8 @@ def enable_alerts(cls, alert_id_list):
     path = '/alerts/{}/enable'.format(cls.token)
     data = {'id': alert_id_list}
 
-    return cls._request('POST', path=path, data=json.dumps(data))
+    return _changed(cls, cls._request('POST', path=path,
+                                      data=json.dumps(data)))
 
 
 def disable_alerts(cls, alert_id_list):
@@ -164,4 +170,12 @@ def disable_alerts(cls, alert_id_list):
     path = '/alerts/{}/disable'.format(cls.token)
     data = {'id': alert_id_list}
 
-    return cls._request('POST', path=path, data=json.dumps(data))
+    return _changed(cls, cls._request('POST', path=path,
+                                      data=json.dumps(data)))
+
+
+def _changed(cls, response):
+    """Drop the cached alerts of the client after a change, and return
+    *response*."""
+    invalidate(cls, '/alerts/{}'.format(cls.token))
+    return response
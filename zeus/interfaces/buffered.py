@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import Queue
+import threading
+import time
+
+from adaptive import AdaptiveBatchSize, DEFAULT_TARGET_LATENCY_RATIO
+from logs import send_log
+from metrics import send_metric
+from utils import validate_log_name, validate_metric_name, ZeusException
+
+DEFAULT_MAX_RECORDS = 1000
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_LINGER_SEC = 1.0
+DEFAULT_QUEUE_SIZE = 100000
+
+_STOP = object()
+# How often flush() checks that the worker is still running.
+_WORKER_POLL_SEC = 0.1
+
+
+def _wait_time(deadline):
+    """Seconds to wait before checking the worker again, negative once
+    *deadline* passed."""
+    if deadline is None:
+        return _WORKER_POLL_SEC
+    return min(_WORKER_POLL_SEC, deadline - time.time())
+
+
+class _FlushRequest(object):
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _Batch(object):
+    def __init__(self, deadline):
+        self.records = []
+        self.size = 0
+        self.deadline = deadline
+
+
+class BufferedSender(object):
+    """
+    Collects single records in memory and ships them in batches from a
+    background thread.
+
+    A batch of a given name is sent as soon as it reaches ``max_records``
+    records or ``max_bytes`` bytes of JSON, or when its oldest record has
+    waited ``linger_sec`` seconds.
+    """
+
+    kind = None
+
+    def __init__(self, client, max_records=DEFAULT_MAX_RECORDS,
+                 max_bytes=DEFAULT_MAX_BYTES, linger_sec=DEFAULT_LINGER_SEC,
+                 queue_size=DEFAULT_QUEUE_SIZE, block=False, adaptive=None):
+        """
+        :param client: client used to send the batches
+        :type client: ZeusClient
+        :param max_records: max number of records per batch, ignored when
+        *adaptive* is set
+        :type max_records: int
+        :param max_bytes: max size of the JSON encoded batch
+        :type max_bytes: int
+        :param linger_sec: max time a record waits before being sent
+        :type linger_sec: float
+        :param queue_size: max number of records waiting for the worker
+        :type queue_size: int
+        :param block: if True, ``send`` waits for room in a full queue
+        instead of dropping the record
+        :type block: bool
+        :param adaptive: adapt the number of records per batch to the
+        observed latency and errors. True uses the default controller.
+        :type adaptive: AdaptiveBatchSize or bool
+        """
+        self.client = client
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.linger_sec = linger_sec
+        self.block = block
+        self._dumps = getattr(client, 'dumps', json.dumps)
+
+        if adaptive is True:
+            adaptive = AdaptiveBatchSize(initial_size=max_records)
+        if adaptive is not None:
+            if adaptive.target_latency is None:
+                adaptive.target_latency = DEFAULT_TARGET_LATENCY_RATIO * \
+                    getattr(client, 'timeout_sec', 20)
+            if adaptive.max_bytes is None:
+                adaptive.max_bytes = max_bytes
+        self.adaptive = adaptive
+
+        self._queue = Queue.Queue(maxsize=queue_size)
+        self._batches = {}
+        self._valid_names = set()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'sent': 0,
+            'failed': 0,
+            'batches': 0,
+            'bytes': 0,
+            'flushes': 0,
+            'flush_seconds': 0.0,
+            'last_error': None,
+        }
+        telemetry = getattr(client, 'telemetry', None)
+        if telemetry is not None:
+            telemetry.watch(self)
+
+        self._worker = threading.Thread(
+            target=self._run, name='zeus-{}-sender'.format(self.kind))
+        self._worker.daemon = True
+        self._worker.start()
+
+    def send(self, name, record):
+        """Queue a single *record* to be sent with *name*.
+
+        :param string name: String with the name of the log or metric.
+        :param dict record: the log or metric record.
+        :return: False if the record was dropped because the queue is full.
+        :rtype: bool
+        """
+        if self._closed:
+            raise ZeusException("The {} sender is closed.".format(self.kind))
+        if name not in self._valid_names:
+            self._validate_name(name)
+            self._valid_names.add(name)
+
+        try:
+            self._queue.put((name, record), self.block)
+        except Queue.Full:
+            self._count(dropped=1)
+            return False
+
+        self._count(enqueued=1)
+        return True
+
+    def flush(self, timeout=None):
+        """Send every queued record and wait until it is done.
+
+        :param float timeout: max number of seconds to wait.
+        :return: False if the timeout expired before the flush ended, or
+        if records are left that the closed sender won't send.
+        :rtype: bool
+        """
+        if not self._worker.is_alive():
+            return self._queue.empty()
+        request = _FlushRequest()
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = _wait_time(deadline)
+            try:
+                self._queue.put(request, timeout=max(wait, 0))
+                break
+            except Queue.Full:
+                if wait <= 0 or not self._worker.is_alive():
+                    return False
+        while not request.done.is_set():
+            wait = _wait_time(deadline)
+            if wait <= 0:
+                break
+            # Don't wait for a worker that was stopped by a close().
+            if not request.done.wait(wait) and \
+                    not self._worker.is_alive():
+                break
+        return request.done.is_set()
+
+    def close(self, timeout=None):
+        """Flush the pending records and stop the background worker.
+
+        :param float timeout: max number of seconds to wait.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join(timeout)
+
+    @property
+    def batch_size(self):
+        """Number of records after which a batch is sent.
+
+        :rtype: int
+        """
+        if self.adaptive is not None:
+            return self.adaptive.size
+        return self.max_records
+
+    @property
+    def stats(self):
+        """Delivery counters of this sender.
+
+        :rtype: dict
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        stats['batch_size'] = self.batch_size
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _count(self, **counters):
+        with self._stats_lock:
+            for key, value in counters.items():
+                self._stats[key] += value
+
+    def _fail(self, count, error):
+        with self._stats_lock:
+            self._stats['failed'] += count
+            self._stats['last_error'] = error
+
+    def _next_timeout(self):
+        if not self._batches:
+            return self.linger_sec
+        deadline = min(b.deadline for b in self._batches.values())
+        return max(deadline - time.time(), 0)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._next_timeout())
+            except Queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._guarded(self._send_all)
+                return
+            elif isinstance(item, _FlushRequest):
+                self._guarded(self._send_all)
+                item.done.set()
+            elif item is not None:
+                self._guarded(self._add, *item)
+
+            self._guarded(self._send_expired)
+
+    def _guarded(self, function, *args):
+        # An unexpected error must not stop the worker, or every record
+        # queued after it would never be sent.
+        try:
+            function(*args)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['last_error'] = e
+
+    def _add(self, name, record):
+        try:
+            size = len(self._dumps(record)) + 1
+        except Exception as e:
+            # Like a datetime, that JSON can't encode.
+            self._fail(1, e)
+            return
+        batch = self._batches.get(name)
+        if batch is not None and batch.size + size > self.max_bytes:
+            self._send(name)
+            batch = None
+        if batch is None:
+            batch = _Batch(time.time() + self.linger_sec)
+            self._batches[name] = batch
+
+        batch.records.append(record)
+        batch.size += size
+        if len(batch.records) >= self.batch_size or \
+                batch.size >= self.max_bytes:
+            self._send(name)
+
+    def _observe(self, batch, start, status_code):
+        self._count(flushes=1, flush_seconds=time.time() - start)
+        if self.adaptive is not None:
+            self.adaptive.observe(len(batch.records), time.time() - start,
+                                  status_code, batch.size)
+
+    def _send_expired(self):
+        now = time.time()
+        for name, batch in self._batches.items():
+            if batch.deadline <= now:
+                self._send(name)
+
+    def _send_all(self):
+        for name in self._batches.keys():
+            self._send(name)
+
+    def _send(self, name):
+        batch = self._batches.pop(name)
+        start = time.time()
+        try:
+            response = self._send_batch(self.client, name, batch.records)
+        except Exception as e:
+            self._observe(batch, start, None)
+            self._fail(len(batch.records), e)
+            return
+
+        status_code = response.status_code if response is not None else None
+        self._observe(batch, start, status_code)
+        if status_code is None or status_code >= 400:
+            self._fail(len(batch.records), ZeusException(
+                "{} batch rejected with status {}".format(
+                    self.kind.capitalize(), status_code)))
+            return
+
+        self._count(sent=len(batch.records), batches=1, bytes=batch.size)
+
+
+class BufferedLogSender(BufferedSender):
+    """
+    Collects single log records in memory and ships them in batches with
+    ``send_log`` from a background thread.
+    """
+
+    kind = 'log'
+    _send_batch = staticmethod(send_log)
+    _validate_name = staticmethod(validate_log_name)
+
+
+class BufferedMetricSender(BufferedSender):
+    """
+    Collects single metric points in memory and ships them in batches with
+    ``send_metric`` from a background thread.
+    """
+
+    kind = 'metric'
+    _send_batch = staticmethod(send_metric)
+    _validate_name = staticmethod(validate_metric_name)
+
+
+def buffered_log_sender(cls, **kwargs):
+    """Return a ``BufferedLogSender`` shipping logs through this client.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :rtype: BufferedLogSender
+    """
+    return BufferedLogSender(cls, **kwargs)
+
+
+def buffered_metric_sender(cls, **kwargs):
+    """Return a ``BufferedMetricSender`` shipping metrics through this
+    client.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :rtype: BufferedMetricSender
+    """
+    return BufferedMetricSender(cls, **kwargs)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections import OrderedDict
+
+METRIC_NAMES = 'metric_names'
+ALERTS = 'alerts'
+ALERT = 'alert'
+TRIGGERED_ALERTS = 'triggered_alerts'
+
+# Seconds a response is served without asking the server, per endpoint.
+DEFAULT_TTLS = {
+    METRIC_NAMES: 60,
+    ALERTS: 30,
+    ALERT: 30,
+    TRIGGERED_ALERTS: 10,
+}
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+NOT_MODIFIED = 304
+
+
+class _Entry(object):
+
+    def __init__(self, path, response, expires):
+        self.path = path
+        self.response = response
+        self.expires = expires
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.size = len(response.content or '') + len(path)
+
+    def validators(self):
+        """Headers of a conditional request revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers or None
+
+
+class ResponseCache(object):
+    """
+    In-process cache of the responses of the metadata endpoints
+    (``getMetricNames``, ``getAlerts``, ``getAlert`` and
+    ``getTriggeredAlerts``).
+
+    A response is served from the cache for the TTL of its endpoint. After
+    that it is revalidated with ``If-None-Match``/``If-Modified-Since``
+    when the server sent an ``ETag`` or a ``Last-Modified`` header, and
+    fetched again otherwise. The least recently used responses are evicted
+    when the cached bodies grow over *max_bytes*. A client drops the
+    cached alerts after changing an alert, and the cached metric names
+    after deleting a metric.
+    """
+
+    def __init__(self, ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param ttls: seconds a response is fresh, by endpoint:
+        'metric_names', 'alerts', 'alert' and 'triggered_alerts'.
+        Endpoints left out keep their default TTL, and a TTL of 0 always
+        asks the server.
+        :type ttls: dict
+        :param max_bytes: max size of the cached bodies, in bytes
+        :type max_bytes: int
+        """
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.clock = time.time
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    @property
+    def size_bytes(self):
+        """Size of the cached responses, in bytes."""
+        with self._lock:
+            return self._bytes
+
+    @property
+    def stats(self):
+        """Counters of this cache.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def lookup(self, key):
+        """Return the entry cached for *key* and whether it is still fresh.
+
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None, False
+            del self._entries[key]
+            self._entries[key] = entry
+            fresh = self.clock() < entry.expires
+            self._stats['hits' if fresh else 'misses'] += 1
+            return entry, fresh
+
+    def store(self, key, endpoint, path, response):
+        """Cache *response* for the TTL of *endpoint*.
+
+        :param key: cache key of the request.
+        :param string endpoint: endpoint the response comes from.
+        :param string path: path of the request.
+        :param response: a successful response.
+        """
+        entry = _Entry(path, response, self.clock() + self.ttls[endpoint])
+        with self._lock:
+            self._pop(key)
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def refresh(self, key, endpoint):
+        """Mark the entry of *key* fresh again after a 304 response.
+
+        :return: the cached response, or None if it was evicted meanwhile.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.expires = self.clock() + self.ttls[endpoint]
+            self._stats['revalidated'] += 1
+            return entry.response
+
+    def invalidate(self, prefix):
+        """Drop every response of a path starting with *prefix*, in all
+        the buckets.
+
+        :param string prefix: path prefix.
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items()
+                    if entry.path.startswith(prefix)]
+            for key in keys:
+                self._pop(key)
+            self._stats['invalidations'] += len(keys)
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+def cache_key(cls, path, data=None):
+    """Return the cache key of a GET request on *path* with the *data*
+    query params, in the bucket of the client.
+
+    :rtype: tuple
+    """
+    params = tuple(sorted((data or {}).items()))
+    return getattr(cls, 'bucket_name', None), path, params
+
+
+def cached_get(cls, endpoint, path, data=None):
+    """Send a GET request, answering it from the response cache of the
+    client when there is one.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string endpoint: endpoint name, for its TTL.
+    :param string path: url path start with '/'.
+    :param dict data: query params.
+    :rtype: requests.Response
+    """
+    cache = getattr(cls, 'cache', None)
+    if cache is None:
+        return cls._request('GET', path=path, data=data)
+
+    key = cache_key(cls, path, data)
+    entry, fresh = cache.lookup(key)
+    if fresh:
+        return entry.response
+
+    headers = entry.validators() if entry is not None else None
+    response = cls._request('GET', path=path, data=data, headers=headers)
+    if response.status_code == NOT_MODIFIED and entry is not None:
+        cached = cache.refresh(key, endpoint)
+        if cached is not None:
+            return cached
+        # Evicted meanwhile, the body is needed again.
+        response = cls._request('GET', path=path, data=data)
+    if response.status_code == 200:
+        cache.store(key, endpoint, path, response)
+    return response
+
+
+def invalidate(cls, prefix):
+    """Drop the cached responses of the client under path *prefix*.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string prefix: path prefix.
+    """
+    cache = getattr(cls, 'cache', None)
+    if cache is not None:
+        cache.invalidate(prefix)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import zlib
+
+from encoding import is_replayable
+from utils import ZeusException
+
+GZIP = 'gzip'
+DEFLATE = 'deflate'
+DEFAULT_COMPRESSION_LEVEL = 6
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+
+
+def validate_compression(compression, level):
+    if compression not in (None, GZIP, DEFLATE):
+        raise ZeusException("Invalid compression. It must be None, "
+                            "'gzip' or 'deflate'.")
+    if not 0 <= level <= 9:
+        raise ZeusException("Invalid compression level. It must be "
+                            "between 0 and 9.")
+
+
+def encode_body(data):
+    """Return the bytes that would be sent for *data*, encoding ``dict``
+    bodies as an HTML form like ``requests`` does.
+
+    :param data: request body.
+    :type data: dict or str
+    :rtype: str
+    """
+    if isinstance(data, dict):
+        import urllib
+        return urllib.urlencode(data, doseq=True)
+    if isinstance(data, unicode):
+        return data.encode('utf-8')
+    return data
+
+
+def compress(body, compression, level=DEFAULT_COMPRESSION_LEVEL):
+    """Return *body* compressed with *compression*.
+
+    :param str body: encoded request body.
+    :param string compression: ``'gzip'`` or ``'deflate'``.
+    :param int level: zlib compression level, from 0 to 9.
+    :rtype: str
+    """
+    if compression == GZIP:
+        compressor = zlib.compressobj(level, zlib.DEFLATED,
+                                      16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush()
+    elif compression == DEFLATE:
+        return zlib.compress(body, level)
+
+    raise ZeusException('Unknown compression {}'.format(compression))
+
+
+def compress_stream(chunks, compression, level=DEFAULT_COMPRESSION_LEVEL):
+    """Yield the compressed version of a body given as *chunks*.
+
+    :param chunks: iterable of str.
+    :param string compression: ``'gzip'`` or ``'deflate'``.
+    :param int level: zlib compression level, from 0 to 9.
+    :rtype: iterator of str
+    """
+    if compression == GZIP:
+        compressor = zlib.compressobj(level, zlib.DEFLATED,
+                                      16 + zlib.MAX_WBITS)
+    elif compression == DEFLATE:
+        compressor = zlib.compressobj(level)
+    else:
+        raise ZeusException('Unknown compression {}'.format(compression))
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def compress_request(data, headers, compression,
+                     level=DEFAULT_COMPRESSION_LEVEL,
+                     threshold=DEFAULT_COMPRESSION_THRESHOLD):
+    """Return ``(data, headers)`` ready to be sent, compressing the body
+    when it is at least *threshold* bytes long. Streamed bodies, whose size
+    is unknown, are always compressed.
+
+    :param data: request body.
+    :type data: dict, str or iterator of str
+    :param dict headers: request headers.
+    :param string compression: ``'gzip'``, ``'deflate'`` or None.
+    :param int level: zlib compression level, from 0 to 9.
+    :param int threshold: min body size to compress, in bytes.
+    :rtype: tuple
+    """
+    if compression is None or data is None:
+        return data, headers
+
+    compressed_headers = dict(headers or {},
+                              **{'Content-Encoding': compression})
+    if not is_replayable(data):
+        return (compress_stream(data, compression, level),
+                compressed_headers)
+
+    body = encode_body(data)
+    if len(body) < threshold:
+        return data, headers
+
+    return compress(body, compression, level), compressed_headers
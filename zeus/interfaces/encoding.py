@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from utils import ZeusException
+
+# Batches are sent as a form field holding a JSON array (the original wire
+# format), as a raw JSON array, or as one JSON document per line.
+FORM = 'form'
+JSON = 'json'
+NDJSON = 'ndjson'
+WIRE_FORMATS = (FORM, JSON, NDJSON)
+
+AUTO = 'auto'
+# The standard library, so that installing another JSON library never
+# changes the bytes sent by existing code. 'auto' is opt-in.
+DEFAULT_SERIALIZER = 'json'
+# Tried in this order when the serializer is 'auto'.
+FAST_SERIALIZERS = ('orjson', 'ujson')
+
+# Streamed batches are sent in chunks of about this many bytes.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    JSON: 'application/json',
+    NDJSON: 'application/x-ndjson',
+}
+
+
+def get_serializer(serializer=DEFAULT_SERIALIZER):
+    """Return a function encoding Python objects to JSON.
+
+    :param serializer: ``'auto'`` for the fastest installed library,
+    the name of a module with a ``dumps`` function (``'json'``,
+    ``'ujson'``, ``'orjson'``) or a callable.
+    :rtype: function
+    """
+    if callable(serializer):
+        return serializer
+    if serializer == AUTO:
+        return _auto_serializer
+    return _import_serializer((serializer,))
+
+
+def _import_serializer(names):
+    for name in names:
+        if name == 'json':
+            return json.dumps
+        try:
+            module = __import__(name)
+        except ImportError:
+            continue
+        return module.dumps
+
+    raise ZeusException('Serializer {} is not installed'.format(
+        ', '.join(names)))
+
+
+class _AutoSerializer(object):
+    """Encoder of the 'auto' serializer. The JSON libraries are only
+    imported when the first batch is encoded."""
+
+    def __init__(self):
+        self.dumps = None
+
+    def __call__(self, obj):
+        if self.dumps is None:
+            self.dumps = _import_serializer(FAST_SERIALIZERS + ('json',))
+        return self.dumps(obj)
+
+
+_auto_serializer = _AutoSerializer()
+
+
+def validate_wire_format(wire_format):
+    if wire_format not in WIRE_FORMATS:
+        raise ZeusException("Invalid wire format. It must be one of "
+                            "{}.".format(', '.join(WIRE_FORMATS)))
+
+
+def is_replayable(data):
+    """Return False if *data* is a streamed body, which can only be sent
+    once.
+
+    :rtype: bool
+    """
+    return data is None or isinstance(data, (dict, basestring))
+
+
+def encode_batch(cls, field, records):
+    """Return ``(data, headers)`` to upload *records* in the wire format
+    of the client.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string field: form field of the batch, ``'logs'`` or
+    ``'metrics'``.
+    :param records: ``array`` of ``dict`` to send. Any other iterable,
+    like a generator, is encoded lazily into a stream of chunks, so that
+    the batch never needs to be held in memory.
+    :rtype: tuple
+    """
+    dumps = getattr(cls, 'dumps', json.dumps)
+    wire_format = getattr(cls, 'wire_format', FORM)
+
+    if not isinstance(records, (list, tuple)):
+        body = iter_batch(dumps, wire_format, field, records)
+        if wire_format == FORM:
+            return body, None
+        return body, {'content-type': CONTENT_TYPES[wire_format]}
+
+    if wire_format == FORM:
+        return {field: dumps(records)}, None
+    elif wire_format == JSON:
+        body = dumps(records)
+    else:
+        body = ''.join(dumps(record) + '\n' for record in records)
+
+    return body, {'content-type': CONTENT_TYPES[wire_format]}
+
+
+def _encode_records(dumps, wire_format, records):
+    if wire_format == NDJSON:
+        for record in records:
+            yield dumps(record)
+            yield '\n'
+        return
+
+    yield '['
+    separator = ''
+    for record in records:
+        yield separator
+        yield dumps(record)
+        separator = ','
+    yield ']'
+
+
+def iter_batch(dumps, wire_format, field, records,
+               chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the request body of *records* in chunks of about
+    *chunk_size* bytes, consuming *records* one at a time.
+
+    :param function dumps: JSON encoder.
+    :param string wire_format: ``'form'``, ``'json'`` or ``'ndjson'``.
+    :param string field: form field of the batch.
+    :param records: iterable of ``dict``.
+    :param int chunk_size: min size of the yielded chunks.
+    :rtype: iterator of str
+    """
+    import urllib
+
+    buffered = []
+    size = 0
+    if wire_format == FORM:
+        buffered.append(field + '=')
+
+    for piece in _encode_records(dumps, wire_format, records):
+        if isinstance(piece, unicode):
+            piece = piece.encode('utf-8')
+        if wire_format == FORM:
+            piece = urllib.quote_plus(piece)
+        buffered.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffered)
+            buffered = []
+            size = 0
+
+    if buffered:
+        yield ''.join(buffered)
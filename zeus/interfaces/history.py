@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import get_metric, merge_metric_series, SHARD_EPSILON
+from utils import validate_metric_name, validate_dates, parse_interval
+from utils import ZeusException
+
+DEFAULT_WINDOW_SECONDS = 3600
+# Points older than this are assumed not to change anymore.
+DEFAULT_IMMUTABLE_AFTER = 300
+DEFAULT_MAX_WORKERS = 4
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS windows ('
+    ' metric TEXT NOT NULL,'
+    ' query TEXT NOT NULL,'
+    ' width INTEGER NOT NULL,'
+    ' start INTEGER NOT NULL,'
+    ' result TEXT NOT NULL,'
+    ' PRIMARY KEY (query, width, start))',
+    'CREATE INDEX IF NOT EXISTS windows_metric ON windows (metric)',
+)
+
+
+class MetricHistoryCache(object):
+    """
+    On-disk cache of the historical ``getMetric`` results, in a SQLite
+    database.
+
+    Time ranges are cut into windows of *window_seconds* aligned on the
+    Unix epoch. Windows ending more than *immutable_after* seconds ago are
+    fetched once and then served from the database; the partial windows at
+    the edges of a range and the recent ones are always fetched.
+    """
+
+    def __init__(self, path, window_seconds=DEFAULT_WINDOW_SECONDS,
+                 immutable_after=DEFAULT_IMMUTABLE_AFTER):
+        """
+        :param path: SQLite database file, ``':memory:'`` for a cache
+        lasting as long as the process
+        :type path: str
+        :param window_seconds: width of the cached windows, rounded up to
+        a multiple of the group interval of a query
+        :type window_seconds: int
+        :param immutable_after: age after which points don't change, in
+        seconds
+        :type immutable_after: float
+        """
+        self.path = path
+        self.window_seconds = window_seconds
+        self.immutable_after = immutable_after
+        self.clock = time.time
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+        self._stats = {'hits': 0, 'misses': 0}
+
+    @property
+    def stats(self):
+        """Number of windows served from the cache (hits) and fetched
+        from the server (misses).
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def window_width(self, step=1):
+        """Width of the cached windows for a query grouped by *step*
+        seconds.
+
+        :rtype: int
+        """
+        step = int(step)
+        return int(math.ceil(float(self.window_seconds) / step)) * step
+
+    def load(self, query, width, starts):
+        """Return the cached results of the windows of *query* starting at
+        *starts*, by start.
+
+        :rtype: dict
+        """
+        found = {}
+        with self._lock:
+            for start in starts:
+                row = self._conn.execute(
+                    'SELECT result FROM windows '
+                    'WHERE query = ? AND width = ? AND start = ?',
+                    (query, width, start)).fetchone()
+                if row is not None:
+                    found[start] = json.loads(row[0])
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(starts) - len(found)
+        return found
+
+    def save(self, metric_name, query, width, results):
+        """Store the results of historical windows of *query*.
+
+        :param dict results: decoded results, by window start.
+        """
+        rows = [(metric_name, query, width, start, json.dumps(result))
+                for start, result in results.items()]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO windows '
+                    '(metric, query, width, start, result) '
+                    'VALUES (?, ?, ?, ?, ?)', rows)
+
+    def forget(self, metric_name):
+        """Drop every cached window of *metric_name*."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM windows WHERE metric = ?',
+                                   (metric_name,))
+
+    def clear(self):
+        """Drop every cached window."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM windows')
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._conn.close()
+
+
+def query_key(cls, *params):
+    """Return the key identifying a metric query of the client in its
+    bucket. Tokens are hashed so that they are not stored in the cache.
+
+    :rtype: str
+    """
+    key = [cls.token, getattr(cls, 'bucket_name', None)] + list(params)
+    return hashlib.sha1(json.dumps(key)).hexdigest()
+
+
+def get_metric_cached(cls, metric_name, from_date, to_date,
+                      aggregator_function=None,
+                      aggregator_column=None,
+                      group_interval=None,
+                      filter_condition=None,
+                      max_workers=DEFAULT_MAX_WORKERS):
+    """Return ``array`` of ``dict`` with the metrics that match the params,
+    reading the historical windows of the range from the metric cache of
+    the client and fetching only the missing and recent ones.
+
+    Without a metric cache, this is a single ``get_metric`` call.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string metric_name: Name of the metric.
+    :param string from_date: Unix formatted start date.
+    :param string to_date: Unix formatted end date.
+    :param string aggregator_function: Aggregator function. ``sum``,
+    ``count``, ``min``, ``max``,...
+    :param string aggregator_column: Column to which
+    ``aggregator_function`` is to be applied.
+    :param string group_interval: Intervals in which to group the results.
+    :param string filter_condition: Filters to be applied to metric values.
+    :param int max_workers: Max number of concurrent requests.
+    :rtype: array
+    """
+
+    validate_metric_name(metric_name)
+    validate_dates(from_date, to_date)
+    if from_date is None or to_date is None:
+        raise ZeusException("Invalid date. Cached queries need both "
+                            "from_date and to_date.")
+    if aggregator_function and not group_interval:
+        raise ZeusException("Cached aggregated queries need a "
+                            "group_interval.")
+
+    def fetch(window):
+        response = get_metric(cls, metric_name, window[0], window[1],
+                              aggregator_function, aggregator_column,
+                              group_interval, filter_condition)
+        if response.status_code != 200:
+            raise ZeusException("Metric query failed with status {}".format(
+                response.status_code))
+        return response.json()
+
+    cache = getattr(cls, 'metric_cache', None)
+    if cache is None:
+        return fetch((from_date, to_date))
+
+    step = parse_interval(group_interval) if group_interval else 1
+    width = cache.window_width(step)
+    start = float(from_date)
+    end = float(to_date)
+    first = int(math.ceil(start / width)) * width
+    last = int(math.floor(
+        min(end, cache.clock() - cache.immutable_after) / width)) * width
+    if last <= first:
+        return fetch((from_date, to_date))
+
+    query = query_key(cls, metric_name, aggregator_function,
+                      aggregator_column, group_interval, filter_condition)
+    starts = range(first, last, width)
+    cached = cache.load(query, width, starts)
+
+    # Windows are (from, to, start of the cached window or None).
+    windows = []
+    if first > start:
+        windows.append((from_date, '%.3f' % (first - SHARD_EPSILON), None))
+    windows.extend(('%d' % s, '%.3f' % (s + width - SHARD_EPSILON), s)
+                   for s in starts if s not in cached)
+    if last <= end:
+        windows.append(('%d' % last, to_date, None))
+
+    executor = ThreadPoolExecutor(max_workers)
+    try:
+        fetched = list(executor.map(fetch, windows))
+    finally:
+        executor.shutdown(wait=False)
+
+    cache.save(metric_name, query, width, dict(
+        (window[2], result) for window, result in zip(windows, fetched)
+        if window[2] is not None))
+
+    by_start = dict(cached)
+    results = []
+    for window, result in zip(windows, fetched):
+        if window[2] is None:
+            results.append((float(window[0]), result))
+        else:
+            by_start[window[2]] = result
+    results.extend(by_start.items())
+    results.sort(key=lambda item: item[0])
+    return merge_metric_series([result for _, result in results])
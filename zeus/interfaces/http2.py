@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+``requests`` adapter sending HTTP/2 requests with ``hyper``, imported by
+``Http2Transport`` only.
+"""
+
+import socket
+import threading
+import urlparse
+
+from hyper.common.bufsocket import BufferedSocket
+from hyper.contrib import HTTP20Adapter
+from hyper.http11.connection import HTTP11Connection
+from hyper.http20.connection import HTTP20Connection
+from hyper.tls import H2_NPN_PROTOCOLS, wrap_socket
+
+
+class Http2Adapter(HTTP20Adapter):
+    """
+    ``HTTP20Adapter`` enforcing the request timeout, which ``hyper``
+    ignores, and reading the response of its own stream, so that the
+    threads sharing a connection don't get each other's responses.
+
+    ``hyper`` connects HTTP/1.1 with a fixed 5 seconds timeout and HTTP/2
+    with none, so the adapter connects itself within the request timeout
+    before sending the request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Http2Adapter, self).__init__(*args, **kwargs)
+        self._connect_lock = threading.Lock()
+
+    def send(self, request, stream=False, cert=None, timeout=None,
+             **kwargs):
+        parsed = urlparse.urlparse(request.url)
+        connection = self.get_connection(parsed.hostname, parsed.port,
+                                         parsed.scheme, cert=cert)
+        selector = parsed.path
+        if parsed.query:
+            selector += '?' + parsed.query
+
+        connect_timeout, read_timeout = split_timeout(timeout)
+        with self._connect_lock:
+            connect(connection, connect_timeout)
+        set_timeout(connection, read_timeout)
+        stream_id = connection.request(request.method, selector,
+                                       request.body, request.headers)
+        # None when ALPN settled on HTTP/1.1.
+        args = () if stream_id is None else (stream_id,)
+        response = self.build_response(request,
+                                       connection.get_response(*args))
+        if not stream:
+            response.content
+        return response
+
+
+def split_timeout(timeout):
+    """Return the connect and read timeouts of a request *timeout*.
+
+    :param timeout: seconds, or a ``(connect, read)`` tuple.
+    :rtype: tuple
+    """
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+
+def connect(connection, timeout):
+    """Connect a ``hyper.HTTPConnection`` within *timeout* seconds, unless
+    it is connected already, like ``hyper`` does on its first request:
+    the connection is upgraded to HTTP/2 when ALPN settles on it.
+
+    :param timeout: seconds.
+    """
+    conn = connection._conn
+    if conn._sock is not None:
+        return
+    host, port = conn.host, conn.port
+    sock = socket.create_connection((host, port), timeout)
+    protocol = None
+    if conn.secure:
+        sock, protocol = wrap_socket(sock, host, conn.ssl_context)
+    sock = BufferedSocket(sock, conn.network_buffer_size)
+
+    if protocol in H2_NPN_PROTOCOLS:
+        if not isinstance(conn, HTTP20Connection):
+            conn = HTTP20Connection(connection._host, connection._port,
+                                    **connection._h2_kwargs)
+        conn._sock = sock
+        conn._send_preamble()
+    else:
+        if not isinstance(conn, HTTP11Connection):
+            conn = HTTP11Connection(connection._host, connection._port,
+                                    **connection._h1_kwargs)
+        conn._sock = sock
+    connection._conn = conn
+
+
+def set_timeout(connection, timeout):
+    """Set the read and write *timeout* of the socket of a connected
+    ``hyper.HTTPConnection``.
+
+    :param timeout: seconds.
+    """
+    sock = getattr(connection._conn, '_sock', None)
+    if sock is not None:
+        # hyper wraps the socket in a BufferedSocket.
+        getattr(sock, '_sck', sock).settimeout(timeout)
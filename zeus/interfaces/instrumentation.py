@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Hooks observing every HTTP request of the client, and a latency histogram
+built on them.
+"""
+
+import json
+import math
+import threading
+import time
+
+# Path segments after the token that name an endpoint, not a resource.
+FIXED_SEGMENTS = frozenset(['_names', '_values', 'enable', 'disable',
+                            'last24'])
+# Histogram buckets per power of two, about 9% wide.
+SUB_BUCKETS = 8
+
+
+class RequestEvent(object):
+    """
+    One attempt of an HTTP request, passed to the observers.
+
+    ``timings`` holds the seconds spent in the attempt: ``total``, and with
+    a response, ``server`` until the response headers were received (with
+    the connection setup when a new connection was opened) and
+    ``download`` for the body. Transports reporting more detail add
+    ``dns``, ``connect`` and ``tls``.
+    """
+
+    __slots__ = ('method', 'path', 'bucket', 'attempt', 'start', 'status',
+                 'bytes_out', 'bytes_in', 'timings', 'error')
+
+    def __init__(self, method, path, bucket, attempt):
+        self.method = method
+        self.path = path
+        self.bucket = bucket
+        self.attempt = attempt
+        self.start = time.time()
+        self.status = None
+        self.bytes_out = None
+        self.bytes_in = None
+        self.timings = {}
+        self.error = None
+
+
+class RequestObserver(object):
+    """
+    Base class of the request hooks, which all do nothing. Hooks are called
+    from the thread making the request, and must not raise.
+    """
+
+    def on_request_start(self, event):
+        """Called before an attempt is sent.
+
+        :type event: RequestEvent
+        """
+
+    def on_request_end(self, event):
+        """Called when an attempt got a response, whatever its status.
+
+        :type event: RequestEvent
+        """
+
+    def on_request_error(self, event):
+        """Called when an attempt failed without a response, with the
+        exception in ``event.error``.
+
+        :type event: RequestEvent
+        """
+
+
+def path_template(path, token):
+    """Return *path* with the token and the resource names replaced by
+    placeholders, like ``/logs/{token}/{name}``, to group requests.
+
+    :rtype: str
+    """
+    segments = path.split('/')
+    after_token = False
+    for i, segment in enumerate(segments):
+        if after_token and segment and segment not in FIXED_SEGMENTS:
+            segments[i] = '{id}' if segment.isdigit() else '{name}'
+        elif segment == token:
+            segments[i] = '{token}'
+            after_token = True
+    return '/'.join(segments)
+
+
+def _body_size(response):
+    body = getattr(response.request, 'body', None)
+    if body is None or not isinstance(body, (str, unicode, bytearray)):
+        return None
+    return len(body)
+
+
+def observe(cls, method, path, send):
+    """Return *send* calling the observers of *cls* around every attempt.
+
+    :param cls: client making the request
+    :type cls: ZeusClient or RestClient
+    :param string method: HTTP method of the request.
+    :param string path: url path of the request.
+    :param function send: sends the request and returns the response.
+    :rtype: function
+    """
+    observers = cls.observers
+    template = path_template(path, getattr(cls, 'token', None))
+    bucket = getattr(cls, 'bucket_name', None)
+    attempts = [0]
+
+    def observed():
+        event = RequestEvent(method, template, bucket, attempts[0])
+        attempts[0] += 1
+        for observer in observers:
+            observer.on_request_start(event)
+        start = time.time()
+        try:
+            response = send()
+        except Exception as e:
+            event.timings['total'] = time.time() - start
+            event.error = e
+            for observer in observers:
+                observer.on_request_error(event)
+            raise
+        total = time.time() - start
+        event.status = response.status_code
+        event.bytes_out = _body_size(response)
+        event.bytes_in = len(response.content)
+        elapsed = getattr(response, 'elapsed', None)
+        event.timings['total'] = total
+        if elapsed is not None:
+            server = elapsed.total_seconds()
+            event.timings['server'] = server
+            event.timings['download'] = max(total - server, 0.0)
+        for observer in observers:
+            observer.on_request_end(event)
+        return response
+
+    return observed
+
+
+class LatencyHistogram(RequestObserver):
+    """
+    Request observer counting the total duration of the attempts in
+    log-linear buckets, per method, path template and status class (like
+    ``2xx``, or ``error`` without a response). Buckets are about 9% wide,
+    so percentiles are within 9% of the exact value.
+
+    Recording is a few dictionary updates under a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def on_request_end(self, event):
+        self.record((event.method, event.path,
+                     '{}xx'.format(event.status // 100)),
+                    event.timings['total'])
+
+    def on_request_error(self, event):
+        self.record((event.method, event.path, 'error'),
+                    event.timings['total'])
+
+    def record(self, key, seconds):
+        """Count a duration of *seconds* in the histogram of *key*."""
+        mantissa, exponent = math.frexp(seconds * 1e6)
+        index = exponent * SUB_BUCKETS + int((mantissa - 0.5) *
+                                             2 * SUB_BUCKETS)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0, 0.0, {}]
+            series[0] += 1
+            series[1] += seconds
+            buckets = series[2]
+            buckets[index] = buckets.get(index, 0) + 1
+
+    def percentile(self, key, fraction):
+        """Return the duration under which *fraction* of the requests of
+        *key* took, in seconds, or None if there is none.
+
+        :rtype: float
+        """
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+            count, buckets = series[0], dict(series[2])
+        return _percentile(count, buckets, fraction)
+
+    def snapshot(self):
+        """Return, for every ``(method, path, status)`` key, the
+        ``count``, ``mean``, ``p50``, ``p90``, ``p99`` and ``max``
+        durations in seconds.
+
+        :rtype: dict
+        """
+        with self._lock:
+            series = dict((key, (count, total, dict(buckets)))
+                          for key, (count, total, buckets)
+                          in self._series.items())
+        return dict((key, {
+            'count': count,
+            'mean': total / count,
+            'p50': _percentile(count, buckets, 0.5),
+            'p90': _percentile(count, buckets, 0.9),
+            'p99': _percentile(count, buckets, 0.99),
+            'max': _bucket_value(max(buckets)),
+        }) for key, (count, total, buckets) in series.items())
+
+    def dump(self, stream):
+        """Write the snapshot to *stream* as JSON, one object per key."""
+        for (method, path, status), stats in sorted(
+                self.snapshot().items()):
+            stats = dict(stats, method=method, path=path, status=status)
+            stream.write(json.dumps(stats, sort_keys=True) + '\n')
+
+    def reset(self):
+        """Forget every recorded duration."""
+        with self._lock:
+            self._series = {}
+
+
+def _bucket_value(index):
+    """Upper bound of the bucket *index*, in seconds."""
+    exponent, sub = divmod(index, SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 1) / (2.0 * SUB_BUCKETS), exponent) / 1e6
+
+
+def _percentile(count, buckets, fraction):
+    rank = max(int(math.ceil(count * fraction)), 1)
+    seen = 0
+    for index in sorted(buckets):
+        seen += buckets[index]
+        if seen >= rank:
+            return _bucket_value(index)
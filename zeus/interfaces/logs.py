@@ -14,8 +14,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-from utils import validate_log_name, validate_dates
+import collections
+
+from encoding import encode_batch
+from retry import send_with_split
+from spool import send_or_spool
+from utils import validate_log_name, validate_dates, ZeusException
+from validation import validate_records
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PREFETCH = 2
 
 
 def send_log(cls, log_name, logs):
@@ -26,15 +34,32 @@ def send_log(cls, log_name, logs):
     :type cls: ZeusClient
     :param string log_name: String with the name of the log.
     :param dict logs: ``array`` of ``dict`` containing the logs to send.
+    Generators and other iterables are streamed with chunked transfer
+    encoding instead of being encoded in memory first.
     :rtype: dict
 
+    If the client has a spool, a batch that cannot be delivered is kept
+    there and sent again later. None is returned when the endpoint could
+    not be reached.
+
+    If the client has a validator, invalid records are left out of the
+    batch. None is returned when none of them was valid.
+
     """
     path = '/logs/{}/{}'.format(cls.token, log_name)
 
     validate_log_name(log_name)
-    data = {'logs': json.dumps(logs)}
 
-    return cls._request('POST', path=path, data=data)
+    logs = validate_records(cls, 'logs', log_name, logs)
+    if logs is None:
+        return None
+
+    def send(batch):
+        data, headers = encode_batch(cls, 'logs', batch)
+        return cls._request('POST', path=path, data=data, headers=headers)
+
+    return send_or_spool(cls, 'logs', log_name, logs,
+                         lambda: send_with_split(cls, logs, send))
 
 
 def get_log(cls, log_name, attribute_name=None, pattern=None,
@@ -72,3 +97,74 @@ def get_log(cls, log_name, attribute_name=None, pattern=None,
         data['limit'] = limit
 
     return cls._request('GET', path=path, data=data)
+
+
+def iter_logs(cls, log_name, attribute_name=None, pattern=None,
+              from_date=None, to_date=None, page_size=DEFAULT_PAGE_SIZE,
+              prefetch=DEFAULT_PREFETCH):
+    """Yield the logs that match the params one by one, requesting them
+    from Zeus in pages of *page_size* logs.
+
+    While a page is being consumed, the next *prefetch* pages are fetched
+    and decoded in background threads.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string log_name: Name of the log.
+    :param string attribute_name: Name of field to be searched. If omitted,
+    search all fields.
+    :param string pattern: Pattern to match the logs against.
+    :param string from_date: Unix formatted start date.
+    :param string to_date: Unix formatted end date.
+    :param int page_size: Number of logs requested per page.
+    :param int prefetch: Number of pages fetched ahead of the consumer.
+    :rtype: iterator of dict
+
+    """
+    validate_dates(from_date, to_date)
+    if page_size < 1:
+        raise ZeusException("Invalid page size. It must be at least 1.")
+
+    def fetch(offset):
+        response = get_log(cls, log_name, attribute_name, pattern,
+                           from_date, to_date, offset=offset,
+                           limit=page_size)
+        if response.status_code != 200:
+            raise ZeusException("Log query failed with status {}".format(
+                response.status_code))
+        body = response.json()
+        return body['result'], body.get('total')
+
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max(prefetch, 1))
+    pending = collections.deque()
+    state = {'offset': 0, 'total': None}
+
+    def submit_pages(count):
+        while len(pending) < count and (state['total'] is None or
+                                        state['offset'] < state['total']):
+            pending.append(executor.submit(fetch, state['offset']))
+            state['offset'] += page_size
+
+    try:
+        submit_pages(1)
+        while pending:
+            logs, total = pending.popleft().result()
+            if len(logs) < page_size:
+                # Last page, whatever is still in flight would be empty.
+                state['total'] = 0
+                for future in pending:
+                    future.cancel()
+                pending.clear()
+            elif total is not None:
+                state['total'] = total
+
+            # Keep the next pages coming while this one is consumed.
+            submit_pages(prefetch)
+            for log in logs:
+                yield log
+            submit_pages(1)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -14,8 +14,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-from utils import validate_metric_name, validate_dates
+import math
+
+from cache import cached_get, invalidate
+from cache import METRIC_NAMES
+from encoding import encode_batch
+from retry import send_with_split
+from spool import send_or_spool
+from utils import validate_metric_name, validate_dates, parse_interval
+from utils import ZeusException
+from validation import validate_records
+
+DEFAULT_SHARDS = 4
+# Sub-windows end this many seconds before the next one starts, so that a
+# point on the boundary is only returned once.
+SHARD_EPSILON = 0.001
 
 
 def send_metric(cls, metric_name, metrics):
@@ -26,15 +39,31 @@ def send_metric(cls, metric_name, metrics):
     :type cls: ZeusClient
     :param string metric_name: String with the name of the metric.
     :param dict metrics: ``array`` of ``dict`` containing the metrics to
-     send.
+     send. Generators and other iterables are streamed with chunked
+     transfer encoding.
     :rtype: dict
+
+    If the client has a spool, a batch that cannot be delivered is kept
+    there and sent again later. None is returned when the endpoint could
+    not be reached.
+
+    If the client has a validator, invalid records are left out of the
+    batch. None is returned when none of them was valid.
     """
 
     path = '/metrics/{}/{}'.format(cls.token, metric_name)
     validate_metric_name(metric_name)
-    data = {'metrics': json.dumps(metrics)}
 
-    return cls._request('POST', path=path, data=data)
+    metrics = validate_records(cls, 'metrics', metric_name, metrics)
+    if metrics is None:
+        return None
+
+    def send(batch):
+        data, headers = encode_batch(cls, 'metrics', batch)
+        return cls._request('POST', path=path, data=data, headers=headers)
+
+    return send_or_spool(cls, 'metrics', metric_name, metrics,
+                         lambda: send_with_split(cls, metrics, send))
 
 
 def get_metric(cls, metric_name,
@@ -91,6 +120,130 @@ def get_metric(cls, metric_name,
     return cls._request('GET', path=path, data=data)
 
 
+def get_metric_sharded(cls, metric_name, from_date, to_date,
+                       aggregator_function=None,
+                       aggregator_column=None,
+                       group_interval=None,
+                       filter_condition=None,
+                       shards=DEFAULT_SHARDS,
+                       max_workers=None):
+    """Return ``array`` of ``dict`` with the metrics that match the params,
+    splitting the time range into *shards* sub-windows queried in parallel.
+
+    Sub-window boundaries are aligned to *group_interval*, so each group
+    is computed by exactly one sub-query and aggregated values are the
+    same as with a single ``get_metric`` call. The points of each series
+    are merged back in time order.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string metric_name: Name of the metric.
+    :param string from_date: Unix formatted start date.
+    :param string to_date: Unix formatted end date.
+    :param string aggregator_function: Aggregator function. ``sum``,
+    ``count``, ``min``, ``max``,...
+    :param string aggregator_column: Column to which
+    ``aggregator_function`` is to be applied.
+    :param string group_interval: Intervals in which to group the results.
+    :param string filter_condition: Filters to be applied to metric values.
+    :param int shards: Number of sub-windows.
+    :param int max_workers: Max number of concurrent requests. Defaults to
+    *shards*.
+    :rtype: array
+    """
+
+    validate_metric_name(metric_name)
+    validate_dates(from_date, to_date)
+    if from_date is None or to_date is None:
+        raise ZeusException("Invalid date. Sharded queries need both "
+                            "from_date and to_date.")
+    if aggregator_function and not group_interval:
+        raise ZeusException("Sharded aggregated queries need a "
+                            "group_interval.")
+
+    windows = split_time_range(from_date, to_date, shards, group_interval)
+
+    def fetch(window):
+        response = get_metric(cls, metric_name, window[0], window[1],
+                              aggregator_function, aggregator_column,
+                              group_interval, filter_condition)
+        if response.status_code != 200:
+            raise ZeusException("Metric query failed with status {}".format(
+                response.status_code))
+        return response.json()
+
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max_workers or len(windows))
+    try:
+        results = list(executor.map(fetch, windows))
+    finally:
+        executor.shutdown(wait=False)
+
+    return merge_metric_series(results)
+
+
+def split_time_range(from_date, to_date, shards, group_interval=None):
+    """Return ``array`` of ``(from, to)`` sub-windows covering the range.
+
+    Inner boundaries fall on multiples of *group_interval* (counted from
+    the Unix epoch, like the server groups), and each sub-window ends
+    ``SHARD_EPSILON`` before the next one starts.
+
+    :param string from_date: Unix formatted start date.
+    :param string to_date: Unix formatted end date.
+    :param int shards: Max number of sub-windows.
+    :param string group_interval: Intervals in which results are grouped.
+    :rtype: array
+    """
+    start = float(from_date)
+    end = float(to_date)
+    step = parse_interval(group_interval) if group_interval else 1
+    width = math.ceil((end - start) / max(shards, 1) / step) * step
+    if width <= 0:
+        return [(from_date, to_date)]
+
+    edges = []
+    edge = math.floor(start / step) * step + width
+    while edge < end and len(edges) < shards - 1:
+        edges.append(edge)
+        edge += width
+
+    windows = []
+    window_start = from_date
+    for edge in edges:
+        windows.append((window_start, '%.3f' % (edge - SHARD_EPSILON)))
+        window_start = '%d' % edge
+    windows.append((window_start, to_date))
+    return windows
+
+
+def merge_metric_series(results):
+    """Merge the series returned by several ``get_metric`` calls over
+    consecutive time windows into one ``array`` of series.
+
+    :param array results: decoded responses, in time order.
+    :rtype: array
+    """
+    merged = []
+    by_name = {}
+    for result in results:
+        for series in result:
+            target = by_name.get(series['name'])
+            if target is None:
+                target = dict(series, points=list(series.get('points', [])))
+                by_name[series['name']] = target
+                merged.append(target)
+            else:
+                target['points'].extend(series.get('points', []))
+
+    for series in merged:
+        columns = series.get('columns', [])
+        if 'time' in columns:
+            index = columns.index('time')
+            series['points'].sort(key=lambda point: point[index])
+    return merged
+
+
 def get_metric_names(cls, metric_name=None, limit=None, offset=None):
     """Return ``array`` of ``string`` with the metric names that match the
     params.
@@ -113,7 +266,7 @@ def get_metric_names(cls, metric_name=None, limit=None, offset=None):
     if offset:
         data['offset'] = offset
 
-    return cls._request('GET', path=path, data=data)
+    return cached_get(cls, METRIC_NAMES, path, data)
 
 
 def delete_metric(cls, metric_name):
@@ -128,4 +281,9 @@ def delete_metric(cls, metric_name):
     path = '/metrics/{}/{}'.format(cls.token, metric_name)
     validate_metric_name(metric_name)
 
-    return cls._request('DELETE', path=path)
+    response = cls._request('DELETE', path=path)
+    invalidate(cls, '/metrics/{}/_names'.format(cls.token))
+    metric_cache = getattr(cls, 'metric_cache', None)
+    if metric_cache is not None:
+        metric_cache.forget(metric_name)
+    return response
@@ -14,45 +14,67 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import requests
 from urlparse import urlparse
 from urlparse import urljoin
 
+from compression import validate_compression
+from compression import DEFAULT_COMPRESSION_LEVEL
+from compression import DEFAULT_COMPRESSION_THRESHOLD
+from session import DEFAULT_POOL_CONNECTIONS
+from session import DEFAULT_POOL_MAXSIZE
+from transport import get_transport
+from transport import send_request
+from transport import DEFAULT_TIMEOUT
+from transport import REQUESTS
+
 METHOD_POST = 'POST'
 METHOD_GET = 'GET'
 METHOD_PUT = 'PUT'
 METHOD_DELETE = 'DELETE'
-TIMEOUT_SECONDS = 20
+TIMEOUT_SECONDS = DEFAULT_TIMEOUT
 
 
 class RestClient(object):
-    def __init__(self, server):
+    def __init__(self, server, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, keep_alive=True,
+                 retry=None, transport=REQUESTS, timeout=TIMEOUT_SECONDS,
+                 pool_block=False, compression=None,
+                 compression_level=DEFAULT_COMPRESSION_LEVEL,
+                 compression_threshold=DEFAULT_COMPRESSION_THRESHOLD,
+                 observers=None):
+        """
+        The pool, retry, transport, timeout, compression and observers
+        arguments work like those of ``ZeusClient``.
+        """
+        validate_compression(compression, compression_level)
         # makes sure we always use https
         url_object = urlparse(server)
         url_parts = list(url_object)
         url_parts[0] = "https://"
         self.server = ''.join(url_parts)
+        self.transport = get_transport(transport,
+                                       pool_connections=pool_connections,
+                                       pool_maxsize=pool_maxsize,
+                                       pool_block=pool_block,
+                                       keep_alive=keep_alive)
+        self.retry = retry
+        self.timeout = timeout
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_threshold = compression_threshold
+        self.observers = list(observers or [])
+
+    @property
+    def session(self):
+        return self.transport.session
+
+    def close(self):
+        self.transport.close()
 
     def __send_request(self, method, path, data=None, headers=None):
         final_url = urljoin(self.server, path)
-        if method == METHOD_POST:
-            r = requests.post(
-                final_url, data=data, headers=headers,
-                timeout=TIMEOUT_SECONDS
-            )
-        elif method == METHOD_GET:
-            r = requests.get(final_url, params=data, timeout=TIMEOUT_SECONDS)
-        elif method == METHOD_DELETE:
-            r = requests.delete(final_url, timeout=TIMEOUT_SECONDS)
-        elif method == METHOD_PUT:
-            r = requests.put(
-                final_url, data=data, headers=headers,
-                timeout=TIMEOUT_SECONDS
-            )
-        else:
-            # TODO Define exception more properly
-            raise Exception('Unknown method {}'.format(method))
-
+        r = send_request(self, method, final_url, path, data=data,
+                         headers=headers, timeout=self.timeout)
         if r.status_code == 500:
             raise Exception("Internal Server Error")
         try:
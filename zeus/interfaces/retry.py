@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import time
+
+from utils import lazy_import
+
+requests = lazy_import('requests')
+
+# Responses that may succeed if the same request is sent again later.
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+PAYLOAD_TOO_LARGE = 413
+# Stands for the POSTs uploading log and metric batches in the methods of a
+# retry policy. Other POSTs, like creating an alert, may have been applied
+# by the server before it failed, so they are not retried by default.
+UPLOAD = 'UPLOAD'
+UPLOAD_PATHS = ('/logs/', '/metrics/')
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+
+
+def network_errors():
+    """Return the exceptions raised by the transports when no response
+    was received, to be used in an ``except`` clause. ``requests`` is only
+    imported when one of them is caught.
+
+    :rtype: tuple
+    """
+    return (requests.ConnectionError, requests.Timeout)
+
+
+class RetryPolicy(object):
+    """
+    When and how long to wait before sending a failed request again.
+
+    Waits grow exponentially (``backoff_factor * 2 ** attempt``, capped at
+    ``max_backoff``) and, with *jitter*, a random time up to that value is
+    used so that many clients don't retry in lockstep. A ``Retry-After``
+    header sent by the server takes precedence.
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 max_backoff=DEFAULT_MAX_BACKOFF, jitter=True,
+                 methods=('GET', UPLOAD),
+                 retry_status=RETRYABLE_STATUS, split_batches=True):
+        """
+        :param max_retries: max number of retries of a request
+        :type max_retries: int
+        :param backoff_factor: wait before the first retry, in seconds
+        :type backoff_factor: float
+        :param max_backoff: max wait between two attempts, in seconds
+        :type max_backoff: float
+        :param jitter: wait a random time up to the backoff
+        :type jitter: bool
+        :param methods: HTTP methods that are retried, and ``UPLOAD`` for
+        the log and metric batch uploads. Use ``('GET',)`` to only retry
+        reads. POST, PUT and DELETE are not idempotent: a request failing
+        after the server applied it would be applied twice.
+        :type methods: tuple
+        :param retry_status: response status codes that are retried
+        :type retry_status: tuple
+        :param split_batches: send log and metric batches again in two
+        halves when they are too large (413) or time out
+        :type split_batches: bool
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.methods = tuple(m.upper() for m in methods)
+        self.retry_status = retry_status
+        self.split_batches = split_batches
+        self.sleep = time.sleep
+
+    def should_retry(self, method, attempt, response=None, upload=False):
+        """Return True if a request that failed with *response* (or with a
+        network error if None) should be sent again.
+
+        :param string method: HTTP method.
+        :param int attempt: number of retries already done.
+        :param response: response of the failed attempt.
+        :param bool upload: the request uploads a log or metric batch.
+        :rtype: bool
+        """
+        if attempt >= self.max_retries:
+            return False
+        if method.upper() not in self.methods and \
+                not (upload and UPLOAD in self.methods):
+            return False
+        return response is None or response.status_code in self.retry_status
+
+    def backoff(self, attempt, response=None):
+        """Return the number of seconds to wait before retry *attempt*.
+
+        :param int attempt: number of retries already done.
+        :param response: response of the failed attempt.
+        :rtype: float
+        """
+        retry_after = parse_retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+
+        delay = min(self.backoff_factor * (2 ** attempt), self.max_backoff)
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
+
+
+def parse_retry_after(response):
+    """Return the wait asked by the ``Retry-After`` header of *response*,
+    in seconds, or None.
+
+    :rtype: float
+    """
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        pass
+    from email.utils import mktime_tz, parsedate_tz
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(mktime_tz(date) - time.time(), 0)
+
+
+def is_upload(method, path):
+    """Return True if the request uploads a log or metric batch.
+
+    :rtype: bool
+    """
+    return method == 'POST' and path.startswith(UPLOAD_PATHS)
+
+
+def call_with_retry(policy, method, send, upload=False):
+    """Call *send* until it returns a response that doesn't need to be
+    retried according to *policy*, waiting between the attempts.
+
+    :param policy: retry policy, or None to send only once.
+    :type policy: RetryPolicy
+    :param string method: HTTP method of the request.
+    :param function send: sends the request and returns the response.
+    :param bool upload: the request uploads a log or metric batch.
+    :rtype: requests.Response
+    """
+    if policy is None:
+        return send()
+
+    attempt = 0
+    while True:
+        try:
+            response = send()
+        except network_errors():
+            if not policy.should_retry(method, attempt, upload=upload):
+                raise
+            response = None
+        else:
+            if not policy.should_retry(method, attempt, response, upload):
+                return response
+
+        policy.sleep(policy.backoff(attempt, response))
+        attempt += 1
+
+
+def send_with_split(cls, records, send):
+    """Send *records* with *send*, and send them again in two halves when
+    the batch is too large for the server or times out.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param records: the batch.
+    :param function send: sends a batch and returns the response.
+    :return: the first failed response of the halves, or the last one.
+    :rtype: requests.Response
+    """
+    policy = getattr(cls, 'retry', None)
+    if policy is None or not policy.split_batches or \
+            not isinstance(records, (list, tuple)):
+        return send(records)
+
+    try:
+        response = send(records)
+    except requests.Timeout:
+        if len(records) < 2:
+            raise
+    else:
+        if response.status_code != PAYLOAD_TOO_LARGE or len(records) < 2:
+            return response
+
+    half = len(records) // 2
+    first = send_with_split(cls, records[:half], send)
+    second = send_with_split(cls, records[half:], send)
+    if first.status_code >= 400:
+        return first
+    return second
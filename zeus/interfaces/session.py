@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from utils import lazy_import
+
+requests = lazy_import('requests')
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def build_session(pool_connections=DEFAULT_POOL_CONNECTIONS,
+                  pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                  pool_block=False,
+                  keep_alive=True):
+    """Return a ``requests.Session`` backed by a connection pool, so that
+    consecutive requests to the same host reuse their TCP/TLS connection.
+
+    :param int pool_connections: Number of per-host pools to keep.
+    :param int pool_maxsize: Max number of connections kept per host.
+    :param bool pool_block: Block when no free connection is available
+    instead of opening a throwaway one.
+    :param bool keep_alive: If False, ask the server to close the
+    connection after every request.
+    :rtype: requests.Session
+    """
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+
+    return session
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+
+from encoding import encode_batch
+from retry import network_errors, RETRYABLE_STATUS
+from utils import ZeusException
+
+FSYNC_NEVER = 'never'
+FSYNC_SEGMENT = 'segment'
+FSYNC_ALWAYS = 'always'
+FSYNC_POLICIES = (FSYNC_NEVER, FSYNC_SEGMENT, FSYNC_ALWAYS)
+
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_DRAIN_INTERVAL = 5.0
+
+SEGMENT_SUFFIX = '.seg'
+POSITION_FILE = 'position'
+
+
+class Spool(object):
+    """
+    Write-ahead spool keeping the log and metric batches that could not be
+    delivered, so that they can be sent again once the endpoint is back.
+
+    Batches are appended, one JSON line each, to numbered segment files in
+    *directory*. A background drainer replays them oldest first and deletes
+    each segment once all its batches are delivered. When the spool grows
+    over *max_bytes*, the oldest segments are evicted.
+    """
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 max_bytes=DEFAULT_MAX_BYTES, fsync=FSYNC_NEVER,
+                 drain_interval=DEFAULT_DRAIN_INTERVAL):
+        """
+        :param directory: directory holding the segment files
+        :type directory: str
+        :param segment_bytes: size after which a new segment is started
+        :type segment_bytes: int
+        :param max_bytes: max size of all the segments together
+        :type max_bytes: int
+        :param fsync: when to fsync the segment being written: 'never'
+        (leave it to the OS), 'segment' (when it is closed) or 'always'
+        (after every batch)
+        :type fsync: str
+        :param drain_interval: seconds between replay attempts
+        :type drain_interval: float
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ZeusException("Invalid fsync policy. It must be one of "
+                                "{}.".format(', '.join(FSYNC_POLICIES)))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.drain_interval = drain_interval
+
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._drainer = None
+        self._writer = None
+        self._sizes = {}
+        for filename in os.listdir(directory):
+            if filename.endswith(SEGMENT_SUFFIX):
+                seq = int(filename[:-len(SEGMENT_SUFFIX)])
+                self._sizes[seq] = os.path.getsize(self._path(seq))
+        self._position = self._load_position()
+        self._stats = {
+            'spooled': 0,
+            'replayed': 0,
+            'discarded': 0,
+            'evicted_segments': 0,
+            'evicted_bytes': 0,
+        }
+
+    @property
+    def pending_bytes(self):
+        """Size of the batches waiting to be replayed, in bytes."""
+        with self._lock:
+            return sum(self._sizes.values()) - self._position[1]
+
+    @property
+    def stats(self):
+        """Counters of this spool.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def append(self, kind, name, records, bucket=None):
+        """Append a batch to the spool.
+
+        :param string kind: ``'logs'`` or ``'metrics'``.
+        :param string name: log or metric name.
+        :param array records: ``array`` of ``dict`` of the batch.
+        :param string bucket: bucket the batch was sent to.
+        """
+        line = json.dumps({'kind': kind, 'name': name, 'bucket': bucket,
+                           'records': records}) + '\n'
+        with self._lock:
+            writer, seq = self._get_writer(len(line))
+            writer.write(line)
+            writer.flush()
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(writer.fileno())
+            self._sizes[seq] += len(line)
+            self._stats['spooled'] += 1
+            self._evict()
+
+    def replay(self, client):
+        """Send the spooled batches with *client*, oldest first, until the
+        spool is empty or a batch fails.
+
+        :param client: client used to send the batches
+        :type client: ZeusClient
+        :return: number of batches delivered
+        :rtype: int
+        """
+        with self._replay_lock:
+            delivered = 0
+            while True:
+                with self._lock:
+                    entry, next_position = self._read_next()
+                if entry is None:
+                    return delivered
+
+                accepted = False
+                if entry is not False:
+                    try:
+                        response = self._send(client, entry)
+                    except network_errors():
+                        return delivered
+                    if response.status_code in RETRYABLE_STATUS:
+                        return delivered
+                    accepted = response.status_code < 400
+
+                with self._lock:
+                    if accepted:
+                        self._stats['replayed'] += 1
+                        delivered += 1
+                    else:
+                        # Rejected or unreadable, sending it again won't
+                        # help.
+                        self._stats['discarded'] += 1
+                    self._advance(next_position)
+
+    def start(self, client):
+        """Start replaying the spool with *client* in a background thread.
+
+        :param client: client used to send the batches
+        :type client: ZeusClient
+        """
+        if self._drainer is not None:
+            return
+        self._drainer = threading.Thread(target=self._drain, args=(client,),
+                                         name='zeus-spool-drainer')
+        self._drainer.daemon = True
+        self._drainer.start()
+
+    def close(self):
+        """Stop the background drainer and close the segment being written.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._drainer is not None:
+            self._drainer.join()
+            self._drainer = None
+        with self._lock:
+            self._close_writer()
+            seq, offset = self._position
+            if seq is not None and offset >= self._sizes[seq]:
+                # Everything was replayed, don't leave an empty segment.
+                self._remove(seq)
+                self._position = (min(self._sizes) if self._sizes else None,
+                                  0)
+                self._save_position()
+
+    def _send(self, client, entry):
+        path = '/{}/{}/{}'.format(entry['kind'], client.token, entry['name'])
+        data, headers = encode_batch(client, entry['kind'], entry['records'])
+        return client.bucket(entry['bucket'])._request(
+            'POST', path=path, data=data, headers=headers)
+
+    def _drain(self, client):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.drain_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.replay(client)
+            except Exception:
+                # Keep the batches, they are tried again on the next round.
+                pass
+
+    def _path(self, seq):
+        return os.path.join(self.directory,
+                            '%020d%s' % (seq, SEGMENT_SUFFIX))
+
+    def _load_position(self):
+        try:
+            with open(os.path.join(self.directory, POSITION_FILE)) as f:
+                seq, offset = [int(v) for v in f.read().split()]
+        except (IOError, ValueError):
+            seq, offset = None, 0
+        if seq not in self._sizes:
+            seq = min(self._sizes) if self._sizes else None
+            offset = 0
+        return seq, offset
+
+    def _save_position(self):
+        path = os.path.join(self.directory, POSITION_FILE)
+        with open(path + '.tmp', 'w') as f:
+            f.write('%s %d' % (self._position[0], self._position[1]))
+        os.rename(path + '.tmp', path)
+
+    def _get_writer(self, size):
+        seq = max(self._sizes) if self._sizes else None
+        if self._writer is not None and \
+                self._sizes[seq] + size > self.segment_bytes:
+            self._close_writer()
+        if self._writer is None:
+            seq = seq + 1 if seq is not None else 0
+            self._writer = open(self._path(seq), 'ab')
+            self._sizes[seq] = 0
+            if self._position[0] is None:
+                self._position = (seq, 0)
+        return self._writer, seq
+
+    def _close_writer(self):
+        if self._writer is None:
+            return
+        if self.fsync != FSYNC_NEVER:
+            os.fsync(self._writer.fileno())
+        self._writer.close()
+        self._writer = None
+
+    def _read_next(self):
+        """Return the next spooled batch and the position after it, None
+        when the spool is empty, or False for an unreadable line."""
+        seq, offset = self._position
+        while seq is not None:
+            if offset < self._sizes[seq]:
+                with open(self._path(seq), 'rb') as f:
+                    f.seek(offset)
+                    line = f.readline()
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = False
+                return entry, (seq, offset + len(line))
+
+            if seq == max(self._sizes) and self._writer is not None:
+                return None, None
+            # Fully replayed segment.
+            self._remove(seq)
+            seq = min(self._sizes) if self._sizes else None
+            offset = 0
+            self._position = (seq, offset)
+        return None, None
+
+    def _advance(self, position):
+        if position[0] in self._sizes:
+            self._position = position
+            self._save_position()
+
+    def _remove(self, seq):
+        if seq == max(self._sizes):
+            self._close_writer()
+        os.remove(self._path(seq))
+        del self._sizes[seq]
+
+    def _evict(self):
+        while sum(self._sizes.values()) > self.max_bytes and \
+                len(self._sizes) > 1:
+            seq = min(self._sizes)
+            self._stats['evicted_segments'] += 1
+            self._stats['evicted_bytes'] += self._sizes[seq]
+            self._remove(seq)
+            if self._position[0] == seq:
+                self._position = (min(self._sizes), 0)
+                self._save_position()
+
+
+def send_or_spool(cls, kind, name, records, request):
+    """Run *request* and append the batch to the spool of the client if
+    the endpoint could not be reached or failed with a retryable status.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string kind: ``'logs'`` or ``'metrics'``.
+    :param string name: log or metric name.
+    :param records: the batch being sent.
+    :param function request: sends the batch and returns the response.
+    :return: the response, or None if the request raised and the batch was
+    spooled.
+    """
+    spool = getattr(cls, 'spool', None)
+    if spool is None or not isinstance(records, (list, tuple)):
+        return request()
+
+    bucket = getattr(cls, 'bucket_name', None)
+    try:
+        response = request()
+    except network_errors():
+        spool.append(kind, name, records, bucket)
+        return None
+
+    if response.status_code in RETRYABLE_STATUS:
+        spool.append(kind, name, records, bucket)
+    return response
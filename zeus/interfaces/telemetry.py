@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Self-monitoring: the client periodically sends its own request, buffering
+and spooling counters to Zeus as a metric.
+"""
+
+import copy
+import threading
+import time
+import weakref
+
+from instrumentation import LatencyHistogram, RequestObserver
+from metrics import send_metric
+from utils import validate_metric_name
+
+DEFAULT_PREFIX = 'zeus_client'
+DEFAULT_INTERVAL = 60.0
+
+# Counters of the buffered senders reported as their change over the
+# interval, and the names they are reported under.
+SENDER_COUNTERS = (('dropped', 'dropped'), ('sent', 'sent'),
+                   ('failed', 'failed'), ('batches', 'batches'),
+                   ('bytes', 'shipped_bytes'), ('flushes', 'flushes'),
+                   ('flush_seconds', 'flush_seconds'))
+SPOOL_COUNTERS = (('spooled', 'spooled'), ('replayed', 'replayed'),
+                  ('evicted_bytes', 'spool_evicted_bytes'))
+_KEY = 'requests'
+
+
+class SelfTelemetry(RequestObserver):
+    """
+    Collects the counters of a client and sends them every *interval*
+    seconds as one point of the metric *prefix*:
+
+    - ``requests``, ``errors`` (no response or 5xx), ``retries``,
+      ``bytes_out``, ``bytes_in``, ``latency_mean``, ``latency_p99``
+      for the requests of the interval;
+    - ``queue_depth`` of the buffered senders of the client, and the
+      ``dropped``, ``sent``, ``failed``, ``batches``, ``shipped_bytes``
+      records and ``flush_latency`` of their batches over the interval;
+    - ``spool_pending_bytes``, ``spooled``, ``replayed`` and
+      ``spool_evicted_bytes`` when the client has a spool.
+
+    Points are sent from a background thread through a view of the client
+    without retries, spool or observers, so a point that cannot be sent is
+    dropped and the monitoring never adds load when Zeus is struggling.
+    """
+
+    def __init__(self, prefix=DEFAULT_PREFIX, interval=DEFAULT_INTERVAL):
+        """
+        :param prefix: name of the metric the points are sent to
+        :type prefix: str
+        :param interval: seconds between two points
+        :type interval: float
+        """
+        validate_metric_name(prefix)
+        self.prefix = prefix
+        self.interval = interval
+        self.clock = time.time
+
+        self._lock = threading.Lock()
+        self._senders = weakref.WeakKeyDictionary()
+        self._spool = None
+        self._last_spool = {}
+        self._client = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._reset()
+        self._stats = {'published': 0, 'publish_failed': 0}
+
+    @property
+    def stats(self):
+        """Number of points ``published`` and of points that could not be
+        sent, ``publish_failed``.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self, client):
+        """Observe the requests of *client*, and send the points through
+        it from a background thread.
+
+        :param client: client to monitor
+        :type client: ZeusClient
+        """
+        if self._thread is not None:
+            return
+        view = copy.copy(client)
+        view.retry = None
+        view.spool = None
+        view.validator = None
+        view.observers = []
+        self._client = view
+        self._spool = client.spool
+        if self._spool is not None:
+            self._last_spool = self._spool.stats
+        client.observers.append(self)
+
+        self._thread = threading.Thread(target=self._run,
+                                        name='zeus-telemetry')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def watch(self, sender):
+        """Report the counters of the buffered *sender* too. Senders made
+        with ``bufferedLogSender`` and ``bufferedMetricSender`` are watched
+        already.
+
+        :type sender: zeus.interfaces.buffered.BufferedSender
+        """
+        with self._lock:
+            self._senders[sender] = sender.stats
+
+    def close(self):
+        """Stop sending points."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def on_request_end(self, event):
+        with self._lock:
+            self._requests += 1
+            if event.attempt:
+                self._retries += 1
+            if event.status >= 500:
+                self._errors += 1
+            self._bytes_out += event.bytes_out or 0
+            self._bytes_in += event.bytes_in or 0
+            self._latency.record(_KEY, event.timings['total'])
+
+    def on_request_error(self, event):
+        with self._lock:
+            self._requests += 1
+            self._errors += 1
+            if event.attempt:
+                self._retries += 1
+            self._latency.record(_KEY, event.timings['total'])
+
+    def collect(self):
+        """Return the point of the interval since the last call, and start
+        a new interval.
+
+        :rtype: dict
+        """
+        with self._lock:
+            point = {
+                'requests': self._requests,
+                'errors': self._errors,
+                'retries': self._retries,
+                'bytes_out': self._bytes_out,
+                'bytes_in': self._bytes_in,
+            }
+            stats = self._latency.snapshot().get(_KEY)
+            if stats is not None:
+                point['latency_mean'] = stats['mean']
+                point['latency_p99'] = stats['p99']
+            self._reset()
+
+            senders = self._senders.items()
+            if senders:
+                point['queue_depth'] = 0
+                for _, name in SENDER_COUNTERS:
+                    point[name] = 0
+            for sender, last in senders:
+                current = sender.stats
+                point['queue_depth'] += current['queued']
+                for key, name in SENDER_COUNTERS:
+                    point[name] += current[key] - last[key]
+                self._senders[sender] = current
+            if senders:
+                flushes = point.pop('flushes')
+                flush_seconds = point.pop('flush_seconds')
+                if flushes:
+                    point['flush_latency'] = flush_seconds / flushes
+
+            if self._spool is not None:
+                current = self._spool.stats
+                point['spool_pending_bytes'] = self._spool.pending_bytes
+                for key, name in SPOOL_COUNTERS:
+                    point[name] = current[key] - self._last_spool[key]
+                self._last_spool = current
+        return point
+
+    def publish(self):
+        """Send the point of the interval now.
+
+        :return: False if it could not be sent.
+        :rtype: bool
+        """
+        point = self.collect()
+        record = {'timestamp': self.clock(), 'point': point}
+        try:
+            response = send_metric(self._client, self.prefix, [record])
+            delivered = response is not None and response.status_code < 400
+        except Exception:
+            delivered = False
+        with self._lock:
+            self._stats['published' if delivered else 'publish_failed'] += 1
+        return delivered
+
+    def _reset(self):
+        self._requests = 0
+        self._errors = 0
+        self._retries = 0
+        self._bytes_out = 0
+        self._bytes_in = 0
+        self._latency = LatencyHistogram()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.publish()
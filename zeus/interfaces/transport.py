@@ -0,0 +1,479 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Transports sending the HTTP requests of ``ZeusClient`` and ``RestClient``:
+``requests`` (the default), raw ``urllib3``, HTTP/2 with ``hyper``, and an
+in-memory fake for tests and benchmarks.
+"""
+
+import datetime
+import functools
+import json
+import threading
+import time
+import urlparse
+
+from compression import compress_request
+from encoding import is_replayable
+from instrumentation import observe
+from retry import call_with_retry
+from retry import is_upload
+from session import build_session
+from session import DEFAULT_POOL_CONNECTIONS
+from session import DEFAULT_POOL_MAXSIZE
+from utils import lazy_import, ZeusException
+
+requests = lazy_import('requests')
+
+REQUESTS = 'requests'
+URLLIB3 = 'urllib3'
+HTTP2 = 'http2'
+FAKE = 'fake'
+# Protocols negotiated by Http2Transport.
+H2 = 'h2'
+HTTP11 = 'http/1.1'
+DEFAULT_TIMEOUT = 20
+METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+
+class Transport(object):
+    """
+    Sends HTTP requests. A transport is shared by a client, its bucket
+    views and their threads, so it must be thread safe.
+    """
+
+    def request(self, method, url, data=None, headers=None,
+                timeout=DEFAULT_TIMEOUT):
+        """Send a request and return its response.
+
+        The response has the ``status_code``, ``headers``, ``content``,
+        ``text``, ``json()``, ``elapsed`` and ``request.body`` of a
+        ``requests.Response``. Network errors are raised as
+        ``requests.ConnectionError`` and ``requests.Timeout``.
+
+        :param string method: 'GET', 'POST', 'PUT' or 'DELETE'.
+        :param string url: absolute URL.
+        :param data: query parameters of a GET, body of a POST or PUT: a
+        ``dict`` sent as a form, a string, or an iterable of chunks
+        :param dict headers: HTTP headers.
+        :param float timeout: seconds to wait for the server.
+        """
+        raise NotImplementedError()
+
+    @property
+    def session(self):
+        """
+        ``requests`` session sending the requests, None for the transports
+        that don't use one.
+
+        :rtype: requests.Session
+        """
+        return None
+
+    def close(self):
+        """Release the connections of this transport."""
+
+
+class Response(object):
+    """Response of the transports other than ``requests``."""
+
+    def __init__(self, status_code, headers, content, elapsed, body):
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.elapsed = elapsed
+        self.request = _Request(body)
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class _Request(object):
+    def __init__(self, body):
+        self.body = body
+
+
+def _check_method(method):
+    if method not in METHODS:
+        raise ZeusException('Unknown method {}'.format(method))
+
+
+class RequestsTransport(Transport):
+    """
+    Transport built on a pooled ``requests.Session``, created on first use.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keep_alive=True):
+        """
+        :param pool_connections: number of per-host connection pools
+        :type pool_connections: int
+        :param pool_maxsize: max number of connections kept per host
+        :type pool_maxsize: int
+        :param pool_block: wait for a free pooled connection instead of
+        opening an extra one
+        :type pool_block: bool
+        :param keep_alive: keep connections open between requests
+        :type keep_alive: bool
+        """
+        self.options = dict(pool_connections=pool_connections,
+                            pool_maxsize=pool_maxsize,
+                            pool_block=pool_block,
+                            keep_alive=keep_alive)
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        :rtype: requests.Session
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = build_session(**self.options)
+        return self._session
+
+    def request(self, method, url, data=None, headers=None,
+                timeout=DEFAULT_TIMEOUT):
+        _check_method(method)
+        if method == 'GET':
+            return self.session.get(url, params=data, headers=headers,
+                                    timeout=timeout)
+        elif method == 'POST':
+            return self.session.post(url, data=data, headers=headers,
+                                     timeout=timeout)
+        elif method == 'PUT':
+            return self.session.put(url, data=data, headers=headers,
+                                    timeout=timeout)
+        return self.session.delete(url, headers=headers, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class Urllib3Transport(Transport):
+    """
+    Transport calling a ``urllib3.PoolManager`` directly, without the
+    per-request preparation of ``requests``. Retries are left to the
+    client's retry policy.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keep_alive=True):
+        """
+        Same arguments as ``RequestsTransport``.
+        """
+        import urllib
+        import urllib3
+        self._urlencode = urllib.urlencode
+        self._urllib3 = urllib3
+        headers = None if keep_alive else {'Connection': 'close'}
+        self.pool = urllib3.PoolManager(num_pools=pool_connections,
+                                        maxsize=pool_maxsize,
+                                        block=pool_block, headers=headers,
+                                        retries=False)
+
+    def request(self, method, url, data=None, headers=None,
+                timeout=DEFAULT_TIMEOUT):
+        _check_method(method)
+        headers = dict(headers or {})
+        body = None
+        chunked = False
+        if method == 'GET' and data:
+            url = '{}?{}'.format(url, self._urlencode(data, doseq=True))
+        elif method in ('POST', 'PUT') and data is not None:
+            if isinstance(data, dict):
+                body = self._urlencode(data, doseq=True)
+                if not any(k.lower() == 'content-type' for k in headers):
+                    headers['Content-Type'] = \
+                        'application/x-www-form-urlencoded'
+            elif isinstance(data, unicode):
+                body = data.encode('utf-8')
+            elif isinstance(data, (str, bytearray)):
+                body = data
+            else:
+                body = data
+                chunked = True
+
+        exceptions = self._urllib3.exceptions
+        start = time.time()
+        try:
+            response = self.pool.urlopen(
+                method, url, body=body, headers=headers, chunked=chunked,
+                timeout=timeout, preload_content=False, redirect=False)
+            elapsed = datetime.timedelta(seconds=time.time() - start)
+            content = response.read()
+        except exceptions.NewConnectionError as e:
+            raise requests.ConnectionError(e)
+        except (exceptions.ConnectTimeoutError,
+                exceptions.ReadTimeoutError) as e:
+            raise requests.Timeout(e)
+        except exceptions.HTTPError as e:
+            raise requests.ConnectionError(e)
+        response.release_conn()
+        return Response(response.status, response.headers, content,
+                        elapsed, body)
+
+    def close(self):
+        self.pool.clear()
+
+
+class Http2Transport(RequestsTransport):
+    """
+    Transport sending the requests to an HTTPS endpoint over a single
+    HTTP/2 connection per host with ``hyper``. Concurrent requests are
+    multiplexed on it as separate streams, and headers, like the
+    ``Authorization`` header repeated on every call, are HPACK compressed.
+
+    The first request to a host finds out whether it speaks HTTP/2 (with
+    TLS ALPN). Hosts that don't, plain HTTP endpoints, streamed bodies, and
+    hosts whose HTTP/2 connection fails with a protocol error use the
+    pooled HTTP/1.1 session of ``RequestsTransport`` instead.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keep_alive=True):
+        """
+        Same arguments as ``RequestsTransport``, for the HTTP/1.1 fallback.
+        """
+        import socket
+        from hyper.http20.exceptions import HTTP20Error
+        from hyper.http20.response import HTTP20Response
+        from http2 import Http2Adapter
+        super(Http2Transport, self).__init__(pool_connections, pool_maxsize,
+                                             pool_block, keep_alive)
+        self._adapter = Http2Adapter
+        self._protocol_errors = HTTP20Error
+        self._http2_response = HTTP20Response
+        self._socket = socket
+        self._http2_session = None
+        # Protocol spoken by every host, found on its first request.
+        self._protocols = {}
+        self._probe_lock = threading.Lock()
+
+    def protocol(self, url):
+        """Return 'h2' or 'http/1.1', the protocol used for the host of
+        *url*, or None if it wasn't found yet.
+
+        :rtype: str
+        """
+        return self._protocols.get(urlparse.urlparse(url).netloc)
+
+    def request(self, method, url, data=None, headers=None,
+                timeout=DEFAULT_TIMEOUT):
+        _check_method(method)
+        parsed = urlparse.urlparse(url)
+        if parsed.scheme != 'https' or not is_replayable(data):
+            return super(Http2Transport, self).request(method, url, data,
+                                                       headers, timeout)
+
+        protocol = self._protocols.get(parsed.netloc)
+        if protocol is None:
+            # The first request of a host negotiates the protocol alone,
+            # so that concurrent ones don't each open a connection.
+            with self._probe_lock:
+                protocol = self._protocols.get(parsed.netloc)
+                if protocol is None:
+                    response = self._send_http2(parsed.netloc, method, url,
+                                                data, headers, timeout)
+                    if response is not None:
+                        return response
+                    protocol = self._protocols[parsed.netloc]
+
+        if protocol == H2:
+            response = self._send_http2(parsed.netloc, method, url, data,
+                                        headers, timeout)
+            if response is not None:
+                return response
+        return super(Http2Transport, self).request(method, url, data,
+                                                   headers, timeout)
+
+    def close(self):
+        super(Http2Transport, self).close()
+        with self._lock:
+            if self._http2_session is not None:
+                # HTTP20Adapter has no close(), close its connections.
+                # hyper fails to close the ones that never connected.
+                adapter = self._http2_session.get_adapter('https://')
+                for connection in adapter.connections.values():
+                    if connection._sock is not None:
+                        connection.close()
+                self._http2_session = None
+
+    @property
+    def http2_session(self):
+        """
+        Session sending the requests with ``hyper``.
+
+        :rtype: requests.Session
+        """
+        if self._http2_session is None:
+            with self._lock:
+                if self._http2_session is None:
+                    session = requests.Session()
+                    # Connection headers are not allowed in HTTP/2.
+                    session.headers.pop('Connection', None)
+                    session.mount('https://', self._adapter())
+                    self._http2_session = session
+        return self._http2_session
+
+    def _send_http2(self, host, method, url, data, headers, timeout):
+        """Send the request with ``hyper``, and return its response, or
+        None if the host must be sent HTTP/1.1 requests instead."""
+        try:
+            response = self.http2_session.request(
+                method, url, params=data if method == 'GET' else None,
+                data=data if method in ('POST', 'PUT') else None,
+                headers=headers, timeout=timeout)
+        except self._protocol_errors:
+            self._protocols[host] = HTTP11
+            return None
+        except self._socket.timeout as e:
+            raise requests.Timeout(e)
+        except self._socket.error as e:
+            # Python 2 reports TLS socket timeouts as an SSLError.
+            if 'timed out' in str(e):
+                raise requests.Timeout(e)
+            raise requests.ConnectionError(e)
+
+        if not isinstance(response.raw, self._http2_response):
+            # ALPN settled on HTTP/1.1, which hyper can't share between
+            # threads. The response is fine, the next requests go through
+            # the pooled session.
+            self._protocols[host] = HTTP11
+            parsed = urlparse.urlparse(url)
+            adapter = self.http2_session.get_adapter(url)
+            connection = adapter.connections.pop(
+                (parsed.hostname, parsed.port or 443, 'https', None), None)
+            if connection is not None:
+                connection.close()
+        else:
+            self._protocols[host] = H2
+        return response
+
+
+class FakeTransport(Transport):
+    """
+    In-memory transport for tests and benchmarks. Every request is recorded
+    in ``requests`` as ``(method, url, data, headers)`` and answered by
+    *handler*.
+    """
+
+    def __init__(self, handler=None):
+        """
+        :param handler: called with the method, url, data and headers of
+        every request, returns its ``(status_code, body)``, the body being
+        encoded to JSON unless it is a string. Every request gets a 200
+        and an empty JSON object by default.
+        :type handler: function
+        """
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, data=None, headers=None,
+                timeout=DEFAULT_TIMEOUT):
+        _check_method(method)
+        if data is not None and not isinstance(
+                data, (dict, str, unicode, bytearray)):
+            data = ''.join(data)
+        with self._lock:
+            self.requests.append((method, url, data, headers))
+        start = time.time()
+        if self.handler is None:
+            status_code, body = 200, {}
+        else:
+            status_code, body = self.handler(method, url, data, headers)
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        elapsed = datetime.timedelta(seconds=time.time() - start)
+        return Response(status_code, {'Content-Type': 'application/json'},
+                        body, elapsed, data)
+
+
+def send_request(cls, method, url, path, data=None, headers=None,
+                 timeout=DEFAULT_TIMEOUT):
+    """Send a request of a ``ZeusClient`` or ``RestClient`` with its
+    transport, compressing the body, retrying and calling the observers as
+    set on the client.
+
+    :param cls: client making the request
+    :type cls: ZeusClient or RestClient
+    :param string method: 'GET', 'POST', 'PUT' or 'DELETE'.
+    :param string url: absolute URL.
+    :param string path: url path of the request, reported to observers.
+    :param data: query parameters or body of the request.
+    :param dict headers: HTTP headers.
+    :param float timeout: seconds to wait for the server.
+    """
+    if method in ('POST', 'PUT'):
+        data, headers = compress_request(
+            data, headers, cls.compression, level=cls.compression_level,
+            threshold=cls.compression_threshold)
+    send = functools.partial(cls.transport.request, method, url, data=data,
+                             headers=headers, timeout=timeout)
+
+    # A streamed body is consumed by the first attempt.
+    retry = cls.retry if is_replayable(data) else None
+    if cls.observers:
+        send = observe(cls, method, path, send)
+    return call_with_retry(retry, method, send, is_upload(method, path))
+
+
+TRANSPORTS = {
+    REQUESTS: RequestsTransport,
+    URLLIB3: Urllib3Transport,
+    HTTP2: Http2Transport,
+    FAKE: FakeTransport,
+}
+# Packages needed by the transports, other than requests.
+REQUIREMENTS = {
+    URLLIB3: 'urllib3',
+    HTTP2: 'hyper',
+}
+
+
+def get_transport(transport=REQUESTS, **options):
+    """Return the transport *transport*: a name from ``TRANSPORTS``, built
+    with the pool *options*, or a ``Transport`` used as is.
+
+    :rtype: Transport
+    """
+    if isinstance(transport, Transport):
+        return transport
+    if transport not in TRANSPORTS:
+        raise ZeusException('Unknown transport {}. Use one of {}.'.format(
+            transport, ', '.join(sorted(TRANSPORTS))))
+    if transport == FAKE:
+        return FakeTransport()
+    try:
+        return TRANSPORTS[transport](**options)
+    except ImportError:
+        raise ZeusException('The {} transport needs {}, pip install '
+                            '{}'.format(transport, REQUIREMENTS[transport],
+                                        REQUIREMENTS[transport]))
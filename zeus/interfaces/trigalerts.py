@@ -14,6 +14,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from cache import cached_get
+from cache import TRIGGERED_ALERTS
+
 
 def get_triggered_alerts(cls):
     """Return all triggered alerts
@@ -24,7 +27,7 @@ def get_triggered_alerts(cls):
     """
     path = '/triggeredalerts/{}'.format(cls.token)
 
-    return cls._request('GET', path=path)
+    return cached_get(cls, TRIGGERED_ALERTS, path)
 
 
 def get_triggered_alerts_last24_hours(cls):
@@ -14,8 +14,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import importlib
 import re
 
+INTERVAL_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+INTERVAL_PATTERN = re.compile(r"^(\d+)([smhdw])$")
+METRIC_NAME_PATTERN = re.compile(r"^[^_.-][.\w-]*$")
+LOG_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9]*$")
+
 
 def validate_metric_name(name):
     if name is None:
@@ -24,7 +30,7 @@ def validate_metric_name(name):
     if name_length < 1 or name_length > 255:
         raise ZeusException("Invalid metric name. It must be longer than "
                             "1 character and shorter than 255 charaters.")
-    if not re.match(r"^[^_.-][.\w-]*$", name):
+    if not METRIC_NAME_PATTERN.match(name):
         raise ZeusException("Invalid metric name. The name needs to start "
                             "with a letter or number and can contain "
                             "_ - or .")
@@ -50,10 +56,47 @@ def validate_log_name(name):
     if name_length < 1 or name_length > 255:
         raise ZeusException("Invalid log name. It must be longer than 1 "
                             "character and shorter than 255 charaters.")
-    if not re.match(r"^[a-zA-Z0-9]*$", name):
+    if not LOG_NAME_PATTERN.match(name):
         raise ZeusException("Invalid log name. It can only contain "
                             "letters or numbers.")
 
 
+def parse_interval(interval):
+    """Return the number of seconds in a group interval such as ``'5m'``.
+
+    :param string interval: number followed by s, m, h, d or w.
+    :rtype: int
+    """
+    match = INTERVAL_PATTERN.match(str(interval))
+    if match is None or int(match.group(1)) == 0:
+        raise ZeusException("Invalid interval. It must be a number "
+                            "followed by s, m, h, d or w.")
+    return int(match.group(1)) * INTERVAL_SECONDS[match.group(2)]
+
+
+def lazy_import(name):
+    """Return a stand-in for the module *name*, imported on the first
+    access to one of its attributes, so that importing the client stays
+    fast when the module is not used.
+
+    :param string name: absolute module name, like 'requests'.
+    """
+    return _LazyModule(name)
+
+
+class _LazyModule(object):
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return '<lazy module {}>'.format(self._name)
+
+
 class ZeusException(Exception):
     pass
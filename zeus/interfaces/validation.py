@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import json
+import re
+import threading
+import time
+
+LOGS = 'logs'
+METRICS = 'metrics'
+
+MAX_FIELD_NAME_LENGTH = 255
+# Timestamps further in the future are most likely in milliseconds.
+DEFAULT_MAX_FUTURE = 24 * 3600
+TIMESTAMP_PATTERN = re.compile(r"^\d+(\.\d*)?$")
+NUMBER_TYPES = (int, long, float)
+JSON_ERRORS = (TypeError, ValueError, OverflowError)
+
+Rejection = collections.namedtuple('Rejection', 'index record reason')
+
+
+def check_timestamp(value, max_timestamp):
+    """Return why *value* is not a valid timestamp, or None.
+
+    :param value: Unix timestamp, as a number or a numeric string.
+    :param float max_timestamp: latest timestamp accepted, or None.
+    :rtype: str
+    """
+    if isinstance(value, bool) or not isinstance(value, NUMBER_TYPES):
+        if not isinstance(value, basestring) or \
+                not TIMESTAMP_PATTERN.match(value):
+            return 'invalid timestamp {!r}'.format(value)
+        value = float(value)
+    if value < 0 or (max_timestamp is not None and value > max_timestamp):
+        return 'timestamp {!r} out of range'.format(value)
+    return None
+
+
+def check_fields(record):
+    """Return why the keys of *record* are not valid field names, or None.
+
+    :rtype: str
+    """
+    for key in record:
+        if not isinstance(key, basestring) or \
+                not 0 < len(key) <= MAX_FIELD_NAME_LENGTH:
+            return 'invalid field name {!r}'.format(key)
+    return None
+
+
+def check_log(record, max_timestamp):
+    """Return why *record* is not a valid log, or None.
+
+    :rtype: str
+    """
+    if not isinstance(record, dict):
+        return 'not a dict'
+    reason = check_fields(record)
+    if reason is None and 'timestamp' in record:
+        reason = check_timestamp(record['timestamp'], max_timestamp)
+    return reason
+
+
+def check_metric(record, max_timestamp):
+    """Return why *record* is not a valid metric, or None.
+
+    :rtype: str
+    """
+    if not isinstance(record, dict):
+        return 'not a dict'
+    point = record.get('point')
+    if not isinstance(point, dict) or not point:
+        return 'missing point'
+    reason = check_fields(point)
+    if reason is None and 'timestamp' in record:
+        reason = check_timestamp(record['timestamp'], max_timestamp)
+    return reason
+
+
+CHECKS = {LOGS: check_log, METRICS: check_metric}
+
+
+class BatchValidator(object):
+    """
+    Checks log and metric batches record by record before they are sent,
+    so that a few malformed records don't get a whole batch rejected by
+    the server.
+
+    A record is rejected when it is not a dict, has a field name that is
+    not a non-empty string, has a ``timestamp`` that is not a positive
+    number or is more than *max_future* seconds ahead, has no ``point``
+    dict (metrics), or cannot be encoded to JSON.
+    """
+
+    def __init__(self, max_future=DEFAULT_MAX_FUTURE, check_json=True,
+                 on_reject=None):
+        """
+        :param max_future: max seconds a timestamp can be ahead of the
+        local clock, None for no limit
+        :type max_future: float
+        :param check_json: reject the records that cannot be encoded
+        :type check_json: bool
+        :param on_reject: called with the kind ('logs' or 'metrics'), the
+        log or metric name and the ``array`` of ``Rejection`` of a batch
+        :type on_reject: function
+        """
+        self.max_future = max_future
+        self.check_json = check_json
+        self.on_reject = on_reject
+        self.clock = time.time
+
+        self._lock = threading.Lock()
+        self._stats = {'accepted': 0, 'rejected': 0}
+
+    @property
+    def stats(self):
+        """Number of records accepted and rejected so far.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _max_timestamp(self):
+        if self.max_future is None:
+            return None
+        return self.clock() + self.max_future
+
+    def split(self, kind, records, dumps=json.dumps):
+        """Split *records* into the valid ones and the rejected ones.
+
+        :param string kind: ``'logs'`` or ``'metrics'``.
+        :param array records: ``array`` of ``dict`` of the batch.
+        :param function dumps: JSON encoder used to send the batch.
+        :return: ``array`` of the accepted records, in order, and
+        ``array`` of ``Rejection``.
+        :rtype: tuple
+        """
+        check = CHECKS[kind]
+        max_timestamp = self._max_timestamp()
+        accepted = []
+        rejected = []
+        accept = accepted.append
+        for index, record in enumerate(records):
+            reason = check(record, max_timestamp)
+            if reason is None:
+                accept(record)
+            else:
+                rejected.append(Rejection(index, record, reason))
+
+        if self.check_json and accepted:
+            try:
+                # Encoding the whole batch is much faster than record by
+                # record, which is only needed to find the culprits.
+                dumps(accepted)
+            except JSON_ERRORS:
+                accepted, rejected = self._split_json(records, rejected,
+                                                      dumps)
+
+        with self._lock:
+            self._stats['accepted'] += len(accepted)
+            self._stats['rejected'] += len(rejected)
+        return accepted, rejected
+
+    def _split_json(self, records, rejected, dumps):
+        skipped = set(rejection.index for rejection in rejected)
+        accepted = []
+        for index, record in enumerate(records):
+            if index in skipped:
+                continue
+            try:
+                dumps(record)
+            except JSON_ERRORS as e:
+                rejected.append(Rejection(index, record,
+                                          'not JSON serializable: %s' % e))
+            else:
+                accepted.append(record)
+        rejected.sort(key=lambda rejection: rejection.index)
+        return accepted, rejected
+
+    def filter(self, kind, name, records, dumps=json.dumps):
+        """Yield the valid records of the iterable *records*, reporting
+        the rejected ones as they come.
+
+        :param string kind: ``'logs'`` or ``'metrics'``.
+        :param string name: log or metric name.
+        :param records: iterable of ``dict``.
+        :param function dumps: JSON encoder used to send the batch.
+        """
+        check = CHECKS[kind]
+        max_timestamp = self._max_timestamp()
+        for index, record in enumerate(records):
+            reason = check(record, max_timestamp)
+            if reason is None and self.check_json:
+                try:
+                    dumps(record)
+                except JSON_ERRORS as e:
+                    reason = 'not JSON serializable: %s' % e
+            with self._lock:
+                self._stats['accepted' if reason is None else 'rejected'] += 1
+            if reason is None:
+                yield record
+            else:
+                self.report(kind, name, [Rejection(index, record, reason)])
+
+    def report(self, kind, name, rejected):
+        """Pass the rejections of a batch to the ``on_reject`` callback."""
+        if rejected and self.on_reject is not None:
+            self.on_reject(kind, name, rejected)
+
+
+def validate_records(cls, kind, name, records):
+    """Drop the invalid records of a batch if the client has a validator.
+
+    :param cls: class object
+    :type cls: ZeusClient
+    :param string kind: ``'logs'`` or ``'metrics'``.
+    :param string name: log or metric name.
+    :param records: the batch.
+    :return: the valid records, or None if every record was rejected.
+    """
+    validator = getattr(cls, 'validator', None)
+    if validator is None:
+        return records
+    if not isinstance(records, (list, tuple)):
+        return validator.filter(kind, name, records, cls.dumps)
+
+    accepted, rejected = validator.split(kind, records, cls.dumps)
+    validator.report(kind, name, rejected)
+    if rejected and not accepted:
+        return None
+    return accepted
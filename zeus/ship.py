@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Cisco Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+zeus-ship: upload NDJSON, CSV and syslog files to Zeus as logs or metrics,
+with parallel upload workers and resume after interruption.
+"""
+
+import argparse
+import collections
+import csv
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from client import ZeusClient
+from ingest.syslog import SyslogParser
+from ingest.tail import Checkpoint
+from interfaces.utils import ZeusException
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+SYSLOG = 'syslog'
+AUTO = 'auto'
+FORMATS = (AUTO, NDJSON, CSV, SYSLOG)
+EXTENSIONS = {
+    '.ndjson': NDJSON,
+    '.jsonl': NDJSON,
+    '.json': NDJSON,
+    '.csv': CSV,
+}
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 4
+DEFAULT_PROGRESS_INTERVAL = 1.0
+
+
+def detect_format(path):
+    """Return the format of *path* from its extension, syslog by default.
+
+    :rtype: str
+    """
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), SYSLOG)
+
+
+def expand_paths(patterns):
+    """Return the files matching the paths or glob *patterns*, in order
+    and without duplicates.
+
+    :rtype: array
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def convert_value(value):
+    """Return a CSV *value* as an int or a float when it is a number."""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def csv_record(row, metric):
+    """Turn a CSV *row* into a log record, or a metric record whose
+    columns other than ``timestamp`` make the point."""
+    row = dict((key, convert_value(value)) for key, value in row.items()
+               if value != '')
+    if not metric:
+        return row
+    record = {}
+    if 'timestamp' in row:
+        record['timestamp'] = row.pop('timestamp')
+    record['point'] = row
+    return record
+
+
+def read_batches(path, fmt, batch_size, start=0, metric=False,
+                 rejected=None):
+    """Yield ``(records, end_offset, size)`` batches of the records of
+    *path*, from offset *start*. *end_offset* is the offset of the line
+    after the batch, where a resumed upload starts again.
+
+    Records are read one line each, so CSV fields must not hold line
+    breaks. Lines that cannot be decoded are skipped.
+
+    :param string path: file to read.
+    :param string fmt: ``'ndjson'``, ``'csv'`` or ``'syslog'``.
+    :param int batch_size: number of records per batch.
+    :param int start: offset to read from.
+    :param bool metric: read metric records.
+    :param rejected: called with each skipped line and its error.
+    """
+    with open(path, 'rb') as f:
+        header = None
+        if fmt == CSV:
+            header = next(csv.reader([f.readline()]), None)
+            start = max(start, f.tell())
+        f.seek(start)
+
+        if fmt == NDJSON:
+            decode = json.loads
+        elif fmt == CSV:
+            def decode(line):
+                return csv_record(
+                    next(csv.DictReader([line], fieldnames=header)), metric)
+        else:
+            parse = SyslogParser().parse
+
+            def decode(line):
+                return parse(line) or {'message': line.rstrip('\r\n')}
+
+        batch = []
+        batch_start = offset = start
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                batch.append(decode(line))
+            except (ValueError, csv.Error) as e:
+                if rejected is not None:
+                    rejected(line, e)
+                continue
+            if len(batch) >= batch_size:
+                yield batch, offset, offset - batch_start
+                batch = []
+                batch_start = offset
+        if batch:
+            yield batch, offset, offset - batch_start
+
+
+class _FileProgress(object):
+    """
+    Delivery state of the batches of one file. Batches complete out of
+    order; the checkpoint only moves past batches that were all accepted.
+    Delivery is at least once: the batches accepted after a failed one
+    are sent again when the upload is resumed.
+    """
+
+    def __init__(self, path, file_id, checkpoint):
+        self.path = path
+        self.file_id = file_id
+        self.checkpoint = checkpoint
+        self._lock = threading.Lock()
+        self._pending = collections.OrderedDict()
+        self._done = set()
+
+    def add(self, seq, end):
+        with self._lock:
+            self._pending[seq] = end
+
+    def finish(self, seq, delivered):
+        with self._lock:
+            if delivered:
+                self._done.add(seq)
+            offset = None
+            while self._pending and next(iter(self._pending)) in self._done:
+                first, offset = self._pending.popitem(last=False)
+                self._done.remove(first)
+            if offset is not None and self.checkpoint is not None:
+                self.checkpoint.save(self.path, self.file_id + (offset,))
+
+
+class Shipper(object):
+    """
+    Uploads files with ``sendLog`` or ``sendMetric`` from a pool of
+    workers, a bounded number of batches ahead of the reader.
+    """
+
+    def __init__(self, client, log_name=None, metric_name=None, fmt=AUTO,
+                 batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                 checkpoint=None):
+        """
+        :param client: client sending the batches
+        :type client: ZeusClient
+        :param log_name: send the records as logs with this name
+        :type log_name: str
+        :param metric_name: send the records as metrics with this name
+        :type metric_name: str
+        :param fmt: 'ndjson', 'csv', 'syslog' or 'auto' to choose from the
+        file extension
+        :type fmt: str
+        :param batch_size: number of records per request
+        :type batch_size: int
+        :param workers: number of concurrent requests
+        :type workers: int
+        :param checkpoint: where the delivered offset of each file is
+        saved, to resume from it
+        :type checkpoint: zeus.ingest.tail.Checkpoint
+        """
+        if (log_name is None) == (metric_name is None):
+            raise ZeusException('Give either a log name or a metric name.')
+        if fmt not in FORMATS:
+            raise ZeusException('Unknown format {}.'.format(fmt))
+        self.client = client
+        self.log_name = log_name
+        self.metric_name = metric_name
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint = checkpoint
+
+        self._lock = threading.Lock()
+        self._stats = {'records': 0, 'bytes': 0, 'batches': 0, 'failed': 0,
+                       'rejected': 0, 'skipped_files': 0, 'last_error': None}
+
+    @property
+    def stats(self):
+        """Counters of the upload.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def ship(self, paths):
+        """Upload the files *paths*, one after the other, their batches
+        being sent in parallel.
+
+        :param array paths: files to upload.
+        :return: the counters of the upload.
+        :rtype: dict
+        """
+        slots = threading.Semaphore(self.workers * 2)
+        executor = ThreadPoolExecutor(self.workers)
+        try:
+            for path in paths:
+                self._ship_file(path, executor, slots)
+        finally:
+            executor.shutdown(wait=True)
+        return self.stats
+
+    def _ship_file(self, path, executor, slots):
+        stat = os.stat(path)
+        file_id = (stat.st_dev, stat.st_ino)
+        start = 0
+        saved = self.checkpoint.get(path) if self.checkpoint else None
+        if saved is not None and saved[:2] == file_id and \
+                saved[2] <= stat.st_size:
+            start = saved[2]
+        if start and start == stat.st_size:
+            with self._lock:
+                self._stats['skipped_files'] += 1
+            return
+
+        fmt = detect_format(path) if self.fmt == AUTO else self.fmt
+        progress = _FileProgress(path, file_id, self.checkpoint)
+        batches = read_batches(path, fmt, self.batch_size, start,
+                               metric=self.metric_name is not None,
+                               rejected=self._reject)
+        for seq, (records, end, size) in enumerate(batches):
+            progress.add(seq, end)
+            slots.acquire()
+            future = executor.submit(self._send, records, size)
+
+            def done(future, seq=seq):
+                slots.release()
+                progress.finish(seq, future.result())
+
+            future.add_done_callback(done)
+
+    def _reject(self, line, error):
+        with self._lock:
+            self._stats['rejected'] += 1
+            self._stats['last_error'] = repr(error)
+
+    def _send(self, records, size):
+        try:
+            if self.log_name is not None:
+                response = self.client.sendLog(self.log_name, records)
+            else:
+                response = self.client.sendMetric(self.metric_name, records)
+            error = None if response is not None and \
+                response.status_code < 400 else 'status {}'.format(
+                    getattr(response, 'status_code', None))
+        except Exception as e:
+            error = repr(e)
+
+        with self._lock:
+            if error is None:
+                self._stats['records'] += len(records)
+                self._stats['bytes'] += size
+                self._stats['batches'] += 1
+            else:
+                self._stats['failed'] += 1
+                self._stats['last_error'] = error
+        return error is None
+
+
+def report_progress(shipper, stream, interval, stop):
+    """Write the upload rates to *stream* every *interval* seconds until
+    *stop* is set."""
+    last = shipper.stats
+    last_time = time.time()
+    while not stop.wait(interval):
+        stats = shipper.stats
+        now = time.time()
+        elapsed = max(now - last_time, 1e-6)
+        stream.write('\r{} records ({:.0f}/s), {:.1f} MB ({:.2f} MB/s), '
+                     '{} failed batches '.format(
+                         stats['records'],
+                         (stats['records'] - last['records']) / elapsed,
+                         stats['bytes'] / 1e6,
+                         (stats['bytes'] - last['bytes']) / elapsed / 1e6,
+                         stats['failed']))
+        stream.flush()
+        last, last_time = stats, now
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='zeus-ship',
+        description='Upload NDJSON, CSV and syslog files to Zeus.')
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help='files or glob patterns')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--log', help='send the records to this log')
+    target.add_argument('--metric', help='send the records to this metric')
+    parser.add_argument('--format', default=AUTO, choices=FORMATS,
+                        help='format of the files, from their extension '
+                             'by default')
+    parser.add_argument('--token', default=os.environ.get('ZEUS_TOKEN'),
+                        help='Zeus token, $ZEUS_TOKEN by default')
+    parser.add_argument('--endpoint', default='https://api.ciscozeus.io')
+    parser.add_argument('--bucket', help='bucket to send the records to')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='number of concurrent uploads')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='number of records per request')
+    parser.add_argument('--compression', choices=('gzip', 'deflate'),
+                        help='compress the requests')
+    parser.add_argument('--resume', metavar='FILE',
+                        help='checkpoint file recording the delivered '
+                             'offset of each file, to resume from it')
+    parser.add_argument('--quiet', action='store_true',
+                        help='do not show the upload rates')
+    args = parser.parse_args(argv)
+    if not args.token:
+        parser.error('a token is needed, with --token or $ZEUS_TOKEN')
+    return args
+
+
+def main(argv=None):
+    """Entry point of the ``zeus-ship`` command.
+
+    :return: exit status, 1 if some batches failed or some records could
+    not be read.
+    :rtype: int
+    """
+    args = parse_args(argv)
+    client = ZeusClient(args.token, args.endpoint,
+                        pool_maxsize=args.workers,
+                        compression=args.compression)
+    if args.bucket:
+        client = client.bucket(args.bucket)
+    checkpoint = Checkpoint(args.resume) if args.resume else None
+    shipper = Shipper(client, args.log, args.metric, args.format,
+                      args.batch_size, args.workers, checkpoint)
+
+    stop = threading.Event()
+    if not args.quiet:
+        reporter = threading.Thread(
+            target=report_progress,
+            args=(shipper, sys.stderr, DEFAULT_PROGRESS_INTERVAL, stop))
+        reporter.daemon = True
+        reporter.start()
+    start = time.time()
+    try:
+        stats = shipper.ship(expand_paths(args.paths))
+    finally:
+        stop.set()
+        client.close()
+
+    elapsed = max(time.time() - start, 1e-6)
+    sys.stderr.write('\nSent {} records ({:.0f}/s) in {} batches, {} '
+                     'failed, {} records rejected.\n'.format(
+                         stats['records'], stats['records'] / elapsed,
+                         stats['batches'], stats['failed'],
+                         stats['rejected']))
+    if stats['failed'] or stats['rejected']:
+        sys.stderr.write('Last error: {}\n'.format(stats['last_error']))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())